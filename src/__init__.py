@@ -1,19 +1,125 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
 
 _all__: list[str] = [
+    "JsonFormatter",
+    "RateLimitFilter",
     "create_logger",
+    "stop_log_listeners",
 ]
 
+_DATE_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+# Attributes of every LogRecord; anything else was passed through `extra`
+_RECORD_ATTRIBUTES: frozenset[str] = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None))
+) | {"message", "asctime", "taskName"}
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including the ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "timestamp": self.formatTime(record, _DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop high-frequency records below ``WARNING``.
+
+    Each message template gets ``max_per_second`` records per second; the next record
+    let through reports how many were suppressed. ``sample_rate`` then keeps a random
+    fraction of the remaining records. Warnings and errors always pass.
+
+    Parameters
+    ----------
+    max_per_second : float | None, optional
+        Records per second allowed per message template. None disables the limit,
+        by default None.
+    sample_rate : float, optional
+        Fraction of the records kept, by default 1.0.
+    """
+
+    def __init__(self, max_per_second: float | None = None, sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.sample_rate = sample_rate
+        # Message template -> [window start, records in the window, records suppressed]
+        self._windows: dict[tuple[str, Any], list[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second is None:
+            return True
+        now: float = time.monotonic()
+        key: tuple[str, Any] = (record.name, record.msg)
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= 1.0:
+            suppressed: int = int(window[2]) if window is not None else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+            return True
+        if window[1] < self.max_per_second:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+# Background writers of the queued loggers, by logger name
+_LISTENERS: dict[str, QueueListener] = {}
+
+
+def stop_log_listeners() -> None:
+    """Flush and stop the background writers of the queued loggers."""
+    while _LISTENERS:
+        _, listener = _LISTENERS.popitem()
+        listener.stop()
+
+
+atexit.register(stop_log_listeners)
+
 
 def create_logger(
     name: str = "logger",
     log_level: int = logging.INFO,
     log_file: str | None = None,
+    use_queue: bool | None = None,
+    json_format: bool | None = None,
+    max_per_second: float | None = None,
+    sample_rate: float = 1.0,
 ) -> logging.Logger:
     """
     Create a configured logger with custom date formatting.
 
+    Calling it again with the same arguments returns the logger unchanged, so
+    every module can call it on import.
+
     Parameters:
     -----------
     name : str, optional
@@ -22,36 +128,80 @@ def create_logger(
         Logging level, by default logging.INFO
     log_file : str, optional
         Path to log file. If None, logs to console, by default None
+    use_queue : bool, optional
+        Hand the records to a ``QueueHandler`` and write them from a background
+        ``QueueListener`` thread, so logging never blocks the event loop on I/O.
+        By default the ``LOG_QUEUE`` environment variable, else False
+    json_format : bool, optional
+        Write one JSON object per record with ``JsonFormatter``. By default the
+        ``LOG_JSON`` environment variable, else False
+    max_per_second : float, optional
+        Records below WARNING allowed per second and message, see
+        ``RateLimitFilter``. None means no limit, by default None
+    sample_rate : float, optional
+        Fraction of the records below WARNING kept, by default 1.0
 
     Returns:
     --------
     logging.Logger
         Configured logger instance
     """
+    use_queue = _env_flag("LOG_QUEUE") if use_queue is None else use_queue
+    json_format = _env_flag("LOG_JSON") if json_format is None else json_format
+    config: tuple[Any, ...] = (log_level, log_file, use_queue, json_format, max_per_second, sample_rate)
+
     # Create logger
     logger = logging.getLogger(name)
+    if getattr(logger, "_create_logger_config", None) == config:
+        return logger
     logger.setLevel(log_level)
 
-    # Clear any existing handlers
+    # Clear the handlers and filters of a previous configuration
+    if (listener := _LISTENERS.pop(name, None)) is not None:
+        listener.stop()
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
+    logger.filters = [
+        log_filter for log_filter in logger.filters if not isinstance(log_filter, RateLimitFilter)
+    ]
 
     # Create formatter with YYYY-MM-DD HH:MM:SS format
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - [%(levelname)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    formatter: logging.Formatter = (
+        JsonFormatter()
+        if json_format
+        else logging.Formatter(
+            fmt="%(asctime)s - %(name)s - [%(levelname)s] - %(message)s",
+            datefmt=_DATE_FORMAT,
+        )
     )
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
 
     # File handler (optional)
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if use_queue:
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _LISTENERS[name] = listener
+        logger.addHandler(QueueHandler(log_queue))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    # Filter on the logger so dropped records are never formatted nor queued
+    if max_per_second is not None or sample_rate < 1.0:
+        logger.addFilter(RateLimitFilter(max_per_second=max_per_second, sample_rate=sample_rate))
 
+    logger._create_logger_config = config  # type: ignore[attr-defined]
     return logger
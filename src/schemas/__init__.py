@@ -1,3 +1,3 @@
-from .input_schema import GeneralResponse, ModelEnum
+from .input_schema import MODEL_CONTEXT_WINDOWS, MODEL_PRICES, GeneralResponse, ModelEnum
 
-__all__ = ["GeneralResponse", "ModelEnum"]
+__all__ = ["GeneralResponse", "MODEL_CONTEXT_WINDOWS", "MODEL_PRICES", "ModelEnum"]
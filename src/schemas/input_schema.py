@@ -84,3 +84,55 @@ class ModelEnum(str, Enum):
     BASE_REMOTE_MODEL_8B_MISTRAL_API = "mistral/ministral-8b-latest"  # $0.00/1M tokens
 
     INDICINA_LLM_8B_REMOTE = "/data/indicinaaa/Qwen3-8B-unsloth-bnb-4bit-fp16"  # $0.0001/1M tokens
+
+
+# Context window (tokens) of each model
+MODEL_CONTEXT_WINDOWS: dict[ModelEnum, int] = {
+    ModelEnum.DEEPSEEK_R1_1p5B_LOCAL: 131_072,
+    ModelEnum.DEEPSEEK_CHAT_685B_REMOTE_FREE: 163_840,
+    ModelEnum.DEEPSEEK_R1_70B_REMOTE_FREE: 131_072,
+    ModelEnum.GEMMA_3p0_1B_LOCAL: 32_768,
+    ModelEnum.GEMMA_3p0_27B_REMOTE: 131_072,
+    ModelEnum.GEMINI_2p0_FLASH_REMOTE: 1_048_576,
+    ModelEnum.GEMINI_2p5_FLASH_REMOTE: 1_048_576,
+    ModelEnum.GPT_4_p_1_NANO_REMOTE: 1_047_576,
+    ModelEnum.GPT_4_o_MINI_REMOTE: 128_000,
+    ModelEnum.QWEN_2p5_3B_LOCAL: 32_768,
+    ModelEnum.QWEN_3p0_4B_LOCAL: 40_960,
+    ModelEnum.QWEN_2p5_VL_72B_INSTRUCT_REMOTE: 32_768,
+    ModelEnum.LLAMA_3p2_1B_INSTRUCT_REMOTE: 131_072,
+    ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE: 131_072,
+    ModelEnum.LLAMA_3p1_8B_INSTRUCT_REMOTE: 131_072,
+    ModelEnum.LLAMA_3p2_11B_VISION_REMOTE_FREE: 131_072,
+    ModelEnum.LLAMA_3p3_70B_INSTRUCT_REMOTE: 131_072,
+    ModelEnum.LLAMA_GUARD_4_12B_MULTIMODAL_REMOTE: 163_840,
+    ModelEnum.MISTRAL_EMBED_MISTRAL_API: 8_192,
+    ModelEnum.BASE_REMOTE_MODEL_8B_MISTRAL_API: 131_072,
+    ModelEnum.INDICINA_LLM_8B_REMOTE: 32_768,
+}
+
+
+# Price in $ per 1M tokens of each model (local and free models cost nothing)
+MODEL_PRICES: dict[ModelEnum, float] = {
+    ModelEnum.DEEPSEEK_R1_1p5B_LOCAL: 0.0,
+    ModelEnum.DEEPSEEK_CHAT_685B_REMOTE_FREE: 0.0,
+    ModelEnum.DEEPSEEK_R1_70B_REMOTE_FREE: 0.0,
+    ModelEnum.GEMMA_3p0_1B_LOCAL: 0.0,
+    ModelEnum.GEMMA_3p0_27B_REMOTE: 0.10,
+    ModelEnum.GEMINI_2p0_FLASH_REMOTE: 0.10,
+    ModelEnum.GEMINI_2p5_FLASH_REMOTE: 0.15,
+    ModelEnum.GPT_4_p_1_NANO_REMOTE: 0.10,
+    ModelEnum.GPT_4_o_MINI_REMOTE: 0.15,
+    ModelEnum.QWEN_2p5_3B_LOCAL: 0.0,
+    ModelEnum.QWEN_3p0_4B_LOCAL: 0.0,
+    ModelEnum.QWEN_2p5_VL_72B_INSTRUCT_REMOTE: 0.25,
+    ModelEnum.LLAMA_3p2_1B_INSTRUCT_REMOTE: 0.005,
+    ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE: 0.01,
+    ModelEnum.LLAMA_3p1_8B_INSTRUCT_REMOTE: 0.02,
+    ModelEnum.LLAMA_3p2_11B_VISION_REMOTE_FREE: 0.0,
+    ModelEnum.LLAMA_3p3_70B_INSTRUCT_REMOTE: 0.07,
+    ModelEnum.LLAMA_GUARD_4_12B_MULTIMODAL_REMOTE: 0.05,
+    ModelEnum.MISTRAL_EMBED_MISTRAL_API: 0.0,
+    ModelEnum.BASE_REMOTE_MODEL_8B_MISTRAL_API: 0.0,
+    ModelEnum.INDICINA_LLM_8B_REMOTE: 0.0001,
+}
@@ -1,4 +1,6 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 from dotenv import load_dotenv
 from pydantic import SecretStr
@@ -27,38 +29,65 @@ class BaseSettingsConfig(BaseSettings):
 
 
 class Settings(BaseSettingsConfig):
-    """Application settings class containing credentials."""
+    """Application settings class containing credentials.
 
-    # OLLAMA
-    OLLAMA_API_KEY: SecretStr
-    OLLAMA_URL: str
+    Every credential is optional so a run only needs the ones of the providers it
+    uses; read them with ``require`` to fail with a clear message when one is missing.
+    """
+
+    # OLLAMA (the key is ignored by Ollama)
+    OLLAMA_API_KEY: SecretStr = SecretStr("ollama")
+    OLLAMA_URL: str | None = None
 
     # GROQ
-    GROQ_API_KEY: SecretStr
+    GROQ_API_KEY: SecretStr | None = None
     # GROQ_BASE_URL: str
 
     # LANGFUSE
-    LANGFUSE_SECRET_KEY: SecretStr
-    LANGFUSE_PUBLIC_KEY: SecretStr
-    LANGFUSE_HOST: str
+    LANGFUSE_SECRET_KEY: SecretStr | None = None
+    LANGFUSE_PUBLIC_KEY: SecretStr | None = None
+    LANGFUSE_HOST: str | None = None
 
     # TAVILY
-    TAVILY_API_KEY: SecretStr
+    TAVILY_API_KEY: SecretStr | None = None
 
     # OPENROUTER
-    OPENROUTER_API_KEY: SecretStr
-    OPENROUTER_URL: str
+    OPENROUTER_API_KEY: SecretStr | None = None
+    OPENROUTER_URL: str = "https://openrouter.ai/api/v1"
 
     # MISTRAL AI
-    MISTRAL_API_KEY: SecretStr
+    MISTRAL_API_KEY: SecretStr | None = None
 
     # GEMINI
-    GEMINI_API_KEY: SecretStr
+    GEMINI_API_KEY: SecretStr | None = None
 
     # LANGSMITH
-    LANGSMITH_API_KEY: SecretStr
+    LANGSMITH_API_KEY: SecretStr | None = None
     LANGSMITH_TRACING: bool = True
-    LANGSMITH_PROJECT: str
+    LANGSMITH_PROJECT: str | None = None
+
+    def require(self, name: str) -> Any:
+        """Return the setting ``name``, raising if it is not configured.
+
+        Parameters
+        ----------
+        name : str
+            Name of the setting, e.g. ``"OPENROUTER_API_KEY"``.
+
+        Returns
+        -------
+        Any
+            The value of the setting.
+
+        Raises
+        ------
+        ValueError
+            If the setting is not set in the environment nor in the ``.env`` file.
+        """
+        value: Any = getattr(self, name)
+        if value is None:
+            raise ValueError(f"{name} is not set; add it to the environment or the .env file")
+        return value
 
 
 def refresh_settings() -> Settings:
@@ -74,3 +103,18 @@ def refresh_settings() -> Settings:
     """
     load_dotenv(override=True)
     return Settings()  # type: ignore
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the Settings instance, loading it on first use.
+
+    Unlike ``refresh_settings``, the ``.env`` file is only read once per process.
+    Call ``get_settings.cache_clear()`` to force a reload.
+
+    Returns
+    -------
+    Settings
+        The cached Settings instance
+    """
+    return refresh_settings()
@@ -1,23 +1,51 @@
-from typing import Annotated, Any, TypedDict
+import time
+from typing import Annotated, Any, NotRequired, TypedDict
 
-from langchain.chat_models import init_chat_model
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import AnyMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessageChunk,
+    AnyMessage,
+    SystemMessage,
+    message_chunk_to_message,
+)
 from langchain_core.runnables.config import RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.store.base import BaseStore
 from pydantic import BaseModel
 
 from src.schemas import ModelEnum  # noqa: E402
-from src.settings import refresh_settings  # type: ignore
+from src.settings import get_settings  # type: ignore
 from src.studio import configuration  # type: ignore
-
-settings = refresh_settings()
+from src.studio.memory_store import (
+    MEMORY_WRITER,
+    ConsolidationJob,
+    MemoryConsolidationQueue,
+    UserMemory,
+    has_user_facts,
+    messages_after_watermark,
+)
+from src.studio.model_pool import AUTO_MODEL, MODEL_POOL, MODEL_ROUTER
+from src.utilities.profiling_utils import profile
+from src.utilities.rate_limit_utils import RATE_LIMITER
+from src.utilities.telemetry_utils import TELEMETRY, CallRecord, track_retries
+from src.utilities.token_utils import TokenCounter, get_context_budget, trim_messages_to_budget
 
 
 class MessageState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
+    # Model that answered the last run (resolved by the router when `model="auto"`)
+    model: NotRequired[str]
+    # Memory read once per run by `call_llm` and reused by `write_memory`
+    memory: NotRequired[str]
+    memory_version: NotRequired[int]
+    # Id of the last message already folded into memory for this thread
+    memory_watermark: NotRequired[str]
+    # Prompt tokens sent to and trimmed from the model in the last run
+    context_usage: NotRequired[dict[str, int]]
+    # Time to first token and inter-token latency of the last response
+    stream_metrics: NotRequired[dict[str, float]]
 
 
 class MessageStateValidator(BaseModel):
@@ -76,62 +104,201 @@ Based on the chat history below, please update the user information:
 """
 
 
-model_str: str = f"openai:{ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE.value}"
-llm: BaseChatModel = init_chat_model(
-    model=model_str,
-    api_key=settings.OPENROUTER_API_KEY.get_secret_value(),
-    base_url=settings.OPENROUTER_URL,
-    temperature=0.0,
-    seed=0,
-)
-
-
+def get_llm(model: str = ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE.value) -> BaseChatModel:
+    """Return the pooled chat model for ``model``, building it on first use."""
+    return MODEL_POOL.get(model)
+
+
+def resolve_model(configurable: configuration.Configuration) -> str:
+    """Return the model of the run, letting the router choose when it is ``"auto"``."""
+    if configurable.model != AUTO_MODEL:
+        return configurable.model
+    # Only route to the models whose provider credentials are configured
+    candidates: list[str] = [
+        model for model in MODEL_ROUTER.candidates if MODEL_POOL.is_configured(model)
+    ]
+    # Build every candidate once so switching models never builds a client mid-request
+    MODEL_POOL.warm(candidates)
+    return MODEL_ROUTER.choose(configurable.latency_slo_ms, candidates)
+
+
+token_counter: TokenCounter = TokenCounter()
+
+
+async def _astream_response(
+    llm: BaseChatModel, messages: list[AnyMessage], config: RunnableConfig
+) -> tuple[AnyMessage, dict[str, float]]:
+    """Stream the response of the model and measure its token latencies."""
+    start_time: float = time.perf_counter()
+    first_token_time: float | None = None
+    last_token_time: float = start_time
+    inter_token_latencies: list[float] = []
+    response: AIMessageChunk | None = None
+
+    async for chunk in llm.astream(messages, config):
+        now: float = time.perf_counter()
+        if chunk.content:
+            if first_token_time is None:
+                first_token_time = now
+            else:
+                inter_token_latencies.append(now - last_token_time)
+            last_token_time = now
+        response = chunk if response is None else response + chunk  # type: ignore
+
+    total_time: float = time.perf_counter() - start_time
+    ttft: float = (first_token_time or last_token_time) - start_time
+    inter_token_latencies.sort()
+    mean_itl: float = 0.0
+    p95_itl: float = 0.0
+    if inter_token_latencies:
+        mean_itl = sum(inter_token_latencies) / len(inter_token_latencies)
+        p95_itl = inter_token_latencies[int(0.95 * (len(inter_token_latencies) - 1))]
+
+    stream_metrics: dict[str, float] = {
+        "ttft_ms": round(ttft * 1000, 2),
+        "total_ms": round(total_time * 1000, 2),
+        "mean_inter_token_ms": round(mean_itl * 1000, 2),
+        "p95_inter_token_ms": round(p95_itl * 1000, 2),
+    }
+    return message_chunk_to_message(response), stream_metrics  # type: ignore
+
+
+@profile
 async def call_llm(state: MessageState, config: RunnableConfig, store: BaseStore) -> dict[str, Any]:
     # Get configuration
     configurable = configuration.Configuration.from_runnable_config(config)
-
-    # Get the user id
-    user_id = configurable.user_id
-
-    # Get the memory for the user
-    prefix: str = "memory"
-    key = "user_memory"
-    namespace = (prefix, user_id)
-    existing_memory = await store.aget(namespace, key)  # type: ignore
-
-    if existing_memory:
-        existing_memory_content = existing_memory.value.get(prefix)
-    else:
-        existing_memory_content = "No existing memory found"
-
-    system_message: str = MODEL_SYSTEM_MESSAGE.format(memory=existing_memory_content)
+    settings = get_settings()
+    if settings.OPENROUTER_API_KEY is not None:
+        RATE_LIMITER.ensure_refresh(
+            settings.OPENROUTER_API_KEY.get_secret_value(), settings.OPENROUTER_URL
+        )
+
+    # Get the memory for the user (pending writes included)
+    memory: UserMemory = await MEMORY_WRITER.aread(store, configurable.user_id)
+
+    system_message: str = MODEL_SYSTEM_MESSAGE.format(memory=memory.content)
+
+    model: str = resolve_model(configurable)
+
+    # Trim the oldest turns so the prompt fits the model's token budget
+    budget: int = get_context_budget(model, configurable.max_context_tokens)
+    system_tokens: int = token_counter.count_text(system_message)
+    trimmed = trim_messages_to_budget(state["messages"], budget - system_tokens, token_counter)
+
+    # Respond using memory + chat history, streaming tokens to `stream_mode="messages"` clients
+    start_time: float = time.perf_counter()
+    with track_retries() as retry_counter:
+        try:
+            response, stream_metrics = await _astream_response(
+                get_llm(model), [SystemMessage(content=system_message)] + trimmed.messages, config
+            )
+        except Exception as e:
+            MODEL_ROUTER.record_failure(model)
+            TELEMETRY.record(
+                CallRecord(
+                    model=model,
+                    source="chatbot",
+                    latency=time.perf_counter() - start_time,
+                    retries=retry_counter.retries,
+                    error=str(e),
+                )
+            )
+            raise
+    MODEL_ROUTER.record(model, stream_metrics["total_ms"])
+    # Fall back to the local token counts when the provider reports no usage
+    usage: dict[str, Any] = dict(getattr(response, "usage_metadata", None) or {})
+    TELEMETRY.record(
+        CallRecord(
+            model=model,
+            source="chatbot",
+            latency=stream_metrics["total_ms"] / 1000,
+            ttft=stream_metrics["ttft_ms"] / 1000,
+            prompt_tokens=usage.get("input_tokens", trimmed.tokens_sent + system_tokens),
+            completion_tokens=usage.get("output_tokens", token_counter.count_message(response)),
+            retries=retry_counter.retries,
+        )
+    )
+
+    return {
+        "messages": [response],
+        "model": model,
+        "stream_metrics": stream_metrics,
+        "memory": memory.content,
+        "memory_version": memory.version,
+        "context_usage": {
+            "tokens_sent": trimmed.tokens_sent + system_tokens,
+            "tokens_saved": trimmed.tokens_saved,
+        },
+    }
+
+
+@profile
+async def consolidate_memory(
+    store: BaseStore, user_id: str, memory: UserMemory, messages: list[AnyMessage], model: str
+) -> None:
+    """Fold ``messages`` into the user's memory with ``model`` and schedule the write."""
+    system_message: str = CREATE_MEMORY_INSTRUCTION.format(memory=memory.content)
     # Respond using memory + chat history
-    response = await llm.ainvoke([SystemMessage(content=system_message)] + state["messages"])  # type: ignore
-
-    return {"messages": [response]}
-
-
-async def write_memory(state: MessageState, config: RunnableConfig, store: BaseStore) -> None:
+    # Memory updates are internal, keep them out of the token stream sent to clients
+    start_time: float = time.perf_counter()
+    with track_retries() as retry_counter:
+        new_memory = await get_llm(model).ainvoke(
+            [SystemMessage(content=system_message)] + messages, config={"tags": [TAG_NOSTREAM]}
+        )  # type: ignore
+    usage: dict[str, Any] = dict(getattr(new_memory, "usage_metadata", None) or {})
+    TELEMETRY.record(
+        CallRecord(
+            model=model,
+            source="memory",
+            latency=time.perf_counter() - start_time,
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0),
+            retries=retry_counter.retries,
+        )
+    )
+
+    # Update existing memory (coalesced with other pending writes for the user)
+    await MEMORY_WRITER.awrite(store, user_id, new_memory.content, base_version=memory.version)  # type: ignore
+
+
+async def _consolidate_job(job: ConsolidationJob) -> None:
+    # The memory may have changed since the job was queued, so read it again
+    memory: UserMemory = await MEMORY_WRITER.aread(job.store, job.user_id)
+    await consolidate_memory(
+        job.store, job.user_id, memory, job.messages, job.model or configuration.Configuration.model
+    )
+
+
+# Background consolidation used when `Configuration.background_memory` is set
+MEMORY_QUEUE: MemoryConsolidationQueue = MemoryConsolidationQueue(consolidate=_consolidate_job)
+
+
+@profile
+async def write_memory(
+    state: MessageState, config: RunnableConfig, store: BaseStore
+) -> dict[str, Any]:
     # Get configuration
     configurable = configuration.Configuration.from_runnable_config(config)
-    user_id = configurable.user_id
-
-    prefix: str = "memory"
-    key = "user_memory"
-    namespace = (prefix, user_id)
-    existing_memory = await store.aget(namespace, key)  # type: ignore
 
-    if existing_memory:
-        existing_memory_content = existing_memory.value.get(prefix)
+    messages: list[AnyMessage] = state["messages"]
+    if configurable.incremental_memory:
+        messages = messages_after_watermark(messages, state.get("memory_watermark"))
+    # Nothing the user said looks worth remembering: skip the LLM call
+    if configurable.skip_memory_without_facts and not has_user_facts(messages):
+        return {"memory_watermark": state["messages"][-1].id}
+
+    # Consolidate with the model that answered the run
+    model: str = state.get("model", configurable.model)
+    if configurable.background_memory:
+        MEMORY_QUEUE.submit(store, configurable.user_id, messages, model=model)
     else:
-        existing_memory_content = "No existing memory found"
-
-    system_message: str = CREATE_MEMORY_INSTRUCTION.format(memory=existing_memory_content)
-    # Respond using memory + chat history
-    new_memory = await llm.ainvoke([SystemMessage(content=system_message)] + state["messages"])  # type: ignore
+        # Reuse the memory read by `call_llm` in this run: its version guards the write
+        memory = UserMemory(content=state["memory"], version=state["memory_version"])
+        await consolidate_memory(store, configurable.user_id, memory, messages, model)
+        if configurable.flush_memory_writes:
+            await MEMORY_WRITER.flush(store, configurable.user_id)
 
-    # Update existing memory
-    await store.aput(namespace, key, {prefix: new_memory.content})  # type: ignore
+    return {"memory_watermark": state["messages"][-1].id}
 
 
 # Graph
@@ -4,20 +4,60 @@ from typing import Any, Optional
 
 from langchain_core.runnables import RunnableConfig
 
+from src.schemas import ModelEnum
+
+# Fields where the per-run configurable wins over the environment variable, so a run
+# can route to another model (or "auto") even when MODEL is set
+_RUN_FIRST_FIELDS: frozenset[str] = frozenset({"model"})
+
+
+def _coerce(value: Any, field_type: Any) -> Any:
+    """Convert string values (e.g. from environment variables) to the field type."""
+    if not isinstance(value, str):
+        return value
+    if not value:
+        return None
+    if field_type is bool:
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    if field_type in (int, float, Optional[int], Optional[float]):
+        return float(value) if field_type in (float, Optional[float]) else int(value)
+    return value
+
 
 @dataclass(kw_only=True)
 class Configuration:
     """The configurable fields for the chatbot."""
 
     user_id: str = "default-user"
+    # Chat model used for this run (a `ModelEnum` value), or "auto" to let the router choose
+    model: str = ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE.value
+    # p95 latency target of the router in milliseconds; None picks the cheapest model
+    latency_slo_ms: Optional[float] = None
+    # Consolidate memory in a background queue instead of before the run ends
+    background_memory: bool = False
+    # Write the memory to the store before the run ends instead of after the
+    # write-behind delay, which stops rapid turns from being coalesced into one write
+    flush_memory_writes: bool = False
+    # Only fold messages newer than the thread's memory watermark into memory
+    incremental_memory: bool = False
+    # Skip the memory LLM call when no user message looks like a first-person fact
+    # (see `has_user_facts`, which misses facts such as "Bob here, from Lagos")
+    skip_memory_without_facts: bool = False
+    # Prompt token budget of `call_llm`; None uses the default budget of the model
+    max_context_tokens: Optional[int] = None
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
         """Create a Configuration instance from a RunnableConfig."""
         configurable = config["configurable"] if config and "configurable" in config else {}
-        values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
-            for f in fields(cls)
-            if f.init
-        }
-        return cls(**{k: v for k, v in values.items() if v})
+        values: dict[str, Any] = {}
+        for f in fields(cls):
+            if not f.init:
+                continue
+            run_value, env_value = configurable.get(f.name), os.environ.get(f.name.upper())
+            if f.name in _RUN_FIRST_FIELDS:
+                value = run_value if run_value is not None else env_value
+            else:
+                value = env_value if env_value is not None else run_value
+            values[f.name] = _coerce(value, f.type)
+        return cls(**{k: v for k, v in values.items() if v is not None})
@@ -0,0 +1,473 @@
+import asyncio
+import atexit
+import contextvars
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from langchain_core.messages import AnyMessage, HumanMessage
+from langgraph.store.base import BaseStore
+
+from src import create_logger
+
+logger = create_logger()
+
+MEMORY_PREFIX: str = "memory"
+MEMORY_KEY: str = "user_memory"
+NO_MEMORY: str = "No existing memory found"
+
+
+# First-person statements that usually carry facts about the user
+_USER_FACT_PATTERN: re.Pattern[str] = re.compile(
+    r"\b(?:i\s*am|i'm|im|i've|i'd|i'll|my|mine|myself|call me|name is|"
+    r"i\s+(?:live|work|like|love|enjoy|prefer|hate|dislike|want|plan|have|had|was|"
+    r"will|study|studied|moved|visited|need|use|speak|grew))\b",
+    re.IGNORECASE,
+)
+
+
+def memory_namespace(user_id: str) -> tuple[str, str]:
+    """Return the store namespace holding the memory of ``user_id``."""
+    return (MEMORY_PREFIX, user_id)
+
+
+def messages_after_watermark(messages: list[AnyMessage], watermark: str | None) -> list[AnyMessage]:
+    """
+    Return the messages that come after the message with id ``watermark``.
+
+    Parameters
+    ----------
+    messages : list[AnyMessage]
+        The conversation.
+    watermark : str | None
+        Id of the last message already folded into memory.
+
+    Returns
+    -------
+    list[AnyMessage]
+        The new messages, or every message if the watermark is unset or no longer
+        part of the conversation.
+    """
+    if watermark is not None:
+        for idx in range(len(messages) - 1, -1, -1):
+            if messages[idx].id == watermark:
+                return messages[idx + 1 :]
+    return messages
+
+
+def has_user_facts(messages: list[AnyMessage]) -> bool:
+    """
+    Cheaply check whether the user messages may contain facts about the user.
+
+    This is a first-person keyword heuristic with false negatives: facts stated
+    without "I"/"my" (e.g. "Bob here, from Lagos") are missed, so gating the memory
+    update on it can drop them.
+
+    Parameters
+    ----------
+    messages : list[AnyMessage]
+        The messages to check.
+
+    Returns
+    -------
+    bool
+        True if any user message contains a first-person statement.
+    """
+    for msg in messages:
+        if not isinstance(msg, HumanMessage):
+            continue
+        content: Any = msg.content
+        text: str = content if isinstance(content, str) else " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+        if _USER_FACT_PATTERN.search(text):
+            return True
+    return False
+
+
+@dataclass
+class UserMemory:
+    """The memory of a user and its version.
+
+    Parameters
+    ----------
+    content : str
+        The memory content.
+    version : int
+        Monotonic version of the memory. 0 means no memory has been written yet.
+    """
+
+    content: str
+    version: int
+
+
+@dataclass
+class _PendingWrite:
+    store: BaseStore
+    user_id: str
+    memory: UserMemory
+
+
+@dataclass
+class MemoryWriter:
+    """Read-through, write-behind access to the user memories in a ``BaseStore``.
+
+    Writes are held for ``delay`` seconds so rapid turns from the same user collapse
+    into a single ``store.aput``. Reads see pending writes, and every write carries
+    the version it was based on (as returned by ``aread``) so stale overwrites from
+    concurrent sessions of this process are rejected without reading the store
+    again. ``BaseStore`` has no conditional write, so writers in other processes are
+    not detected.
+
+    A pending write only lives in this process: callers that must not lose it await
+    ``flush``, and writes still pending when the interpreter exits are flushed by an
+    ``atexit`` hook.
+
+    Parameters
+    ----------
+    delay : float, optional
+        Seconds a write is held before being flushed to the store, by default 0.5.
+    max_tracked_users : int, optional
+        Number of users whose last stored version is remembered to reject stale
+        writes, least recently used first out, by default 10_000.
+    """
+
+    delay: float = 0.5
+    max_tracked_users: int = 10_000
+    _pending: dict[tuple[int, str], _PendingWrite] = field(default_factory=dict, init=False)
+    _flushing: dict[tuple[int, str], _PendingWrite] = field(default_factory=dict, init=False)
+    _tasks: dict[tuple[int, str], asyncio.Task[None]] = field(default_factory=dict, init=False)
+    # Last version read from or written to the store, by (store id, user id)
+    _stored_versions: dict[tuple[int, str], int] = field(default_factory=dict, init=False)
+    stale_writes: int = field(default=0, init=False)
+    coalesced_writes: int = field(default=0, init=False)
+
+    async def aread(self, store: BaseStore, user_id: str) -> UserMemory:
+        """
+        Read the memory of ``user_id``, including writes not yet flushed.
+
+        Parameters
+        ----------
+        store : BaseStore
+            The store holding the memories.
+        user_id : str
+            The user id.
+
+        Returns
+        -------
+        UserMemory
+            The memory and its version.
+        """
+        key = (id(store), user_id)
+        latest = self._pending.get(key) or self._flushing.get(key)
+        if latest is not None:
+            return latest.memory
+        item = await store.aget(memory_namespace(user_id), MEMORY_KEY)
+        if item is None:
+            memory = UserMemory(content=NO_MEMORY, version=0)
+        else:
+            # Memories written before versioning was introduced count as version 1
+            memory = UserMemory(content=item.value.get(MEMORY_PREFIX), version=item.value.get("version", 1))
+        self._track_version(key, memory.version)
+        return memory
+
+    def _track_version(self, key: tuple[int, str], version: int) -> None:
+        self._stored_versions.pop(key, None)
+        self._stored_versions[key] = version
+        if len(self._stored_versions) > self.max_tracked_users:
+            del self._stored_versions[next(iter(self._stored_versions))]
+
+    async def awrite(self, store: BaseStore, user_id: str, content: str, base_version: int) -> bool:
+        """
+        Schedule a write of the memory of ``user_id``.
+
+        Parameters
+        ----------
+        store : BaseStore
+            The store holding the memories.
+        user_id : str
+            The user id.
+        content : str
+            The new memory content.
+        base_version : int
+            The version of the memory the new content was derived from.
+
+        Returns
+        -------
+        bool
+            False if the write was rejected because the memory changed since
+            ``base_version`` was read, True otherwise.
+        """
+        key = (id(store), user_id)
+        pending = self._pending.get(key)
+        latest = pending or self._flushing.get(key)
+        current: int | None = latest.memory.version if latest is not None else self._stored_versions.get(key)
+        if current is not None and base_version != current:
+            self.stale_writes += 1
+            logger.warning(
+                "Rejected stale memory write for user %s (based on v%d, current v%d)",
+                user_id,
+                base_version,
+                current,
+            )
+            return False
+
+        memory = UserMemory(content=content, version=base_version + 1)
+        if pending is not None:
+            self.coalesced_writes += 1
+            pending.memory = memory
+        else:
+            self._pending[key] = _PendingWrite(store=store, user_id=user_id, memory=memory)
+        if self.delay <= 0:
+            await self._flush_key(key)
+        elif key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._flush_later(key))
+        return True
+
+    async def _flush_later(self, key: tuple[int, str]) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+            await self._flush_key(key)
+        except Exception as e:
+            # The write is back in `_pending`, the next flush retries it
+            logger.error("Memory write for user %s failed: %s", key[1], e)
+        finally:
+            self._tasks.pop(key, None)
+
+    async def _flush_key(self, key: tuple[int, str]) -> None:
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        # Reads keep seeing the memory until the write has landed in the store
+        self._flushing[key] = pending
+        try:
+            await pending.store.aput(
+                memory_namespace(pending.user_id),
+                MEMORY_KEY,
+                {MEMORY_PREFIX: pending.memory.content, "version": pending.memory.version},
+            )
+            self._track_version(key, pending.memory.version)
+        except BaseException:
+            # Keep the write unless a newer one was scheduled meanwhile
+            self._pending.setdefault(key, pending)
+            raise
+        finally:
+            if self._flushing.get(key) is pending:
+                del self._flushing[key]
+
+    async def flush(self, store: BaseStore | None = None, user_id: str | None = None) -> None:
+        """
+        Write the pending memories to the store immediately.
+
+        Parameters
+        ----------
+        store : BaseStore | None, optional
+            Only flush the memory of ``user_id`` in this store, by default every
+            pending memory is flushed.
+        user_id : str | None, optional
+            The user whose memory is flushed, with ``store``, by default None.
+
+        Raises
+        ------
+        Exception
+            The error of the first failed write, after every write was attempted.
+            Failed writes stay pending.
+        """
+        if store is not None and user_id is not None:
+            keys: list[tuple[int, str]] = [(id(store), user_id)]
+        else:
+            keys = list(self._pending)
+        errors: list[Exception] = []
+        for key in keys:
+            task = self._tasks.get(key)
+            if key in self._flushing and task is not None and task.get_loop() is asyncio.get_running_loop():
+                # The delayed flush is writing this memory right now: let it land first
+                await asyncio.wait({task})
+            try:
+                await self._flush_key(key)
+            except Exception as e:
+                logger.error("Memory write for user %s failed: %s", key[1], e)
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+
+# Writer shared by every run of the graph in this process
+MEMORY_WRITER: MemoryWriter = MemoryWriter()
+
+
+def _flush_at_exit() -> None:
+    """Flush the writes still pending when the interpreter exits."""
+    if not MEMORY_WRITER._pending:
+        return
+    logger.info("Flushing %d pending memory write(s) at exit", len(MEMORY_WRITER._pending))
+    try:
+        asyncio.run(MEMORY_WRITER.flush())
+    except Exception as e:
+        logger.error("Pending memory writes lost at exit: %s", e)
+
+
+atexit.register(_flush_at_exit)
+
+
+@dataclass
+class ConsolidationJob:
+    """Pending memory consolidation for one user.
+
+    Parameters
+    ----------
+    store : BaseStore
+        The store holding the memories.
+    user_id : str
+        The user id.
+    messages : list[AnyMessage]
+        The messages to fold into the memory.
+    enqueued_at : float
+        ``time.monotonic()`` when the oldest batched turn was submitted.
+    turns : int, optional
+        Number of turns batched into this job, by default 1.
+    model : str | None, optional
+        The model to consolidate with. None uses the default model, by default None.
+    """
+
+    store: BaseStore
+    user_id: str
+    messages: list[AnyMessage]
+    enqueued_at: float
+    turns: int = 1
+    model: str | None = None
+
+    def merge(self, messages: list[AnyMessage]) -> None:
+        """Batch another turn into the job, skipping messages already included."""
+        known_ids: set[str] = {msg.id for msg in self.messages if msg.id}
+        self.messages.extend(msg for msg in messages if not msg.id or msg.id not in known_ids)
+        self.turns += 1
+
+
+@dataclass
+class MemoryConsolidationQueue:
+    """Run memory consolidation in the background with a bounded worker pool.
+
+    Turns submitted for a user while a consolidation for that user is queued (or
+    running) are batched into a single job, and at most one job per user runs at
+    a time so consolidations never race on the same memory.
+
+    Parameters
+    ----------
+    consolidate : Callable[[ConsolidationJob], Awaitable[None]]
+        Coroutine function folding a job's messages into the user's memory.
+    max_workers : int, optional
+        Maximum number of concurrent consolidations, by default 4.
+    """
+
+    consolidate: Callable[[ConsolidationJob], Awaitable[None]]
+    max_workers: int = 4
+    _pending: dict[tuple[int, str], ConsolidationJob] = field(default_factory=dict, init=False)
+    _in_flight: set[tuple[int, str]] = field(default_factory=set, init=False)
+    _queue: asyncio.Queue[tuple[int, str]] | None = field(default=None, init=False)
+    _workers: list[asyncio.Task[None]] = field(default_factory=list, init=False)
+    processed: int = field(default=0, init=False)
+    failed: int = field(default=0, init=False)
+    batched_turns: int = field(default=0, init=False)
+    last_lag: float = field(default=0.0, init=False)
+    max_lag: float = field(default=0.0, init=False)
+
+    def _ensure_workers(self) -> asyncio.Queue[tuple[int, str]]:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or not self._workers or self._workers[0].get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            # Fresh context so consolidations don't report to the callbacks of the submitting run
+            self._workers = [
+                loop.create_task(self._worker(), context=contextvars.Context())
+                for _ in range(self.max_workers)
+            ]
+            # Keys queued on a previous event loop are requeued on the new one
+            for key in self._pending:
+                self._queue.put_nowait(key)
+        return self._queue
+
+    def submit(
+        self, store: BaseStore, user_id: str, messages: list[AnyMessage], model: str | None = None
+    ) -> None:
+        """
+        Queue the consolidation of ``messages`` into the memory of ``user_id``.
+
+        Parameters
+        ----------
+        store : BaseStore
+            The store holding the memories.
+        user_id : str
+            The user id.
+        messages : list[AnyMessage]
+            The messages of the turn.
+        model : str | None, optional
+            The model to consolidate with, by default None.
+        """
+        queue = self._ensure_workers()
+        key = (id(store), user_id)
+        job = self._pending.get(key)
+        if job is not None:
+            job.merge(messages)
+            job.model = model or job.model
+            self.batched_turns += 1
+            return
+        self._pending[key] = ConsolidationJob(
+            store=store,
+            user_id=user_id,
+            messages=list(messages),
+            enqueued_at=time.monotonic(),
+            model=model,
+        )
+        if key not in self._in_flight:
+            queue.put_nowait(key)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            key = await queue.get()
+            job = self._pending.pop(key, None)
+            if job is None:
+                queue.task_done()
+                continue
+            self._in_flight.add(key)
+            self.last_lag = time.monotonic() - job.enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            try:
+                await self.consolidate(job)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error("Memory consolidation failed for user %s: %s", job.user_id, e)
+            finally:
+                self._in_flight.discard(key)
+                # Turns submitted while this job was running
+                if key in self._pending:
+                    queue.put_nowait(key)
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued consolidation has completed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def metrics(self) -> dict[str, Any]:
+        """Return queue depth, lag and throughput metrics.
+
+        Returns
+        -------
+        dict[str, Any]
+            Queued and running job counts, processed/failed jobs, turns batched into
+            existing jobs, and the last and maximum lag in seconds between a turn being
+            submitted and its consolidation starting.
+        """
+        return {
+            "queue_depth": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "processed": self.processed,
+            "failed": self.failed,
+            "batched_turns": self.batched_turns,
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+        }
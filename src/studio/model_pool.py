@@ -0,0 +1,228 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import httpx
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from src import create_logger
+from src.schemas import MODEL_PRICES, ModelEnum
+from src.settings import get_settings
+from src.utilities.rate_limit_utils import RATE_LIMITER
+from src.utilities.telemetry_utils import merge_event_hooks, telemetry_event_hooks
+
+logger = create_logger()
+
+# Value of `Configuration.model` that lets the router pick the model
+AUTO_MODEL: str = "auto"
+
+# Models the router chooses from, cheapest local model first
+ROUTER_CANDIDATES: tuple[str, ...] = (
+    ModelEnum.QWEN_2p5_3B_LOCAL.value,
+    ModelEnum.LLAMA_3p2_3B_INSTRUCT_REMOTE.value,
+    ModelEnum.LLAMA_3p1_8B_INSTRUCT_REMOTE.value,
+    ModelEnum.GPT_4_o_MINI_REMOTE.value,
+)
+
+
+def is_local_model(model: str) -> bool:
+    """Return True if ``model`` is served by the local Ollama instance."""
+    try:
+        return ModelEnum(model).name.endswith("_LOCAL")
+    except ValueError:
+        return False
+
+
+def get_model_price(model: str) -> float:
+    """Return the price in $ per 1M tokens of ``model`` (infinite if unknown)."""
+    try:
+        return MODEL_PRICES[ModelEnum(model)]
+    except (KeyError, ValueError):
+        return float("inf")
+
+
+@dataclass
+class ChatModelPool:
+    """Chat model instances keyed by model name, built once and reused across runs.
+
+    Local models (``*_LOCAL`` in ``ModelEnum``) are served by Ollama through its
+    OpenAI-compatible API, every other model by OpenRouter.
+
+    Parameters
+    ----------
+    temperature : float, optional
+        Sampling temperature of every model, by default 0.0.
+    seed : int, optional
+        Sampling seed of every model, by default 0.
+    """
+
+    temperature: float = 0.0
+    seed: int = 0
+    _models: dict[str, BaseChatModel] = field(default_factory=dict, init=False)
+
+    def get(self, model: str) -> BaseChatModel:
+        """Return the chat model for ``model``, building it on first use."""
+        chat_model = self._models.get(model)
+        if chat_model is None:
+            chat_model = self._build(model)
+            self._models[model] = chat_model
+        return chat_model
+
+    @staticmethod
+    def is_configured(model: str) -> bool:
+        """Return True if the credentials of the provider serving ``model`` are set."""
+        settings = get_settings()
+        if is_local_model(model):
+            return settings.OLLAMA_URL is not None
+        return settings.OPENROUTER_API_KEY is not None
+
+    def warm(self, models: Iterable[str]) -> None:
+        """Build the chat models of ``models`` ahead of the first request."""
+        for model in models:
+            self.get(model)
+
+    def _build(self, model: str) -> BaseChatModel:
+        settings = get_settings()
+        if is_local_model(model):
+            api_key, base_url = settings.OLLAMA_API_KEY, settings.require("OLLAMA_URL")
+        else:
+            api_key, base_url = settings.require("OPENROUTER_API_KEY"), settings.OPENROUTER_URL
+        logger.info("Building chat model %s", model)
+        return init_chat_model(
+            model=f"openai:{model}",
+            api_key=api_key.get_secret_value(),
+            base_url=base_url,
+            temperature=self.temperature,
+            seed=self.seed,
+            # Report token usage in the last streamed chunk for the telemetry
+            stream_usage=True,
+            http_async_client=httpx.AsyncClient(
+                event_hooks=merge_event_hooks(RATE_LIMITER.event_hooks(), telemetry_event_hooks())
+            ),
+        )
+
+
+@dataclass
+class ModelRouter:
+    """Pick the cheapest model whose observed latency meets an SLO.
+
+    Models whose last call failed (e.g. a local Ollama that is not running) are
+    skipped for ``failure_cooldown_s`` seconds.
+
+    Parameters
+    ----------
+    candidates : tuple[str, ...], optional
+        The models to choose from, by default ``ROUTER_CANDIDATES``.
+    window : int, optional
+        Number of recent latencies kept per model, by default 100.
+    probe_interval_s : float, optional
+        Seconds after which a model that missed the SLO is tried again, so a
+        recovered model is picked up, by default 60.
+    failure_cooldown_s : float, optional
+        Seconds a model is skipped after a failed call, by default 60.
+    """
+
+    candidates: tuple[str, ...] = ROUTER_CANDIDATES
+    window: int = 100
+    probe_interval_s: float = 60.0
+    failure_cooldown_s: float = 60.0
+    _latencies: dict[str, deque[float]] = field(default_factory=dict, init=False)
+    _last_tried: dict[str, float] = field(default_factory=dict, init=False)
+    _failed_at: dict[str, float] = field(default_factory=dict, init=False)
+    _failures: dict[str, int] = field(default_factory=dict, init=False)
+
+    def record(self, model: str, latency_ms: float) -> None:
+        """Record the latency of a successful call to ``model``."""
+        self._latencies.setdefault(model, deque(maxlen=self.window)).append(latency_ms)
+        self._last_tried[model] = time.monotonic()
+        self._failed_at.pop(model, None)
+
+    def record_failure(self, model: str) -> None:
+        """Record a failed call to ``model``, skipping it for ``failure_cooldown_s``."""
+        self._failed_at[model] = self._last_tried[model] = time.monotonic()
+        self._failures[model] = self._failures.get(model, 0) + 1
+
+    def _recently_failed(self, model: str) -> bool:
+        failed_at: float | None = self._failed_at.get(model)
+        return failed_at is not None and time.monotonic() - failed_at < self.failure_cooldown_s
+
+    def _should_probe(self, model: str) -> bool:
+        """Return True if ``model`` has not been tried for ``probe_interval_s``."""
+        now: float = time.monotonic()
+        if now - self._last_tried.get(model, now) < self.probe_interval_s:
+            return False
+        # Only one call probes per interval
+        self._last_tried[model] = now
+        return True
+
+    def p95_latency(self, model: str) -> float | None:
+        """Return the p95 latency in milliseconds of ``model``, or None if unobserved."""
+        latencies = self._latencies.get(model)
+        if not latencies:
+            return None
+        ordered: list[float] = sorted(latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def choose(
+        self, latency_slo_ms: float | None = None, candidates: Iterable[str] | None = None
+    ) -> str:
+        """
+        Choose the model to use.
+
+        Models without observations are assumed to meet the SLO so they get
+        explored; once observed to be too slow they are skipped, except for one
+        probe call every ``probe_interval_s`` seconds. Models that recently failed
+        are skipped unless every candidate did.
+
+        Parameters
+        ----------
+        latency_slo_ms : float | None, optional
+            Maximum acceptable p95 latency in milliseconds. None picks the cheapest
+            candidate, by default None.
+        candidates : Iterable[str] | None, optional
+            The usable subset of ``self.candidates``, by default all of them.
+
+        Returns
+        -------
+        str
+            The cheapest candidate meeting the SLO, or the fastest one if none does.
+
+        Raises
+        ------
+        ValueError
+            If there is no candidate to choose from.
+        """
+        models: list[str] = list(self.candidates if candidates is None else candidates)
+        if not models:
+            raise ValueError("No model to route to")
+        healthy: list[str] = [model for model in models if not self._recently_failed(model)]
+        if not healthy:
+            # Every candidate failed recently: retry the one that failed first
+            return min(models, key=lambda model: self._failed_at[model])
+        by_price: list[str] = sorted(healthy, key=get_model_price)
+        if latency_slo_ms is None:
+            return by_price[0]
+        for model in by_price:
+            p95: float | None = self.p95_latency(model)
+            if p95 is None or p95 <= latency_slo_ms or self._should_probe(model):
+                return model
+        return min(by_price, key=lambda model: self.p95_latency(model) or 0.0)
+
+    def stats(self) -> dict[str, dict[str, float | None]]:
+        """Return the price, observation and failure counts and p95 latency of every candidate."""
+        return {
+            model: {
+                "price_per_1m_tokens": get_model_price(model),
+                "observations": float(len(self._latencies.get(model, ()))),
+                "failures": float(self._failures.get(model, 0)),
+                "p95_latency_ms": self.p95_latency(model),
+            }
+            for model in self.candidates
+        }
+
+
+# Shared by every run of the graph in this process
+MODEL_POOL: ChatModelPool = ChatModelPool()
+MODEL_ROUTER: ModelRouter = ModelRouter()
@@ -0,0 +1,361 @@
+"""Micro-benchmarks of the hot paths in the utilities.
+
+Usage
+-----
+python -m src.utilities.benchmarks
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import timeit
+from typing import Any, Callable, Type
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage, ToolMessage
+from pydantic import BaseModel, Field, validate_call
+
+from src.utilities.jinja_utils import (
+    PromptTemplateRegistry,
+    get_required_template_variables,
+    load_and_render_template,
+    setup_jinja_environment,
+)
+from src.utilities.llm_utils import (
+    MESSAGE_CONVERSION_CACHE,
+    SYSTEM_MESSAGE,
+    _convert_message,
+    clean_response_text,
+    compile_response_model,
+    convert_to_openai_messages,
+)
+from src.utilities.profiling_utils import PROFILER, is_profiling_enabled, profile, set_profiling_enabled
+
+
+class _Address(BaseModel):
+    street: str
+    city: str
+    country: str = Field(description="ISO country code")
+
+
+class _Employment(BaseModel):
+    company: str
+    title: str
+    years: int
+    salary: float | None = None
+
+
+class _Person(BaseModel):
+    name: str
+    age: int
+    addresses: list[_Address]
+    employment: list[_Employment]
+    interests: list[str] = Field(default_factory=list)
+
+
+class _People(BaseModel):
+    persons: list[_Person]
+
+
+_PEOPLE_JSON: str = json.dumps(
+    {
+        "persons": [
+            {
+                "name": f"Person {idx}",
+                "age": 20 + idx,
+                "addresses": [{"street": f"{idx} Main St", "city": "Lagos", "country": "NG"}],
+                "employment": [{"company": "Acme", "title": "Engineer", "years": idx % 10}],
+                "interests": ["reading", "chess"],
+            }
+            for idx in range(10)
+        ]
+    }
+)
+
+
+def _time_per_call(func: Callable[[], Any], number: int) -> float:
+    """Return the best per-call duration in microseconds over 5 repeats."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def benchmark_structured_request_overhead(number: int = 2_000) -> dict[str, float]:
+    """
+    Measure the per-call CPU overhead of building and validating a structured request.
+
+    Compares the original path (``validate_call``, ``model_json_schema``, prompt
+    formatting, ``json.loads`` and ``model_validate`` on every call) with the
+    compiled path (``compile_response_model`` and ``TypeAdapter.validate_json``).
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of calls per repeat, by default 2_000.
+
+    Returns
+    -------
+    dict[str, float]
+        Per-call overhead in microseconds for the ``before`` and ``after`` paths.
+    """
+
+    @validate_call
+    def prepare(message: str, response_model: Type[BaseModel]) -> Type[BaseModel]:
+        return response_model
+
+    def before() -> BaseModel:
+        response_model = prepare("message", _People)
+        json_schema = response_model.model_json_schema()
+        SYSTEM_MESSAGE.format(json_schema=json_schema)
+        return response_model.model_validate(json.loads(_PEOPLE_JSON))
+
+    def after() -> BaseModel:
+        compiled = compile_response_model(_People)
+        return compiled.adapter.validate_json(_PEOPLE_JSON)
+
+    return {"before": _time_per_call(before, number), "after": _time_per_call(after, number)}
+
+
+def _clean_response_text_regex(text: str) -> str:
+    """The original regex-based cleaner, kept as the benchmark baseline."""
+    return re.sub(r"<think>.*?</think>|`+json|`+", "", text, flags=re.DOTALL).strip()
+
+
+# Synthetic reasoning-model outputs, including adversarial ones for the lazy regex
+CLEANER_INPUTS: dict[str, str] = {
+    "large_think_block": f"<think>{'reasoning step. ' * 3_200}</think>```json\n{_PEOPLE_JSON}\n```",
+    "unclosed_think": f"<think>{'reasoning step. ' * 3_200}{_PEOPLE_JSON}",
+    "repeated_unclosed_think": "<think> " * 5_000,
+    "many_backticks": f"{'` ' * 25_000}{_PEOPLE_JSON}",
+    "prose_around_json": f"Here is the JSON you asked for:\n{_PEOPLE_JSON}\nLet me know if you need more.",
+}
+
+
+def benchmark_clean_response_text(number: int = 5) -> dict[str, float]:
+    """
+    Measure the throughput of ``clean_response_text`` against the original regex cleaner.
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of calls per repeat, by default 5.
+
+    Returns
+    -------
+    dict[str, float]
+        Per-call duration in microseconds of both cleaners for each synthetic input.
+    """
+    results: dict[str, float] = {}
+    for name, text in CLEANER_INPUTS.items():
+        results[f"{name}_regex"] = _time_per_call(
+            lambda text=text: _clean_response_text_regex(text), number
+        )
+        results[f"{name}_linear"] = _time_per_call(
+            lambda text=text: clean_response_text(text, extract_json=True), number
+        )
+    return results
+
+
+def benchmark_import_time(
+    module: str = "src.studio.chatbot_with_memory", repeat: int = 3
+) -> dict[str, float]:
+    """
+    Measure the cold import time of ``module`` in a fresh interpreter.
+
+    The subprocess runs without the API keys of ``Settings`` in its environment, so
+    it also guards against settings or clients being built at import time.
+
+    Parameters
+    ----------
+    module : str, optional
+        The module to import, by default "src.studio.chatbot_with_memory".
+    repeat : int, optional
+        Number of fresh interpreters to time, by default 3.
+
+    Returns
+    -------
+    dict[str, float]
+        The best import time in microseconds.
+    """
+    env: dict[str, str] = {
+        key: value for key, value in os.environ.items() if not key.endswith(("_API_KEY", "_URL"))
+    }
+    durations: list[float] = []
+    for _ in range(repeat):
+        start_time: float = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True, env=env)
+        durations.append(time.perf_counter() - start_time)
+    return {"import": min(durations) * 1e6}
+
+
+def benchmark_profiling_overhead(number: int = 200_000) -> dict[str, float]:
+    """
+    Measure the per-call overhead of ``profile`` on a trivial function.
+
+    Parameters
+    ----------
+    number : int, optional
+        Number of calls per repeat, by default 200_000.
+
+    Returns
+    -------
+    dict[str, float]
+        Per-call duration in microseconds of the plain function, and of the
+        profiled function with profiling disabled, enabled, and enabled with a 1%
+        sampling rate.
+    """
+
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    profiled = profile(add)
+    sampled = profile(sample_rate=0.01)(add)
+    was_enabled: bool = is_profiling_enabled()
+    try:
+        set_profiling_enabled(False)
+        results: dict[str, float] = {
+            "plain": _time_per_call(lambda: add(1, 2), number),
+            "disabled": _time_per_call(lambda: profiled(1, 2), number),
+        }
+        set_profiling_enabled(True)
+        results["enabled"] = _time_per_call(lambda: profiled(1, 2), number)
+        results["sampled_1pct"] = _time_per_call(lambda: sampled(1, 2), number)
+    finally:
+        set_profiling_enabled(was_enabled)
+        PROFILER.reset()
+    return results
+
+
+def benchmark_template_rendering(
+    searchpath: str = "notebooks/prompts", template_file: str = "p2.jinja2", number: int = 2_000
+) -> dict[str, float]:
+    """
+    Measure the per-prompt cost of rendering a template.
+
+    Compares looking the template up and re-parsing its variables from disk on every
+    call with the ``PromptTemplateRegistry``, rendering one by one and in bulk.
+
+    Parameters
+    ----------
+    searchpath : str, optional
+        Directory of the templates, by default "notebooks/prompts".
+    template_file : str, optional
+        The template rendered, by default "p2.jinja2".
+    number : int, optional
+        Number of renders per repeat, by default 2_000.
+
+    Returns
+    -------
+    dict[str, float]
+        Per-render duration in microseconds of each path.
+    """
+    context: dict[str, Any] = {
+        "instructions": "Answer the question.",
+        "examples": [{"question": f"Q{idx}", "answer": f"A{idx}"} for idx in range(3)],
+        "question": "What is the capital of Nigeria?",
+    }
+    env = setup_jinja_environment(searchpath)
+    registry = PromptTemplateRegistry(searchpath=searchpath, bytecode_cache_dir=None)
+
+    def before() -> str:
+        get_required_template_variables(env, template_file)
+        return load_and_render_template(env, template_file, context)
+
+    contexts: list[dict[str, Any]] = [context] * 100
+    return {
+        "before": _time_per_call(before, number),
+        "registry": _time_per_call(lambda: registry.render(template_file, context), number),
+        "registry_bulk": _time_per_call(
+            lambda: registry.render_many(template_file, contexts), number // 100
+        )
+        / 100,
+    }
+
+
+@validate_call
+def _convert_to_openai_messages_validated(messages: list[AnyMessage]) -> list[dict[str, Any]]:
+    """The conversion with the original per-call ``validate_call``, kept as the benchmark baseline."""
+    return [_convert_message(msg) for msg in messages]
+
+
+def _make_history(length: int) -> list[AnyMessage]:
+    """Build a conversation of ``length`` messages mixing text, images and tool calls."""
+    history: list[AnyMessage] = []
+    for idx in range(length // 4):
+        history += [
+            HumanMessage(
+                content=[
+                    {"type": "text", "text": f"Question {idx}: what is in this picture?"},
+                    {"type": "image", "url": f"https://example.com/{idx}.png"},
+                ],
+                id=f"human-{idx}",
+            ),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": "search", "args": {"query": f"picture {idx}"}, "id": f"call-{idx}"}],
+                id=f"ai-call-{idx}",
+            ),
+            ToolMessage(content=f"Result {idx}", tool_call_id=f"call-{idx}", id=f"tool-{idx}"),
+            AIMessage(content=f"Answer {idx}. " * 20, id=f"ai-{idx}"),
+        ]
+    return history
+
+
+def benchmark_message_conversion(length: int = 200, number: int = 200) -> dict[str, float]:
+    """
+    Measure the per-turn cost of converting a long conversation to OpenAI messages.
+
+    Compares the conversion validated on every call with the direct conversion,
+    and with the per-thread cache when the conversation grows by one exchange
+    (4 messages) per turn and the system prompt is rebuilt every turn.
+
+    Parameters
+    ----------
+    length : int, optional
+        Number of messages in the conversation, by default 200.
+    number : int, optional
+        Number of conversions per repeat, by default 200.
+
+    Returns
+    -------
+    dict[str, float]
+        Per-turn duration in microseconds of each path.
+    """
+    history: list[AnyMessage] = _make_history(length + 4)
+    previous_turn, turn = history[:length], history[4 : length + 4]
+
+    def cached() -> list[dict[str, Any]]:
+        convert_to_openai_messages([SystemMessage(content="You are helpful.")] + previous_turn, "bench")
+        return convert_to_openai_messages([SystemMessage(content="You are helpful.")] + turn, "bench")
+
+    try:
+        return {
+            "validated": _time_per_call(lambda: _convert_to_openai_messages_validated(history), number),
+            "direct": _time_per_call(lambda: convert_to_openai_messages(history), number),
+            # Two turns per call, so halve the duration
+            "cached_per_turn": _time_per_call(cached, number) / 2,
+        }
+    finally:
+        MESSAGE_CONVERSION_CACHE.clear("bench")
+
+
+BENCHMARKS: dict[str, Callable[[], dict[str, float]]] = {
+    "structured_request_overhead": benchmark_structured_request_overhead,
+    "clean_response_text": benchmark_clean_response_text,
+    "import_time": benchmark_import_time,
+    "profiling_overhead": benchmark_profiling_overhead,
+    "template_rendering": benchmark_template_rendering,
+    "message_conversion": benchmark_message_conversion,
+}
+
+
+def main() -> None:
+    """Run every benchmark and print the results."""
+    for name, benchmark in BENCHMARKS.items():
+        results: dict[str, float] = benchmark()
+        formatted: str = ", ".join(f"{label}={value:,.2f}us" for label, value in results.items())
+        print(f"{name}: {formatted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+def make_cache_key(payload: Any) -> str:
+    """
+    Build a canonical hash of a JSON-like payload.
+
+    Dictionary keys are sorted and whitespace is removed before hashing so
+    semantically identical payloads map to the same key.
+
+    Parameters
+    ----------
+    payload : Any
+        The payload to hash, e.g. the model, messages and sampling parameters.
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the canonical JSON representation.
+    """
+    canonical: str = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit, miss and eviction counters of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class ResponseCache(ABC):
+    """Base class of the response caches.
+
+    Subclasses implement the synchronous ``get``/``set``; the async variants run
+    them directly unless the backend does blocking I/O.
+
+    Parameters
+    ----------
+    ttl : float | None, optional
+        Seconds an entry stays valid. None means entries never expire, by default 3600.
+    """
+
+    ttl: float | None = 3600
+    stats: CacheStats = field(default_factory=CacheStats, init=False)
+
+    def _expires_at(self) -> float | None:
+        return time.time() + self.ttl if self.ttl is not None else None
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Return the value stored under ``key``, or None if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key``."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    async def aget(self, key: str) -> Any | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+
+@dataclass
+class InMemoryLRUCache(ResponseCache):
+    """In-memory LRU cache with a time-to-live.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of entries before the least recently used is evicted,
+        by default 1024.
+    ttl : float | None, optional
+        Seconds an entry stays valid, by default 3600.
+    """
+
+    maxsize: int = 1024
+    _entries: OrderedDict[str, tuple[float | None, Any]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._entries[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (self._expires_at(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class SQLiteCache(ResponseCache):
+    """Persistent cache stored in a SQLite database.
+
+    Values must be JSON serializable. Blocking database access runs in a worker
+    thread when the async methods are used.
+
+    Parameters
+    ----------
+    path : str | Path, optional
+        Path of the database file, by default ".cache/llm_responses.sqlite".
+    ttl : float | None, optional
+        Seconds an entry stays valid, by default 3600.
+    max_entries : int | None, optional
+        Maximum number of entries before the oldest are evicted. None means
+        unbounded, by default None.
+    """
+
+    path: str | Path = ".cache/llm_responses.sqlite"
+    max_entries: int | None = None
+    _conn: sqlite3.Connection = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.stats.evictions += 1
+                row = None
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), time.time(), self._expires_at()),
+            )
+            if self.max_entries is not None:
+                evicted = self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+                self.stats.evictions += max(evicted, 0)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    async def aget(self, key: str) -> Any | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
@@ -0,0 +1,212 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Literal
+
+from src import create_logger
+
+logger = create_logger()
+
+CircuitState = Literal["closed", "open", "half_open"]
+# Numeric encoding of the states for metrics
+CIRCUIT_STATE_VALUES: dict[str, float] = {"closed": 0.0, "half_open": 1.0, "open": 2.0}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a provider whose circuit is open."""
+
+    def __init__(self, key: str, retry_in: float) -> None:
+        super().__init__(f"Circuit open for {key}, next probe in {retry_in:.1f}s")
+        self.key = key
+        self.retry_in = retry_in
+
+
+@dataclass
+class CircuitBreaker:
+    """Stop sending requests to a failing provider until it recovers.
+
+    The circuit opens after ``failure_threshold`` consecutive failures, or when the
+    error rate over the last ``window`` seconds exceeds ``error_rate_threshold``
+    (once ``min_calls`` calls were made). While open, calls fail fast with
+    ``CircuitOpenError``. After ``reset_timeout`` seconds the circuit is half-open
+    and lets ``half_open_max_calls`` probe calls through: a success closes it, a
+    failure opens it again.
+
+    Parameters
+    ----------
+    key : str
+        Name of the protected endpoint, used in the logs.
+    failure_threshold : int, optional
+        Consecutive failures opening the circuit, by default 5.
+    error_rate_threshold : float, optional
+        Error rate opening the circuit, by default 0.5.
+    min_calls : int, optional
+        Calls in the window before the error rate is considered, by default 20.
+    window : float, optional
+        Length of the error rate window in seconds, by default 60.0.
+    reset_timeout : float, optional
+        Seconds the circuit stays open before probing, by default 30.0.
+    half_open_max_calls : int, optional
+        Concurrent probe calls allowed while half-open, by default 1.
+    """
+
+    key: str
+    failure_threshold: int = 5
+    error_rate_threshold: float = 0.5
+    min_calls: int = 20
+    window: float = 60.0
+    reset_timeout: float = 30.0
+    half_open_max_calls: int = 1
+    state: CircuitState = field(default="closed", init=False)
+    consecutive_failures: int = field(default=0, init=False)
+    opened_count: int = field(default=0, init=False)
+    rejected_count: int = field(default=0, init=False)
+    _opened_at: float = field(default=0.0, init=False, repr=False)
+    _probes_in_flight: int = field(default=0, init=False, repr=False)
+    _outcomes: deque[tuple[float, bool]] = field(default_factory=deque, init=False, repr=False)
+
+    def _retry_in(self) -> float:
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def is_available(self) -> bool:
+        """Return True if a call would be let through right now (without reserving it)."""
+        if self.state == "open":
+            return self._retry_in() == 0.0
+        if self.state == "half_open":
+            return self._probes_in_flight < self.half_open_max_calls
+        return True
+
+    def before_call(self) -> None:
+        """
+        Reserve a call through the circuit.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit is open, or half-open with every probe slot taken.
+        """
+        if self.state == "open":
+            if self._retry_in() > 0:
+                self.rejected_count += 1
+                raise CircuitOpenError(self.key, self._retry_in())
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejected_count += 1
+                raise CircuitOpenError(self.key, 0.0)
+            self._probes_in_flight += 1
+
+    def record_success(self) -> None:
+        """Record a call that reached the provider and got a response."""
+        self._record(True)
+        self.consecutive_failures = 0
+        if self.state == "half_open":
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            self._transition("closed")
+
+    def record_failure(self) -> None:
+        """Record a call that failed because of the provider (server error, timeout)."""
+        self._record(False)
+        self.consecutive_failures += 1
+        if self.state == "half_open":
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            self._transition("open")
+        elif self.state == "closed" and self._should_open():
+            self._transition("open")
+
+    def release(self) -> None:
+        """Release the reservation of a call cancelled before its outcome was known."""
+        if self.state == "half_open":
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _record(self, success: bool) -> None:
+        now: float = time.monotonic()
+        self._outcomes.append((now, success))
+        cutoff: float = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def error_rate(self) -> float:
+        """Return the error rate over the window."""
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, success in self._outcomes if not success) / len(self._outcomes)
+
+    def _should_open(self) -> bool:
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        return len(self._outcomes) >= self.min_calls and self.error_rate() >= self.error_rate_threshold
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        logger.warning("Circuit for %s: %s -> %s", self.key, self.state, state)
+        self.state = state
+        if state == "open":
+            self.opened_count += 1
+            self._opened_at = time.monotonic()
+        elif state == "closed":
+            self.consecutive_failures = 0
+            self._outcomes.clear()
+
+    def stats(self) -> dict[str, float | str]:
+        """Return the state and counters of the circuit."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate(), 4),
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+            "retry_in": round(self._retry_in(), 2) if self.state == "open" else 0.0,
+        }
+
+
+@dataclass
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by base URL and model, created on first use.
+
+    Parameters
+    ----------
+    failure_threshold, error_rate_threshold, min_calls, window, reset_timeout, half_open_max_calls
+        Settings of the breakers created by the registry, see ``CircuitBreaker``.
+    """
+
+    failure_threshold: int = 5
+    error_rate_threshold: float = 0.5
+    min_calls: int = 20
+    window: float = 60.0
+    reset_timeout: float = 30.0
+    half_open_max_calls: int = 1
+    _breakers: dict[str, CircuitBreaker] = field(default_factory=dict, init=False)
+
+    def get(self, base_url: str, model: str) -> CircuitBreaker:
+        """Return the breaker of ``model`` served at ``base_url``."""
+        key: str = f"{base_url.rstrip('/')}#{model}"
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                key=key,
+                failure_threshold=self.failure_threshold,
+                error_rate_threshold=self.error_rate_threshold,
+                min_calls=self.min_calls,
+                window=self.window,
+                reset_timeout=self.reset_timeout,
+                half_open_max_calls=self.half_open_max_calls,
+            )
+        return breaker
+
+    def stats(self) -> dict[str, dict[str, float | str]]:
+        """Return the state and counters of every breaker."""
+        return {key: breaker.stats() for key, breaker in self._breakers.items()}
+
+    def state_values(self) -> dict[str, float]:
+        """Return the state of every breaker as 0 (closed), 1 (half-open) or 2 (open)."""
+        return {key: CIRCUIT_STATE_VALUES[breaker.state] for key, breaker in self._breakers.items()}
+
+    def reset(self) -> None:
+        """Drop every breaker, closing all circuits."""
+        self._breakers.clear()
+
+
+# Breakers shared by every LLMResponse of the process
+CIRCUIT_BREAKERS: CircuitBreakerRegistry = CircuitBreakerRegistry()
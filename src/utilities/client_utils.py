@@ -1,41 +1,60 @@
 import json
 import os
+from functools import lru_cache
 from typing import Any, Literal
 
 import instructor
 import requests  # type: ignore
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-from settings import refresh_settings  # type: ignore
+from src.settings import Settings, get_settings
+from src.utilities.rate_limit_utils import RATE_LIMITER, RateLimits
+from src.utilities.telemetry_utils import instrument_instructor, merge_event_hooks, telemetry_event_hooks
 
-# Load Settings
-SETTINGS = refresh_settings()
 
+@lru_cache(maxsize=1)
+def load_settings() -> Settings:
+    """
+    Load the settings on first use and export the credentials required by litellm.
 
-# Required for litellm
-os.environ["OPENROUTER_API_KEY"] = SETTINGS.OPENROUTER_API_KEY.get_secret_value()
-os.environ["OPENROUTER_API_BASE"] = SETTINGS.OPENROUTER_URL
-os.environ["MISTRAL_API_KEY"] = SETTINGS.MISTRAL_API_KEY.get_secret_value()
-os.environ["GEMINI_API_KEY"] = SETTINGS.GEMINI_API_KEY.get_secret_value()
+    Returns
+    -------
+    Settings
+        The cached Settings instance.
+    """
+    settings = get_settings()
+    # Required for litellm
+    os.environ["OPENROUTER_API_BASE"] = settings.OPENROUTER_URL
+    for name in ("OPENROUTER_API_KEY", "MISTRAL_API_KEY", "GEMINI_API_KEY"):
+        if (api_key := getattr(settings, name)) is not None:
+            os.environ[name] = api_key.get_secret_value()
+    return settings
 
 
 def openai_client() -> instructor.AsyncInstructor:
     """
     Create an async OpenAI client configured with OpenRouter credentials.
 
+    Requests go through the shared ``RATE_LIMITER`` and every completion is recorded
+    in the shared ``TELEMETRY``.
+
     Returns
     -------
     AsyncOpenAI
         An authenticated async OpenAI client instance.
     """
-    return instructor.from_openai(
+    settings = load_settings()
+    client = instructor.from_openai(
         AsyncOpenAI(
-            api_key=SETTINGS.OPENROUTER_API_KEY.get_secret_value(),
-            base_url=SETTINGS.OPENROUTER_URL,
+            api_key=settings.require("OPENROUTER_API_KEY").get_secret_value(),
+            base_url=settings.OPENROUTER_URL,
+            http_client=DefaultAsyncHttpxClient(
+                event_hooks=merge_event_hooks(RATE_LIMITER.event_hooks(), telemetry_event_hooks())
+            ),
         ),
         mode=instructor.Mode.JSON,
     )
-
+    return instrument_instructor(client)
 
 
 def check_rate_limit() -> None:
@@ -50,7 +69,30 @@ def check_rate_limit() -> None:
 
     response = requests.get(
         url="https://openrouter.ai/api/v1/auth/key",
-        headers={"Authorization": f"Bearer {SETTINGS.OPENROUTER_API_KEY.get_secret_value()}"},
+        headers={"Authorization": f"Bearer {load_settings().require("OPENROUTER_API_KEY").get_secret_value()}"},
     )
 
     print(json.dumps(response.json(), indent=2))
+
+
+async def refresh_rate_limits(interval: float | None = None) -> RateLimits | None:
+    """
+    Refresh the shared rate limiter from the OpenRouter rate limit data.
+
+    Parameters
+    ----------
+    interval : float | None, optional
+        If set, keep refreshing in the background every ``interval`` seconds,
+        by default None.
+
+    Returns
+    -------
+    RateLimits | None
+        The refreshed limits, or None if OpenRouter returned no rate limit.
+    """
+    settings = load_settings()
+    api_key: str = settings.require("OPENROUTER_API_KEY").get_secret_value()
+    limits = await RATE_LIMITER.refresh_from_openrouter(api_key, settings.OPENROUTER_URL)
+    if interval is not None:
+        RATE_LIMITER.ensure_refresh(api_key, settings.OPENROUTER_URL, interval=interval)
+    return limits
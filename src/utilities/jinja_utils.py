@@ -1,15 +1,34 @@
-from typing import Any
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
 
-from jinja2 import Environment, FileSystemLoader, meta, select_autoescape
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    meta,
+    select_autoescape,
+)
 
 
-def setup_jinja_environment(searchpath: str) -> Environment:
+def setup_jinja_environment(
+    searchpath: str, bytecode_cache_dir: str | None = None, auto_reload: bool = True
+) -> Environment:
     """Set up Jinja2 environment with file system loader and autoescaping.
 
     Parameters
     ----------
     searchpath : str
         Path to the directory containing template files
+    bytecode_cache_dir : str | None, optional
+        Directory of the bytecode cache, so new processes skip compiling templates
+        already compiled by another one. None disables it, by default None.
+    auto_reload : bool, optional
+        Whether the environment checks if a template changed on every lookup,
+        by default True.
 
     Returns
     -------
@@ -17,8 +36,17 @@ def setup_jinja_environment(searchpath: str) -> Environment:
         Configured Jinja2 environment instance with FileSystemLoader
         and autoescaping enabled
     """
+    bytecode_cache: FileSystemBytecodeCache | None = None
+    if bytecode_cache_dir is not None:
+        Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(directory=bytecode_cache_dir)
     template_loader: FileSystemLoader = FileSystemLoader(searchpath=searchpath)
-    template_env: Environment = Environment(loader=template_loader, autoescape=select_autoescape())
+    template_env: Environment = Environment(
+        loader=template_loader,
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache,
+        auto_reload=auto_reload,
+    )
     return template_env
 
 
@@ -36,11 +64,12 @@ def get_required_template_variables(env: Environment, template_file: str) -> lis
     Returns
     -------
     list[str]
-        A list of undeclared variable names found in the template.
+        A sorted list of undeclared variable names found in the template.
     """
-    template_src = env.loader.get_source(env, template_file)
+    # `get_source` returns the source, the file name and the up-to-date check
+    template_src, _, _ = env.loader.get_source(env, template_file)  # type: ignore
     parsed_content = env.parse(template_src)
-    return meta.find_undeclared_variables(parsed_content)
+    return sorted(meta.find_undeclared_variables(parsed_content))
 
 
 def load_and_render_template(
@@ -66,4 +95,164 @@ def load_and_render_template(
     template = env.get_template(template_file)
     if context is None:
         context = {}
-    return template.render(**context)
\ No newline at end of file
+    return template.render(**context)
+
+
+@dataclass
+class CompiledTemplate:
+    """A compiled template and the variables it requires.
+
+    Parameters
+    ----------
+    template : Template
+        The compiled template.
+    variables : frozenset[str]
+        The undeclared variables of the template.
+    filename : str | None
+        Path of the template file.
+    mtime : float
+        Modification time of the file when it was compiled.
+    """
+
+    template: Template
+    variables: frozenset[str]
+    filename: str | None
+    mtime: float
+
+
+@dataclass
+class PromptTemplateRegistry:
+    """Compile each prompt template once and render it from memory.
+
+    Templates are compiled on first use, with a filesystem bytecode cache so other
+    processes skip the compilation, and recompiled only when the modification time
+    of their file changes.
+
+    Parameters
+    ----------
+    searchpath : str
+        Path to the directory containing template files.
+    bytecode_cache_dir : str | None, optional
+        Directory of the bytecode cache. None disables it, by default ".cache/jinja".
+    hot_reload : bool, optional
+        Whether to check the modification time of the file on every lookup,
+        by default True.
+    """
+
+    searchpath: str
+    bytecode_cache_dir: str | None = ".cache/jinja"
+    hot_reload: bool = True
+    env: Environment = field(init=False, repr=False)
+    compiles: int = field(default=0, init=False)
+    _templates: dict[str, CompiledTemplate] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        # The registry does its own reload checks
+        self.env = setup_jinja_environment(self.searchpath, self.bytecode_cache_dir, auto_reload=False)
+
+    def _compile(self, template_file: str) -> CompiledTemplate:
+        source, filename, _ = self.env.loader.get_source(self.env, template_file)  # type: ignore
+        mtime: float = os.path.getmtime(filename) if filename else 0.0
+        # `load` goes through the bytecode cache; parsing for the variables is cheap
+        template: Template = self.env.loader.load(self.env, template_file)  # type: ignore
+        variables = frozenset(meta.find_undeclared_variables(self.env.parse(source)))
+        self.compiles += 1
+        return CompiledTemplate(template=template, variables=variables, filename=filename, mtime=mtime)
+
+    def get(self, template_file: str) -> CompiledTemplate:
+        """
+        Return the compiled template, compiling it if new or changed on disk.
+
+        Parameters
+        ----------
+        template_file : str
+            The name or path of the template file.
+
+        Returns
+        -------
+        CompiledTemplate
+            The compiled template and its variables.
+        """
+        compiled = self._templates.get(template_file)
+        if compiled is not None and self.hot_reload and compiled.filename is not None:
+            try:
+                if os.path.getmtime(compiled.filename) != compiled.mtime:
+                    compiled = None
+            except OSError:
+                compiled = None
+        if compiled is None:
+            compiled = self._templates[template_file] = self._compile(template_file)
+        return compiled
+
+    def variables(self, template_file: str) -> frozenset[str]:
+        """Return the undeclared variables of the template."""
+        return self.get(template_file).variables
+
+    def render(self, template_file: str, context: dict[str, Any] | None = None, strict: bool = False) -> str:
+        """
+        Render a template with the provided context.
+
+        Parameters
+        ----------
+        template_file : str
+            The name or path of the template file.
+        context : dict[str, Any] | None, optional
+            Variables to be rendered in the template, by default None.
+        strict : bool, optional
+            Whether to raise when the context misses a variable of the template
+            instead of rendering it empty, by default False.
+
+        Returns
+        -------
+        str
+            The rendered template.
+
+        Raises
+        ------
+        ValueError
+            If ``strict`` is set and the context misses variables.
+        """
+        compiled = self.get(template_file)
+        context = context or {}
+        if strict and (missing := compiled.variables - context.keys()):
+            raise ValueError(f"Missing variables for {template_file}: {sorted(missing)}")
+        return compiled.template.render(context)
+
+    def render_many(
+        self, template_file: str, contexts: Iterable[dict[str, Any]], strict: bool = False
+    ) -> list[str]:
+        """
+        Render one template over a batch of contexts.
+
+        The template is looked up (and its file checked) once for the whole batch.
+
+        Parameters
+        ----------
+        template_file : str
+            The name or path of the template file.
+        contexts : Iterable[dict[str, Any]]
+            The contexts to render.
+        strict : bool, optional
+            Whether to raise when a context misses a variable, by default False.
+
+        Returns
+        -------
+        list[str]
+            The rendered templates, in the order of ``contexts``.
+        """
+        compiled = self.get(template_file)
+        render = compiled.template.render
+        if not strict:
+            return [render(context) for context in contexts]
+        rendered: list[str] = []
+        for idx, context in enumerate(contexts):
+            if missing := compiled.variables - context.keys():
+                raise ValueError(f"Missing variables for {template_file} in context {idx}: {sorted(missing)}")
+            rendered.append(render(context))
+        return rendered
+
+
+@lru_cache(maxsize=None)
+def get_template_registry(searchpath: str) -> PromptTemplateRegistry:
+    """Return the registry of the templates in ``searchpath``, shared by the process."""
+    return PromptTemplateRegistry(searchpath=searchpath)
@@ -1,18 +1,51 @@
+import asyncio
+import hashlib
 import json
+import os
 import re
-from dataclasses import dataclass
-from typing import Any, Type, TypeVar
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache, partial, wraps
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Type, TypeVar
 
+import httpx
 from langchain_core.messages import (
     AIMessage,
     AnyMessage,
-    SystemMessage,
+    BaseMessage,
+    ChatMessage,
     ToolMessage,
 )
-from openai import AsyncOpenAI
-from pydantic import BaseModel, SecretStr, validate_call
+from openai import AsyncOpenAI, AsyncStream, DefaultAsyncHttpxClient
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from pydantic import BaseModel, SecretStr, TypeAdapter, ValidationError, validate_call
+from pydantic_core import from_json
+
+from src import create_logger
+from src.utilities.cache_utils import CacheStats, ResponseCache, make_cache_key
+from src.utilities.circuit_utils import CIRCUIT_BREAKERS, CircuitBreaker
+from src.utilities.profiling_utils import profile
+from src.utilities.rate_limit_utils import RATE_LIMITER
+from src.utilities.retry_utils import DEFAULT_RETRY_POLICY, RetryPolicy, is_retryable
+from src.utilities.telemetry_utils import (
+    TELEMETRY,
+    CallRecord,
+    RetryCounter,
+    merge_event_hooks,
+    telemetry_event_hooks,
+    track_retries,
+)
+
+logger = create_logger()
+
+# Report the circuit of every provider endpoint with the call telemetry
+TELEMETRY.add_gauge("circuit_state", CIRCUIT_BREAKERS.state_values)
 
 T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
 SYSTEM_MESSAGE: str = """
 <system>
 /no_think
@@ -62,24 +95,589 @@ You're an AI assistant that helps people extract relevant information.
 """
 
 
-def _clean_response_text_single_regex(text: str) -> str:
+_THINK_OPEN: str = "<think>"
+_THINK_CLOSE: str = "</think>"
+_FENCE_PATTERN: re.Pattern[str] = re.compile(r"`+(?:json)?")
+
+
+def _find_json_start(text: str) -> int:
+    """Return the index of the first ``{`` or ``[`` in ``text``, or -1 if there is none."""
+    starts: list[int] = [idx for idx in (text.find("{"), text.find("[")) if idx != -1]
+    return min(starts) if starts else -1
+
+
+def _find_json_end(text: str) -> int:
+    """Return the index after the last ``}`` or ``]`` in ``text``, or -1 if there is none."""
+    end: int = max(text.rfind("}"), text.rfind("]"))
+    return end + 1 if end != -1 else -1
+
+
+def clean_response_text(text: str, extract_json: bool = False) -> str:
     """
-    Clean response text by removing XML-like tags and backticks using regex pattern.
+    Clean response text by removing ``<think>`` blocks and code fences in a single pass.
+
+    Runs in linear time: tags are located with ``str.find`` instead of a lazy
+    DOTALL regex, an unclosed ``<think>`` drops the rest of the text, and a stray
+    ``</think>`` (opening tag added by the chat template) drops everything before it.
 
     Parameters
     ----------
     text : str
-        Input text containing XML-like tags and backticks to be cleaned.
+        Input text containing ``<think>`` blocks and backticks to be cleaned.
+    extract_json : bool, optional
+        Whether to also drop any prose before the first ``{``/``[`` and after the
+        last ``}``/``]``, by default False.
 
     Returns
     -------
     str
-        Cleaned text with XML-like tags and backticks removed.
+        Cleaned text with ``<think>`` blocks and backticks removed.
+    """
+    if _THINK_OPEN in text or _THINK_CLOSE in text:
+        segments: list[str] = []
+        position: int = 0
+        first_open: int = text.find(_THINK_OPEN)
+        stray_close: int = text.find(_THINK_CLOSE, 0, first_open if first_open != -1 else len(text))
+        if stray_close != -1:
+            position = stray_close + len(_THINK_CLOSE)
+        while True:
+            start: int = text.find(_THINK_OPEN, position)
+            if start == -1:
+                segments.append(text[position:])
+                break
+            segments.append(text[position:start])
+            end: int = text.find(_THINK_CLOSE, start + len(_THINK_OPEN))
+            if end == -1:
+                break
+            position = end + len(_THINK_CLOSE)
+        text = "".join(segments)
+
+    if "`" in text:
+        text = _FENCE_PATTERN.sub("", text)
+
+    if extract_json:
+        start, end = _find_json_start(text), _find_json_end(text)
+        if start != -1 and end > start:
+            return text[start:end]
+    return text.strip()
+
+
+# Kept for backwards compatibility
+_clean_response_text_single_regex = clean_response_text
+
+
+# A trailing run of backticks that may still be followed by (part of) "json"
+_PARTIAL_FENCE_PATTERN: re.Pattern[str] = re.compile(r"`+(?:j(?:s(?:o)?)?)?$")
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Return the length of the longest suffix of ``text`` that is a proper prefix of ``tag``."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+@dataclass
+class StreamingResponseCleaner:
+    """Incrementally remove ``<think>`` blocks and code fences from streamed text.
+
+    Text that may be the start of a tag or a fence is held back until the next
+    chunk disambiguates it. Like ``clean_response_text``, a stray ``</think>``
+    before any ``<think>`` (the opening tag was added by the chat template) drops
+    everything before it: as text already emitted cannot be taken back, ``feed``
+    sets ``restarted`` and the caller discards what it received so far. The
+    concatenated output since the last restart matches cleaning the full text at
+    once, up to surrounding whitespace.
+    """
+
+    # Set by `feed` when a stray `</think>` voided the text emitted before the chunk
+    restarted: bool = field(default=False, init=False)
+    _pending: str = field(default="", init=False)
+    _fence_pending: str = field(default="", init=False)
+    _in_think: bool = field(default=False, init=False)
+    _tag_seen: bool = field(default=False, init=False)
+
+    @property
+    def may_restart(self) -> bool:
+        """True while a stray ``</think>`` could still void the text emitted so far."""
+        return not self._tag_seen
+
+    def feed(self, chunk: str) -> str:
+        """
+        Clean the next chunk of streamed text.
+
+        Parameters
+        ----------
+        chunk : str
+            The next piece of the response.
+
+        Returns
+        -------
+        str
+            The cleaned text that is safe to emit so far.
+        """
+        text: str = self._pending + chunk
+        self._pending = ""
+        self.restarted = False
+        emitted: list[str] = []
+        if not self._tag_seen:
+            text = self._drop_reasoning_preamble(text)
+            if not self._tag_seen:
+                # Hold back what may be the start of either tag
+                held: int = max(
+                    _partial_tag_length(text, _THINK_OPEN), _partial_tag_length(text, _THINK_CLOSE)
+                )
+                self._pending = text[len(text) - held :] if held else ""
+                return self._strip_fences(text[: len(text) - held])
+        while text:
+            if self._in_think:
+                end: int = text.find(_THINK_CLOSE)
+                if end == -1:
+                    keep: int = _partial_tag_length(text, _THINK_CLOSE)
+                    self._pending = text[len(text) - keep :] if keep else ""
+                    break
+                text = text[end + len(_THINK_CLOSE) :]
+                self._in_think = False
+                continue
+            start: int = text.find(_THINK_OPEN)
+            if start == -1:
+                keep = _partial_tag_length(text, _THINK_OPEN)
+                emitted.append(text[: len(text) - keep])
+                self._pending = text[len(text) - keep :] if keep else ""
+                break
+            emitted.append(text[:start])
+            text = text[start + len(_THINK_OPEN) :]
+            self._in_think = True
+        return self._strip_fences("".join(emitted))
+
+    def _drop_reasoning_preamble(self, text: str) -> str:
+        """Handle the first tag of the stream, dropping the text before a stray ``</think>``."""
+        first_open: int = text.find(_THINK_OPEN)
+        stray_close: int = text.find(_THINK_CLOSE, 0, first_open if first_open != -1 else len(text))
+        if stray_close != -1:
+            self._tag_seen = True
+            self.restarted = True
+            self._fence_pending = ""
+            return text[stray_close + len(_THINK_CLOSE) :]
+        if first_open != -1:
+            self._tag_seen = True
+        return text
+
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended."""
+        text: str = "" if self._in_think else self._pending
+        self._pending = ""
+        cleaned: str = self._strip_fences(text)
+        cleaned += _FENCE_PATTERN.sub("", self._fence_pending)
+        self._fence_pending = ""
+        return cleaned
+
+    def _strip_fences(self, text: str) -> str:
+        text = self._fence_pending + text
+        partial_fence = _PARTIAL_FENCE_PATTERN.search(text)
+        self._fence_pending = partial_fence.group() if partial_fence else ""
+        if partial_fence:
+            text = text[: partial_fence.start()]
+        return _FENCE_PATTERN.sub("", text)
+
+
+@dataclass(frozen=True)
+class CompiledResponseModel:
+    """The per-model artifacts needed to request and validate a structured response.
+
+    Parameters
+    ----------
+    json_schema : dict[str, Any]
+        The JSON schema of the response model.
+    system_message : str
+        ``SYSTEM_MESSAGE`` rendered with the JSON schema.
+    adapter : TypeAdapter
+        Adapter validating raw JSON directly into the response model.
+    field_adapters : dict[str, TypeAdapter], optional
+        Adapters validating each top-level field, keyed by field name and alias.
+    forbid_extra : bool, optional
+        Whether the model rejects unknown fields (``extra="forbid"``) instead of
+        ignoring them, by default False.
+    """
+
+    json_schema: dict[str, Any]
+    system_message: str
+    adapter: TypeAdapter
+    field_adapters: dict[str, TypeAdapter] = field(default_factory=dict)
+    forbid_extra: bool = False
+
+    def parse_response(self, raw_response: ChatCompletion) -> Any:
+        """Clean the content of a completion and validate it into the response model."""
+        message_content: str = raw_response.choices[0].message.content  # type: ignore
+        return self.adapter.validate_json(clean_response_text(message_content, extract_json=True))
+
+    def fields_to_validate(self, names: Iterable[str]) -> list[str]:
+        """Return the ``names`` to validate, dropping the unknown fields the model ignores."""
+        return [name for name in names if self.forbid_extra or name in self.field_adapters]
+
+    def validate_field(self, name: str, value: Any) -> Any:
+        """Validate a single top-level field (by name or alias) of the response model."""
+        if name not in self.field_adapters:
+            raise ValueError(f"Unexpected field {name!r} in structured output")
+        return self.field_adapters[name].validate_python(value)
+
+
+@lru_cache(maxsize=256)
+def compile_response_model(response_model: Type[T]) -> CompiledResponseModel:
+    """
+    Build (once per model class) the schema, system prompt and validator of a response model.
+
+    Parameters
+    ----------
+    response_model : Type[T]
+        The Pydantic model class.
+
+    Returns
+    -------
+    CompiledResponseModel
+        The cached schema, rendered system prompt and ``TypeAdapter``.
+    """
+    json_schema: dict[str, Any] = response_model.model_json_schema()
+    field_adapters: dict[str, TypeAdapter] = {}
+    for name, field_info in response_model.model_fields.items():
+        field_adapter = TypeAdapter(field_info.rebuild_annotation())
+        field_adapters[name] = field_adapter
+        if field_info.alias:
+            field_adapters[field_info.alias] = field_adapter
+    return CompiledResponseModel(
+        json_schema=json_schema,
+        system_message=SYSTEM_MESSAGE.format(json_schema=json_schema),
+        adapter=TypeAdapter(response_model),
+        field_adapters=field_adapters,
+        forbid_extra=response_model.model_config.get("extra") == "forbid",
+    )
+
+
+def _validate_call_unless_disabled(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Apply ``validate_call`` to an async method unless ``self.validate_inputs`` is False."""
+    validated_func = validate_call(func)
+
+    @wraps(func)
+    async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if self.validate_inputs:
+            return await validated_func(self, *args, **kwargs)
+        return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
+@dataclass(frozen=True)
+class ClientPoolConfig:
+    """Connection pool settings shared by all clients created through the registry.
+
+    Parameters
+    ----------
+    max_connections : int, optional
+        Maximum number of concurrent connections per client, by default 100.
+    max_keepalive_connections : int, optional
+        Maximum number of idle connections kept alive, by default 20.
+    keepalive_expiry : float, optional
+        Seconds an idle connection is kept alive, by default 30.0.
+    http2 : bool, optional
+        Whether to negotiate HTTP/2 (requires the ``h2`` package), by default False.
+    max_retries : int, optional
+        Number of retries performed by the OpenAI client, by default 0. ``LLMResponse``
+        retries with its ``retry_policy``; retrying in the client as well would
+        multiply the attempts.
+    rate_limit : bool, optional
+        Whether requests go through the shared ``RATE_LIMITER``, by default True.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    max_retries: int = 0
+    rate_limit: bool = True
+
+
+@dataclass
+class PooledClient:
+    """An ``AsyncOpenAI`` client registered in the shared client registry.
+
+    Parameters
+    ----------
+    client : AsyncOpenAI
+        The shared OpenAI client.
+    http_client : httpx.AsyncClient
+        The underlying httpx client holding the connection pool.
+    pool_config : ClientPoolConfig
+        The pool settings the client was created with.
+    loop : asyncio.AbstractEventLoop | None, optional
+        The event loop the connection pool belongs to. None if it was created outside
+        of a running loop, in which case it binds to the first loop using it, by
+        default None.
+    """
+
+    client: AsyncOpenAI
+    http_client: httpx.AsyncClient
+    pool_config: ClientPoolConfig
+    loop: asyncio.AbstractEventLoop | None = None
+    ref_count: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    total_requests: int = 0
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[AsyncOpenAI]:
+        """Track an in-flight request made with the pooled client."""
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield self.client
+        finally:
+            self.in_flight -= 1
+
+    @property
+    def is_usable(self) -> bool:
+        """Return True if the client is open and belongs to the running event loop."""
+        return not self.http_client.is_closed and self.loop in (None, _running_loop())
+
+    def bind_to_running_loop(self) -> None:
+        """Bind a client created outside of a loop to the running loop."""
+        if self.loop is not None or (loop := _running_loop()) is None:
+            return
+        self.loop = loop
+        for key, value in list(_CLIENT_REGISTRY.items()):
+            if value is self and key[3] is None:
+                del _CLIENT_REGISTRY[key]
+                _CLIENT_REGISTRY.setdefault((*key[:3], loop), self)
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool utilization metrics for the client.
+
+        Returns
+        -------
+        dict[str, Any]
+            In-flight/peak/total request counts, the open and idle connection
+            counts of the underlying pool and the utilization ratio.
+        """
+        # httpcore does not expose a public API for the pool state
+        pool = getattr(self.http_client._transport, "_pool", None)  # noqa: SLF001
+        connections = getattr(pool, "connections", [])
+        return {
+            "ref_count": self.ref_count,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for conn in connections if conn.is_idle()),
+            "max_connections": self.pool_config.max_connections,
+            "utilization": round(self.in_flight / self.pool_config.max_connections, 4),
+        }
+
+
+# Clients keyed by (base_url, api key hash, timeout, event loop): httpx connection
+# pools are bound to the loop they were first used on
+_CLIENT_REGISTRY: dict[tuple[str, str, float, asyncio.AbstractEventLoop | None], PooledClient] = {}
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    """Return the running event loop, or None outside of one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _client_key(
+    api_key: str, base_url: str, timeout: float
+) -> tuple[str, str, float, asyncio.AbstractEventLoop | None]:
+    """Build the registry key without keeping the raw API key around."""
+    api_key_hash: str = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return (base_url.rstrip("/"), api_key_hash, float(timeout), _running_loop())
+
+
+def _drop_closed_loop_clients() -> None:
+    """Forget the clients of closed event loops, which can no longer be used nor closed."""
+    for key, pooled_client in list(_CLIENT_REGISTRY.items()):
+        if pooled_client.loop is not None and pooled_client.loop.is_closed():
+            del _CLIENT_REGISTRY[key]
+
+
+def get_pooled_client(
+    api_key: SecretStr | str,
+    base_url: str,
+    timeout: float = 180,
+    pool_config: ClientPoolConfig | None = None,
+) -> PooledClient:
+    """Get (or create) a shared ``AsyncOpenAI`` client from the registry.
+
+    Clients are keyed by base URL, a hash of the API key, the timeout and the running
+    event loop, so every caller with the same credentials on the same loop reuses one
+    connection pool. The pool settings of the first caller win for a given key.
+
+    Parameters
+    ----------
+    api_key : SecretStr | str
+        The API key for authentication.
+    base_url : str
+        The base URL for the API endpoint.
+    timeout : float, optional
+        Request timeout in seconds, by default 180.
+    pool_config : ClientPoolConfig | None, optional
+        Connection pool settings, by default ``ClientPoolConfig()``.
+
+    Returns
+    -------
+    PooledClient
+        The registered client.
+    """
+    raw_api_key: str = api_key.get_secret_value() if isinstance(api_key, SecretStr) else api_key
+    _drop_closed_loop_clients()
+    key = _client_key(raw_api_key, base_url, timeout)
+    pooled_client = _CLIENT_REGISTRY.get(key)
+    if pooled_client is None:
+        pool_config = pool_config or ClientPoolConfig()
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=pool_config.max_connections,
+                max_keepalive_connections=pool_config.max_keepalive_connections,
+                keepalive_expiry=pool_config.keepalive_expiry,
+            ),
+            http2=pool_config.http2,
+            timeout=timeout,
+            event_hooks=merge_event_hooks(
+                RATE_LIMITER.event_hooks() if pool_config.rate_limit else {},
+                telemetry_event_hooks(),
+            ),
+        )
+        pooled_client = PooledClient(
+            client=AsyncOpenAI(
+                api_key=raw_api_key,
+                base_url=base_url,
+                max_retries=pool_config.max_retries,
+                timeout=timeout,
+                http_client=http_client,
+            ),
+            http_client=http_client,
+            pool_config=pool_config,
+            loop=key[3],
+        )
+        _CLIENT_REGISTRY[key] = pooled_client
+    return pooled_client
+
+
+def get_client_pool_stats() -> dict[str, dict[str, Any]]:
+    """Return pool utilization metrics for every registered client.
+
+    Returns
+    -------
+    dict[str, dict[str, Any]]
+        Metrics keyed by ``"<base_url>#<api key hash>"``.
     """
-    pattern: str = r"<think>.*?</think>|`+json|`+"
-    cleaned_text: str = re.sub(pattern, "", text, flags=re.DOTALL)
+    return {
+        f"{base_url}#{api_key_hash}": pooled_client.stats()
+        for (base_url, api_key_hash, *_), pooled_client in _CLIENT_REGISTRY.items()
+    }
+
 
-    return cleaned_text.strip()
+async def aclose_clients() -> None:
+    """Close the registered clients of the running loop and stop the rate limit refreshes.
+
+    Clients of closed loops are forgotten; clients of other running loops are left
+    to be closed from their own loop.
+    """
+    _drop_closed_loop_clients()
+    loop = _running_loop()
+    for key, pooled_client in list(_CLIENT_REGISTRY.items()):
+        if pooled_client.loop in (loop, None):
+            del _CLIENT_REGISTRY[key]
+            await pooled_client.client.close()
+    await RATE_LIMITER.aclose()
+
+
+@dataclass
+class BatchStats:
+    """Throughput statistics of a batch run.
+
+    Parameters
+    ----------
+    total : int
+        Number of items processed.
+    failed : int
+        Number of items that returned an error.
+    elapsed : float
+        Wall-clock duration of the batch in seconds.
+    total_tokens : int
+        Total tokens reported by the API usage of successful items.
+    """
+
+    total: int
+    failed: int
+    elapsed: float
+    total_tokens: int
+
+    @property
+    def items_per_second(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.total_tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def run_bounded(
+    jobs: Iterable[Callable[[], Awaitable[tuple[Any, Any]]]], max_concurrency: int = 8
+) -> tuple[list[tuple[Any, Any]], BatchStats]:
+    """Run async jobs with at most ``max_concurrency`` of them in flight.
+
+    A fixed pool of workers pulls jobs lazily from ``jobs``, so no more than
+    ``max_concurrency`` requests are ever created at once.
+
+    Parameters
+    ----------
+    jobs : Iterable[Callable[[], Awaitable[tuple[Any, Any]]]]
+        Zero-argument callables returning ``(result, raw)`` or ``(None, error_info)``.
+    max_concurrency : int, optional
+        Maximum number of jobs running concurrently, by default 8.
+
+    Returns
+    -------
+    tuple[list[tuple[Any, Any]], BatchStats]
+        The results in input order and the throughput statistics.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    results: dict[int, tuple[Any, Any]] = {}
+    indexed_jobs = enumerate(jobs)
+
+    async def worker() -> None:
+        # `next` on the shared iterator is synchronous, so every job is taken once
+        for idx, job in indexed_jobs:
+            results[idx] = await job()
+
+    start_time: float = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+    elapsed: float = time.perf_counter() - start_time
+
+    ordered_results: list[tuple[Any, Any]] = [results[idx] for idx in range(len(results))]
+    total_tokens: int = 0
+    for result, raw in ordered_results:
+        usage = getattr(raw, "usage", None) if result is not None else None
+        total_tokens += getattr(usage, "total_tokens", 0) or 0
+    stats = BatchStats(
+        total=len(ordered_results),
+        failed=sum(1 for result, _ in ordered_results if result is None),
+        elapsed=elapsed,
+        total_tokens=total_tokens,
+    )
+    return ordered_results, stats
+
+
+# Hedge delay used until enough latencies have been observed for a p95
+DEFAULT_HEDGE_DELAY: float = 2.0
+HEDGE_MIN_SAMPLES: int = 10
+# Bytes of input lines read per worker thread hand-off by `stream_structured`
+_JSONL_READ_SIZE: int = 64 * 1024
 
 
 @dataclass
@@ -96,25 +694,393 @@ class LLMResponse:
         The name of the LLM model to use.
     use_vllm : bool, optional
         Whether to use vLLM for inference, by default False.
+    timeout : float, optional
+        Request timeout in seconds, by default 180.
+    pool_config : ClientPoolConfig, optional
+        Connection pool settings of the shared client, by default ``ClientPoolConfig()``.
+    cache : ResponseCache | None, optional
+        Cache of raw responses keyed by model, messages, response format and sampling
+        parameters. Only responses that were parsed and validated are stored. None
+        disables caching, by default None.
+    validate_inputs : bool, optional
+        Whether ``ainvoke`` and ``get_structured_response`` validate their arguments
+        with ``validate_call``. Disable on hot paths with trusted inputs, by default True.
+    fallbacks : list[LLMResponse], optional
+        Providers tried in order when this one fails or misses its deadline, e.g. an
+        alternate remote model then a local Ollama model, by default [].
+    attempt_timeout : float | None, optional
+        Deadline in seconds of each attempt in the fallback chain. None waits up to
+        ``timeout``, by default None.
+    hedge : bool, optional
+        Whether to send the same request to the next provider of the chain when the
+        current one has not answered after ``hedge_delay``, keeping whichever returns
+        first and cancelling the other, by default False.
+    hedge_delay : float | None, optional
+        Seconds before the hedged request is sent. None uses the p95 of the observed
+        latencies of the provider (``DEFAULT_HEDGE_DELAY`` until ``HEDGE_MIN_SAMPLES``
+        latencies are recorded), by default None.
+    retry_policy : RetryPolicy, optional
+        Retries of transient errors (rate limits, server errors, timeouts) of each
+        request, by default ``DEFAULT_RETRY_POLICY``.
+
+    Notes
+    -----
+    The underlying client is shared with every ``LLMResponse`` using the same
+    credentials. Use ``async with LLMResponse(...) as llm`` or ``await llm.aclose()``
+    to release it; the connection pool is closed once no instance uses it.
     """
 
     api_key: SecretStr
     base_url: str
     model: str
     use_vllm: bool = False
+    timeout: float = 180
+    pool_config: ClientPoolConfig = field(default_factory=ClientPoolConfig)
+    cache: ResponseCache | None = None
+    validate_inputs: bool = True
+    fallbacks: list["LLMResponse"] = field(default_factory=list)
+    attempt_timeout: float | None = None
+    hedge: bool = False
+    hedge_delay: float | None = None
+    retry_policy: RetryPolicy = field(default_factory=lambda: DEFAULT_RETRY_POLICY)
+    _pooled_client: PooledClient | None = field(default=None, init=False, repr=False)
+    _latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=100), init=False, repr=False
+    )
+    last_batch_stats: BatchStats | None = field(default=None, init=False, repr=False)
+
+    async def __aenter__(self) -> "LLMResponse":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def _get_pooled_client(self) -> PooledClient:
+        """Get the shared client from the registry, registering this instance on first use.
+
+        The client is fetched again once it was closed (e.g. by ``aclose_clients()``)
+        or when this instance is used from another event loop.
+        """
+        if self._pooled_client is not None and not self._pooled_client.is_usable:
+            self._release_pooled_client()
+        if self._pooled_client is None:
+            self._pooled_client = get_pooled_client(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                pool_config=self.pool_config,
+            )
+            self._pooled_client.ref_count += 1
+        self._pooled_client.bind_to_running_loop()
+        if self._pooled_client.pool_config.rate_limit:
+            RATE_LIMITER.ensure_refresh(self.api_key.get_secret_value(), self.base_url)
+        return self._pooled_client
 
     def _get_client(self) -> AsyncOpenAI:
-        """Get an instance of the OpenAI client."""
-        return AsyncOpenAI(
-            api_key=self.api_key.get_secret_value(),
-            base_url=self.base_url,
-            max_retries=3,
-            timeout=180,  # type: ignore
+        """Get the shared instance of the OpenAI client."""
+        return self._get_pooled_client().client
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Return pool utilization metrics of the shared client."""
+        return (self._pooled_client or self._get_pooled_client()).stats()
+
+    def _release_pooled_client(self) -> PooledClient | None:
+        """Unregister this instance from its client.
+
+        Returns
+        -------
+        PooledClient | None
+            The client if no instance uses it anymore and it still has to be closed.
+        """
+        pooled_client, self._pooled_client = self._pooled_client, None
+        if pooled_client is None:
+            return None
+        pooled_client.ref_count -= 1
+        if pooled_client.ref_count > 0 or pooled_client.http_client.is_closed:
+            return None
+        loop_is_closed: bool = pooled_client.loop is not None and pooled_client.loop.is_closed()
+        if not loop_is_closed and pooled_client.loop not in (_running_loop(), None):
+            # Left registered for its own loop, where `aclose_clients()` closes it
+            return None
+        for key, value in list(_CLIENT_REGISTRY.items()):
+            if value is pooled_client:
+                del _CLIENT_REGISTRY[key]
+        return None if loop_is_closed else pooled_client
+
+    async def aclose(self) -> None:
+        """Release the shared client, closing it when no other instance uses it."""
+        for fallback in self.fallbacks:
+            await fallback.aclose()
+        if (pooled_client := self._release_pooled_client()) is not None:
+            await pooled_client.client.close()
+
+    @profile
+    async def _create_completion(
+        self,
+        request_kwargs: dict[str, Any],
+        parse: Callable[[ChatCompletion], Any],
+        bypass_cache: bool = False,
+    ) -> tuple[ChatCompletion, Any]:
+        """Create a chat completion, serving it from the cache when possible.
+
+        Parameters
+        ----------
+        request_kwargs : dict[str, Any]
+            Keyword arguments of ``chat.completions.create``.
+        parse : Callable[[ChatCompletion], Any]
+            Extracts and validates the output of the response. The response is only
+            cached once ``parse`` succeeded, so an invalid or error response is never
+            replayed from the cache.
+        bypass_cache : bool, optional
+            Whether to skip the cache lookup (the response is still stored),
+            by default False.
+
+        Returns
+        -------
+        tuple[ChatCompletion, Any]
+            The raw response and its parsed output.
+        """
+        start_time: float = time.perf_counter()
+        cache_key: str | None = None
+        if self.cache is not None:
+            cache_key = make_cache_key(request_kwargs)
+            if not bypass_cache and (cached := await self.cache.aget(cache_key)) is not None:
+                TELEMETRY.record(
+                    CallRecord(
+                        model=self.model,
+                        source="llm_response",
+                        latency=time.perf_counter() - start_time,
+                        cache_hit=True,
+                    )
+                )
+                cached_response: ChatCompletion = ChatCompletion.model_validate(cached)
+                return (cached_response, parse(cached_response))
+
+        with track_retries() as retry_counter:
+
+            def count_retry(attempt: int, error: BaseException, delay: float) -> None:
+                retry_counter.retries += 1
+
+            try:
+                raw_response: ChatCompletion = await self.retry_policy.run(
+                    self._send_completion, request_kwargs, on_retry=count_retry
+                )
+            except Exception as e:
+                TELEMETRY.record(
+                    CallRecord(
+                        model=self.model,
+                        source="llm_response",
+                        latency=time.perf_counter() - start_time,
+                        retries=retry_counter.retries,
+                        error=str(e),
+                    )
+                )
+                raise
+        latency: float = time.perf_counter() - start_time
+        self._latencies.append(latency)
+        TELEMETRY.record(
+            CallRecord.from_response(
+                raw_response, self.model, "llm_response", latency, retries=retry_counter.retries
+            )
         )
 
-    @validate_call
+        output: Any = parse(raw_response)
+        if cache_key is not None:
+            await self.cache.aset(cache_key, raw_response.model_dump(mode="json"))  # type: ignore
+        return (raw_response, output)
+
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of this endpoint and model."""
+        return CIRCUIT_BREAKERS.get(self.base_url, self.model)
+
+    async def _call_through_breaker(self, send: Callable[[], Awaitable[R]]) -> R:
+        """Make one attempt with ``send`` through the circuit breaker of the endpoint."""
+        breaker: CircuitBreaker = self.circuit_breaker()
+        breaker.before_call()
+        try:
+            result: R = await send()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            # Client errors mean the provider is up, only transient errors count as failures
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    async def _send_completion(self, request_kwargs: dict[str, Any]) -> ChatCompletion:
+        """Send one attempt through the circuit breaker of the endpoint."""
+
+        async def send() -> ChatCompletion:
+            async with self._get_pooled_client().track() as aclient:
+                return await aclient.chat.completions.create(**request_kwargs)
+
+        return await self._call_through_breaker(send)
+
+    def latency_p95(self) -> float | None:
+        """Return the p95 latency in seconds of the recent requests, or None if too few."""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered: list[float] = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _get_hedge_delay(self) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        p95: float | None = self.latency_p95()
+        return p95 if p95 is not None else DEFAULT_HEDGE_DELAY
+
+    async def _attempt_completion(
+        self,
+        target: "LLMResponse",
+        build_request: Callable[["LLMResponse"], dict[str, Any]],
+        parse: Callable[[ChatCompletion], Any],
+        bypass_cache: bool,
+    ) -> tuple[ChatCompletion, Any]:
+        """Create a completion with ``target`` within the per-attempt deadline."""
+        attempt_timeout: float | None = (
+            target.attempt_timeout if target.attempt_timeout is not None else self.attempt_timeout
+        )
+        try:
+            return await asyncio.wait_for(
+                target._create_completion(build_request(target), parse, bypass_cache=bypass_cache),
+                timeout=attempt_timeout,
+            )
+        except asyncio.TimeoutError:
+            # A missed deadline counts against the provider like a server error
+            target.circuit_breaker().record_failure()
+            raise
+
+    async def _hedged_completion(
+        self,
+        primary: "LLMResponse",
+        secondary: "LLMResponse",
+        build_request: Callable[["LLMResponse"], dict[str, Any]],
+        parse: Callable[[ChatCompletion], Any],
+        bypass_cache: bool,
+    ) -> tuple[ChatCompletion, Any]:
+        """Race ``primary`` against ``secondary`` started after the hedge delay.
+
+        The secondary starts immediately if the primary fails before the delay.
+        The first successful response wins and the other request is cancelled.
+        """
+        primary_task = asyncio.create_task(
+            self._attempt_completion(primary, build_request, parse, bypass_cache)
+        )
+        tasks: set[asyncio.Task[tuple[ChatCompletion, Any]]] = {primary_task}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=primary._get_hedge_delay())
+            if primary_task in done and primary_task.exception() is None:
+                return primary_task.result()
+            if primary_task not in done:
+                logger.info("Hedging request to %s with %s", primary.model, secondary.model)
+            tasks.add(
+                asyncio.create_task(
+                    self._attempt_completion(secondary, build_request, parse, bypass_cache)
+                )
+            )
+
+            last_error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error  # type: ignore
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _available_chain(self) -> list["LLMResponse"]:
+        """Return this provider and its fallbacks, skipping those whose circuit is open.
+
+        Providers with an open circuit are only kept when none is left to try.
+        """
+        chain: list[LLMResponse] = [self, *self.fallbacks]
+        if len(chain) == 1:
+            return chain
+        available: list[LLMResponse] = []
+        skipped: list[str] = []
+        for target in chain:
+            if target.circuit_breaker().is_available():
+                available.append(target)
+            else:
+                skipped.append(target.model)
+        if available and skipped:
+            logger.info("Skipping providers with an open circuit: %s", ", ".join(skipped))
+            return available
+        return chain
+
+    async def _create_completion_with_fallback(
+        self,
+        build_request: Callable[["LLMResponse"], dict[str, Any]],
+        parse: Callable[[ChatCompletion], Any],
+        bypass_cache: bool = False,
+    ) -> tuple[ChatCompletion, Any]:
+        """Create a completion, moving down the fallback chain on errors and deadlines.
+
+        Parameters
+        ----------
+        build_request : Callable[[LLMResponse], dict[str, Any]]
+            Builds the ``chat.completions.create`` arguments for a provider of the chain.
+        parse : Callable[[ChatCompletion], Any]
+            Extracts and validates the output of a response, see ``_create_completion``.
+            An output failing to parse moves down the chain like a failed request.
+        bypass_cache : bool, optional
+            Whether to skip the cache lookup, by default False.
+
+        Returns
+        -------
+        tuple[ChatCompletion, Any]
+            The raw response and its parsed output.
+
+        Raises
+        ------
+        RuntimeError
+            If every provider of a chain with fallbacks failed. Without fallbacks the
+            error of the request (``CircuitOpenError`` if the circuit of the endpoint
+            is open) is raised as is.
+        """
+        chain: list[LLMResponse] = self._available_chain()
+        errors: list[str] = []
+        idx: int = 0
+        while idx < len(chain):
+            target: LLMResponse = chain[idx]
+            secondary: LLMResponse | None = (
+                chain[idx + 1] if self.hedge and idx + 1 < len(chain) else None
+            )
+            try:
+                if secondary is None:
+                    return await self._attempt_completion(
+                        target, build_request, parse, bypass_cache
+                    )
+                return await self._hedged_completion(
+                    target, secondary, build_request, parse, bypass_cache
+                )
+            except Exception as e:
+                if len(chain) == 1:
+                    raise
+                error: str = "deadline exceeded" if isinstance(e, asyncio.TimeoutError) else str(e)
+                failed: str = (
+                    target.model if secondary is None else f"{target.model}, {secondary.model}"
+                )
+                errors.append(f"{failed}: {error}")
+                idx += 1 if secondary is None else 2
+                if idx < len(chain):
+                    logger.warning(
+                        "Falling back from %s to %s: %s", failed, chain[idx].model, error
+                    )
+        raise RuntimeError(f"All providers failed ({'; '.join(errors)})")
+
+    @_validate_call_unless_disabled
+    @profile
     async def ainvoke(
-        self, messages: list[dict[str, str]]
+        self, messages: list[dict[str, str]], bypass_cache: bool = False
     ) -> tuple[str, Type[T]] | tuple[None, dict[str, str]]:
         """Asynchronously invoke the LLM API with the given messages.
 
@@ -122,6 +1088,8 @@ class LLMResponse:
         ----------
         messages : list[dict[str, str]]
             List of message dictionaries containing role and content.
+        bypass_cache : bool, optional
+            Whether to skip the response cache lookup, by default False.
 
         Returns
         -------
@@ -132,24 +1100,25 @@ class LLMResponse:
 
         """
         try:
-            aclient: AsyncOpenAI = self._get_client()
-
-            raw_response = await aclient.chat.completions.create(  # type: ignore
-                model=self.model,
-                messages=messages,  # type: ignore
-                temperature=0,
-                seed=42,
+            raw_response, content = await self._create_completion_with_fallback(
+                lambda target: {
+                    "model": target.model,
+                    "messages": messages,
+                    "temperature": 0,
+                    "seed": 42,
+                },
+                lambda response: clean_response_text(response.choices[0].message.content),  # type: ignore
+                bypass_cache=bypass_cache,
             )
-
-            content = _clean_response_text_single_regex(raw_response.choices[0].message.content)  # type: ignore
             return (content, raw_response)  # type: ignore
 
         except Exception as e:
             return (None, {"status": "error", "error": str(e)})  # type: ignore
 
-    @validate_call
+    @_validate_call_unless_disabled
+    @profile
     async def get_structured_response(
-        self, message: str, response_model: Type[T]
+        self, message: str, response_model: Type[T], bypass_cache: bool = False
     ) -> tuple[Type[T], Type[T]] | tuple[None, dict[str, str]]:
         """Get structured response from OpenAI API.
 
@@ -159,6 +1128,8 @@ class LLMResponse:
                 The user message to send to the API.
             response_model : Type[T]
                 The Pydantic model class to validate the response.
+            bypass_cache : bool, optional
+                Whether to skip the response cache lookup, by default False.
 
         Returns
         -------
@@ -167,85 +1138,635 @@ class LLMResponse:
         - (None, error_info)
         """
         try:
-            aclient: AsyncOpenAI = self._get_client()
-            json_schema: dict[str, str] = response_model.model_json_schema()
-            if not self.use_vllm:
-                raw_response: Type[T] = await aclient.chat.completions.create(  # type: ignore
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": SYSTEM_MESSAGE.format(json_schema=json_schema),
-                        },
-                        {"role": "user", "content": message},
-                    ],
-                    response_format={"type": "json_schema", "schema": json_schema, "strict": True},
-                    temperature=0,
-                    seed=42,
-                )
+            compiled: CompiledResponseModel = compile_response_model(response_model)
+            raw_response, structured_output = await self._create_completion_with_fallback(
+                lambda target: target._structured_request_kwargs(message, compiled),
+                compiled.parse_response,
+                bypass_cache=bypass_cache,
+            )
+            return (structured_output, raw_response)  # type: ignore
 
-                _value = _clean_response_text_single_regex(raw_response.choices[0].message.content)  # type: ignore
-                structured_output: Type[T] = response_model.model_validate(json.loads(_value))  # type: ignore
-                return (structured_output, raw_response)  # type: ignore
+        except Exception as e:
+            return (
+                None,
+                {"status": "error", "error": str(e)},
+            )
 
-            raw_response = await aclient.chat.completions.create(  # type: ignore
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_MESSAGE_VLLM},
+    def _structured_request_kwargs(
+        self, message: str, compiled: CompiledResponseModel
+    ) -> dict[str, Any]:
+        """Build the ``chat.completions.create`` arguments of a structured request."""
+        if not self.use_vllm:
+            return {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": compiled.system_message},
                     {"role": "user", "content": message},
                 ],
-                extra_body={"enable_thinking": False, "guided_json": json_schema},
-                temperature=0,
-                seed=42,
+                "response_format": {
+                    "type": "json_schema",
+                    "schema": compiled.json_schema,
+                    "strict": True,
+                },
+                "temperature": 0,
+                "seed": 42,
+            }
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_MESSAGE_VLLM},
+                {"role": "user", "content": message},
+            ],
+            "extra_body": {"enable_thinking": False, "guided_json": compiled.json_schema},
+            "temperature": 0,
+            "seed": 42,
+        }
+
+    @asynccontextmanager
+    async def _open_stream(
+        self,
+        build_request: Callable[["LLMResponse"], dict[str, Any]],
+        on_retry: Callable[[int, BaseException, float], None] | None = None,
+    ) -> AsyncIterator[tuple["LLMResponse", AsyncStream[ChatCompletionChunk]]]:
+        """Open a completion stream, moving down the fallback chain until one opens.
+
+        Opening the stream is retried and goes through the circuit breaker of the
+        provider like any completion; a partially consumed stream is never retried,
+        but a transient error while reading it counts as a failure of the provider.
+
+        Parameters
+        ----------
+        build_request : Callable[[LLMResponse], dict[str, Any]]
+            Builds the ``chat.completions.create`` arguments for a provider of the chain.
+        on_retry : Callable[[int, BaseException, float], None] | None, optional
+            Called on every retry of the opening request, see ``RetryPolicy.run``,
+            by default None.
+
+        Yields
+        ------
+        tuple[LLMResponse, AsyncStream[ChatCompletionChunk]]
+            The provider that opened the stream and the stream, closed on exit.
+
+        Raises
+        ------
+        RuntimeError
+            If no provider of a chain with fallbacks could open the stream. Without
+            fallbacks the error of the request is raised as is.
+        """
+        chain: list[LLMResponse] = self._available_chain()
+        errors: list[str] = []
+        for idx, target in enumerate(chain):
+            async with target._get_pooled_client().track() as aclient:
+                # The usage of streamed calls comes in a last chunk without choices
+                request_kwargs: dict[str, Any] = {
+                    **build_request(target),
+                    "stream": True,
+                    "stream_options": {"include_usage": True},
+                }
+                try:
+                    stream: AsyncStream[ChatCompletionChunk] = await target.retry_policy.run(
+                        target._call_through_breaker,
+                        partial(aclient.chat.completions.create, **request_kwargs),
+                        on_retry=on_retry,
+                    )
+                except Exception as e:
+                    if len(chain) == 1:
+                        raise
+                    errors.append(f"{target.model}: {e}")
+                    if idx + 1 < len(chain):
+                        logger.warning(
+                            "Falling back from %s to %s: %s", target.model, chain[idx + 1].model, e
+                        )
+                    continue
+                try:
+                    yield (target, stream)
+                except Exception as e:
+                    if is_retryable(e):
+                        target.circuit_breaker().record_failure()
+                    raise
+                finally:
+                    await stream.close()
+                return
+        raise RuntimeError(f"All providers failed ({'; '.join(errors)})")
+
+    async def astream_structured_response(
+        self, message: str, response_model: Type[T], max_leading_chars: int = 1_000
+    ) -> AsyncIterator[tuple[dict[str, Any], bool] | tuple[T, bool] | tuple[None, dict[str, str]]]:
+        """Stream a structured response, yielding fields as soon as they are complete.
+
+        ``<think>`` blocks and code fences are stripped from the token stream as it
+        arrives. Every completed top-level field is validated against the response
+        model, and the stream is aborted early (saving the remaining tokens) when the
+        output is not valid JSON or a field fails validation. Unknown fields are
+        skipped, unless the model forbids extra fields. The last field only completes
+        with the object, so it is checked once the stream ends, before the full
+        response is validated. Output starting with prose may be reasoning ended by a
+        stray ``</think>``: its errors are only reported once the stream ends, and the
+        fields yielded so far start over after the tag. The final output is the same as
+        ``get_structured_response`` would return. Streamed responses are not cached.
+
+        Parameters
+        ----------
+        message : str
+            The user message to send to the API.
+        response_model : Type[T]
+            The Pydantic model class to validate the response.
+        max_leading_chars : int, optional
+            Maximum number of characters of prose tolerated before the JSON object
+            starts, by default 1_000.
+
+        Yields
+        ------
+        tuple[dict[str, Any], bool] | tuple[T, bool] | tuple[None, dict[str, str]]
+            - (validated_fields, False) each time new fields are complete
+            - (structured_output, True) once the full response is validated
+            - (None, error_info) if the request fails or the output is invalid
+        """
+        compiled: CompiledResponseModel = compile_response_model(response_model)
+        cleaner = StreamingResponseCleaner()
+        buffer: str = ""
+        json_start: int = -1
+        validated_fields: dict[str, Any] = {}
+        # An error in what may be a reasoning preamble waits for the end of the stream
+        deferred: bool = False
+        start_time: float = time.perf_counter()
+        ttft: float | None = None
+        usage: Any = None
+        model: str = self.model
+        retry_counter = RetryCounter()
+
+        def count_retry(attempt: int, error: BaseException, delay: float) -> None:
+            retry_counter.retries += 1
+
+        def record_call(error: str | None = None) -> None:
+            TELEMETRY.record(
+                CallRecord(
+                    model=model,
+                    source="llm_response",
+                    latency=time.perf_counter() - start_time,
+                    prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                    completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+                    ttft=ttft,
+                    retries=retry_counter.retries,
+                    error=error,
+                )
             )
 
-            _value = _clean_response_text_single_regex(raw_response.choices[0].message.content)  # type: ignore
-            structured_output = response_model.model_validate(json.loads(_value))  # type: ignore
-            return (structured_output, raw_response)  # type: ignore
+        try:
+            async with self._open_stream(
+                lambda target: target._structured_request_kwargs(message, compiled),
+                on_retry=count_retry,
+            ) as (target, stream):
+                model = target.model
+                async for chunk in stream:
+                    usage = chunk.usage or usage
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if ttft is None:
+                        ttft = time.perf_counter() - start_time
+                    cleaned: str = cleaner.feed(chunk.choices[0].delta.content)
+                    if cleaner.restarted:
+                        # A stray </think>: everything so far was reasoning, start over
+                        buffer, json_start, validated_fields, deferred = "", -1, {}, False
+                    buffer += cleaned
+                    if deferred:
+                        continue
+                    if json_start == -1:
+                        json_start = _find_json_start(buffer)
+                        if json_start == -1:
+                            if len(buffer) > max_leading_chars:
+                                deferred = self._defer_stream_error(
+                                    cleaner,
+                                    buffer,
+                                    ValueError("No JSON object found in the response"),
+                                )
+                            continue
+                    # A top-level field can only complete on a structural character
+                    elif not any(char in cleaned for char in ",}]"):
+                        continue
+
+                    try:
+                        parsed: Any = from_json(buffer[json_start:], allow_partial=True)
+                        if not isinstance(parsed, dict):
+                            continue
+                        # Every key but the last one is complete while the object is open
+                        completed: list[str] = list(parsed)[:-1]
+                        new_fields: list[str] = [
+                            key
+                            for key in compiled.fields_to_validate(completed)
+                            if key not in validated_fields
+                        ]
+                        for key in new_fields:
+                            validated_fields[key] = compiled.validate_field(key, parsed[key])
+                    except (ValidationError, ValueError) as e:
+                        deferred = self._defer_stream_error(cleaner, buffer, e)
+                        continue
+                    if new_fields:
+                        yield (dict(validated_fields), False)
 
+            buffer += cleaner.flush()
+            output_json: str = clean_response_text(buffer, extract_json=True)
+            # The last field only completes with the object: check it like the others
+            parsed = from_json(output_json)
+            if isinstance(parsed, dict):
+                for key in compiled.fields_to_validate(parsed.keys() - validated_fields.keys()):
+                    compiled.validate_field(key, parsed[key])
+            structured_output: T = compiled.adapter.validate_json(output_json)
+        except (ValidationError, ValueError) as e:
+            error: str = f"Aborted invalid structured output: {e}"
+            record_call(error)
+            yield (None, {"status": "error", "error": error})
         except Exception as e:
-            return (
-                None,
-                {"status": "error", "error": str(e)},
+            record_call(str(e))
+            yield (None, {"status": "error", "error": str(e)})
+        else:
+            record_call()
+            yield (structured_output, True)
+
+    @staticmethod
+    def _defer_stream_error(
+        cleaner: StreamingResponseCleaner, buffer: str, error: Exception
+    ) -> bool:
+        """
+        Decide whether an invalid streamed output aborts the stream or waits for its end.
+
+        Output starting with prose, before any ``<think>`` tag, may be reasoning whose
+        opening tag was added by the chat template; a later stray ``</think>`` would
+        void it, so the error is deferred to the final validation. Otherwise ``error``
+        is raised to abort the stream.
+        """
+        if cleaner.may_restart and buffer.lstrip()[:1] not in ("{", "["):
+            return True
+        raise error
+
+    async def abatch(
+        self, messages_list: Iterable[list[dict[str, str]]], max_concurrency: int = 8
+    ) -> list[tuple[str, Any] | tuple[None, dict[str, str]]]:
+        """Invoke the LLM API for many conversations with bounded concurrency.
+
+        Parameters
+        ----------
+        messages_list : Iterable[list[dict[str, str]]]
+            Conversations to send; each one is passed to ``ainvoke``.
+        max_concurrency : int, optional
+            Maximum number of requests in flight, by default 8.
+
+        Returns
+        -------
+        list[tuple[str, Any] | tuple[None, dict[str, str]]]
+            One ``ainvoke`` result per conversation, in input order.
+        """
+        jobs = (partial(self.ainvoke, messages) for messages in messages_list)
+        return await self._run_batch(jobs, max_concurrency)
+
+    async def get_structured_responses(
+        self, items: Iterable[tuple[str, Type[T]]], max_concurrency: int = 8
+    ) -> list[tuple[Any, Any] | tuple[None, dict[str, str]]]:
+        """Get structured responses for many messages with bounded concurrency.
+
+        Parameters
+        ----------
+        items : Iterable[tuple[str, Type[T]]]
+            Pairs of user message and the Pydantic model class to validate against.
+        max_concurrency : int, optional
+            Maximum number of requests in flight, by default 8.
+
+        Returns
+        -------
+        list[tuple[Any, Any] | tuple[None, dict[str, str]]]
+            One ``get_structured_response`` result per item, in input order.
+        """
+        jobs = (
+            partial(self.get_structured_response, message=message, response_model=response_model)
+            for message, response_model in items
+        )
+        return await self._run_batch(jobs, max_concurrency)
+
+    async def stream_structured(
+        self,
+        jsonl_path: str | Path,
+        response_model: Type[T],
+        output_path: str | Path | None = None,
+        text_key: str = "text",
+        max_in_flight: int = 8,
+        resume: bool = True,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream structured extraction over a JSONL file.
+
+        The input is read lazily line by line and at most ``max_in_flight`` requests
+        are pending at any time. Results are yielded (and appended to ``output_path``)
+        in input order, and the byte offset of the last completed line is checkpointed
+        to ``<output_path>.offset`` so an interrupted run resumes where it stopped.
+        File I/O runs in worker threads so it never blocks the event loop.
+
+        Parameters
+        ----------
+        jsonl_path : str | Path
+            Input JSONL file. Each line is either a JSON string or an object holding
+            the message under ``text_key``.
+        response_model : Type[T]
+            The Pydantic model class to validate each response.
+        output_path : str | Path | None, optional
+            Output JSONL file. If None, results are only yielded, by default None.
+        text_key : str, optional
+            Key of the message in object lines, by default "text".
+        max_in_flight : int, optional
+            Maximum number of pending requests, by default 8.
+        resume : bool, optional
+            Whether to resume from the checkpointed offset, by default True.
+
+        Yields
+        ------
+        dict[str, Any]
+            ``{"line": ..., "status": "success", "result": ...}`` or
+            ``{"line": ..., "status": "error", "error": ...}`` per input line.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        checkpoint_path: Path | None = Path(f"{output_path}.offset") if output_path else None
+        offset, line_number = 0, 0
+        if (
+            resume
+            and checkpoint_path is not None
+            and await asyncio.to_thread(checkpoint_path.exists)
+        ):
+            checkpoint: dict[str, int] = json.loads(
+                await asyncio.to_thread(checkpoint_path.read_text)
             )
+            offset, line_number = checkpoint["offset"], checkpoint["line"]
+            logger.info("Resuming %s from line %d (offset %d)", jsonl_path, line_number, offset)
+
+        window: deque[tuple[int, int, asyncio.Task[dict[str, Any]]]] = deque()
+        output_file = (
+            await asyncio.to_thread(open, output_path, "a" if resume else "w", encoding="utf-8")
+            if output_path
+            else None
+        )
+        input_file = await asyncio.to_thread(open, jsonl_path, "rb")
+        try:
+            await asyncio.to_thread(input_file.seek, offset)
+            # Read the input in batches of lines to limit the thread hand-offs
+            while raw_lines := await asyncio.to_thread(input_file.readlines, _JSONL_READ_SIZE):
+                for raw_line in raw_lines:
+                    offset += len(raw_line)
+                    line_number += 1
+                    if not raw_line.strip():
+                        continue
+                    task = asyncio.create_task(
+                        self._extract_jsonl_line(raw_line, line_number, response_model, text_key)
+                    )
+                    window.append((line_number, offset, task))
+                    if len(window) >= max_in_flight:
+                        yield await self._complete_jsonl_line(
+                            window.popleft(), output_file, checkpoint_path
+                        )
 
+            while window:
+                yield await self._complete_jsonl_line(
+                    window.popleft(), output_file, checkpoint_path
+                )
+        finally:
+            for _, _, task in window:
+                task.cancel()
+            await asyncio.to_thread(input_file.close)
+            if output_file is not None:
+                await asyncio.to_thread(output_file.close)
+
+    async def _extract_jsonl_line(
+        self, raw_line: bytes, line_number: int, response_model: Type[T], text_key: str
+    ) -> dict[str, Any]:
+        """Run structured extraction for one JSONL line and build its output record."""
+        try:
+            record: Any = json.loads(raw_line)
+            message: str = record[text_key] if isinstance(record, dict) else record
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            return {"line": line_number, "status": "error", "error": f"Invalid input line: {e}"}
+
+        structured_output, raw_response = await self.get_structured_response(
+            message=message, response_model=response_model
+        )
+        if structured_output is None:
+            return {"line": line_number, "status": "error", "error": raw_response["error"]}  # type: ignore
+        return {"line": line_number, "status": "success", "result": structured_output.model_dump()}  # type: ignore
 
-@validate_call
-def convert_to_openai_messages(messages: list[AnyMessage]) -> list[dict[str, Any]]:
+    @staticmethod
+    async def _complete_jsonl_line(
+        entry: tuple[int, int, "asyncio.Task[dict[str, Any]]"],
+        output_file: Any,
+        checkpoint_path: Path | None,
+    ) -> dict[str, Any]:
+        """Wait for the oldest pending line, write its record and checkpoint the offset."""
+        line_number, offset, task = entry
+        output_record: dict[str, Any] = await task
+        if output_file is not None and checkpoint_path is not None:
+            await asyncio.to_thread(
+                LLMResponse._write_jsonl_record,
+                output_record,
+                output_file,
+                checkpoint_path,
+                offset,
+                line_number,
+            )
+        return output_record
+
+    @staticmethod
+    def _write_jsonl_record(
+        output_record: dict[str, Any],
+        output_file: Any,
+        checkpoint_path: Path,
+        offset: int,
+        line_number: int,
+    ) -> None:
+        """Append the record to the output file and checkpoint the offset (blocking)."""
+        output_file.write(json.dumps(output_record) + "\n")
+        output_file.flush()
+        # Write-then-rename so a crash never leaves a truncated checkpoint
+        tmp_path: Path = checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"offset": offset, "line": line_number}))
+        os.replace(tmp_path, checkpoint_path)
+
+    async def _run_batch(
+        self, jobs: Iterable[Callable[[], Awaitable[tuple[Any, Any]]]], max_concurrency: int
+    ) -> list[tuple[Any, Any]]:
+        """Run the jobs with ``run_bounded`` and record the throughput."""
+        results, stats = await run_bounded(jobs, max_concurrency=max_concurrency)
+        self.last_batch_stats = stats
+        logger.info(
+            "Batch of %d items (%d failed) completed in %.2f seconds: %.2f items/s, %.2f tokens/s",
+            stats.total,
+            stats.failed,
+            stats.elapsed,
+            stats.items_per_second,
+            stats.tokens_per_second,
+        )
+        return results
+
+
+_MESSAGES_ADAPTER: TypeAdapter[list[AnyMessage]] = TypeAdapter(list[AnyMessage])
+# OpenAI role of each LangChain message type; other types are sent as user messages
+_OPENAI_ROLES: dict[str, str] = {
+    "system": "system",
+    "human": "user",
+    "ai": "assistant",
+    "tool": "tool",
+}
+
+
+def _convert_content_block(block: str | dict[str, Any]) -> dict[str, Any] | None:
+    """Convert a LangChain content block to an OpenAI content part, or None to drop it."""
+    if isinstance(block, str):
+        return {"type": "text", "text": block}
+    block_type: str | None = block.get("type")
+    if block_type in ("text", "image_url", "input_audio", "file"):
+        return block
+    if block_type == "image":
+        # LangChain standard blocks: {"url": ...} or base64 data with a MIME type
+        if url := block.get("url"):
+            return {"type": "image_url", "image_url": {"url": url}}
+        data: str | None = block.get("base64") or block.get("data")
+        if data is not None:
+            mime_type: str = block.get("mime_type", "image/png")
+            return {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{data}"}}
+    # Provider-specific blocks (e.g. tool_use, reasoning) have no OpenAI equivalent
+    return None
+
+
+def _convert_content(content: str | list[str | dict[str, Any]]) -> str | list[dict[str, Any]]:
+    if isinstance(content, str):
+        return content
+    parts: list[dict[str, Any]] = []
+    for block in content:
+        if (part := _convert_content_block(block)) is not None:
+            parts.append(part)
+    return parts
+
+
+def _convert_message(msg: BaseMessage) -> dict[str, Any]:
+    """Convert a single LangChain message to an OpenAI message."""
+    role: str = msg.role if isinstance(msg, ChatMessage) else _OPENAI_ROLES.get(msg.type, "user")
+    formatted: dict[str, Any] = {"role": role, "content": _convert_content(msg.content)}
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        formatted["tool_calls"] = [
+            {
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["name"], "arguments": json.dumps(tool_call["args"])},
+            }
+            for tool_call in msg.tool_calls
+        ]
+    elif isinstance(msg, ToolMessage):
+        formatted["tool_call_id"] = msg.tool_call_id
+    return formatted
+
+
+def _is_same_message(cached: BaseMessage, msg: BaseMessage) -> bool:
+    """Return True if ``msg`` converts like ``cached``, which has the same id."""
+    if cached is msg:
+        return True
+    # Checkpointers return copies of the messages, and a message can be replaced by id
+    if type(cached) is not type(msg) or cached.content != msg.content:
+        return False
+    return not isinstance(msg, AIMessage) or cached.tool_calls == msg.tool_calls
+
+
+@dataclass
+class MessageConversionCache:
+    """Converted messages per conversation thread, so each turn only converts new messages.
+
+    Messages are looked up by id; messages without an id (e.g. a system prompt built
+    every turn) are always converted. A thread only keeps the messages of its last
+    conversion, and the least recently used threads are evicted.
+
+    Parameters
+    ----------
+    max_threads : int, optional
+        Maximum number of threads kept, by default 1024.
+    """
+
+    max_threads: int = 1024
+    stats: CacheStats = field(default_factory=CacheStats, init=False)
+    _threads: OrderedDict[str, dict[str, tuple[BaseMessage, dict[str, Any]]]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    def convert(self, thread_id: str, messages: list[BaseMessage]) -> list[dict[str, Any]]:
+        """Convert ``messages``, reusing the conversions of the previous call for ``thread_id``."""
+        previous: dict[str, tuple[BaseMessage, dict[str, Any]]] = self._threads.pop(thread_id, {})
+        current: dict[str, tuple[BaseMessage, dict[str, Any]]] = {}
+        formatted: list[dict[str, Any]] = []
+        for msg in messages:
+            if msg.id is None:
+                formatted.append(_convert_message(msg))
+                continue
+            entry = previous.get(msg.id)
+            if entry is not None and _is_same_message(entry[0], msg):
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+                entry = (msg, _convert_message(msg))
+            current[msg.id] = entry
+            formatted.append(entry[1])
+        self._threads[thread_id] = current
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+            self.stats.evictions += 1
+        return formatted
+
+    def clear(self, thread_id: str | None = None) -> None:
+        """Drop the conversions of ``thread_id``, or of every thread."""
+        if thread_id is None:
+            self._threads.clear()
+        else:
+            self._threads.pop(thread_id, None)
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+
+# Cache used by `convert_to_openai_messages` when given a thread id
+MESSAGE_CONVERSION_CACHE: MessageConversionCache = MessageConversionCache()
+
+
+def convert_to_openai_messages(
+    messages: list[AnyMessage], thread_id: str | None = None
+) -> list[dict[str, Any]]:
     """
     Convert a list of messages to OpenAI compatible message format.
 
+    Message objects are converted directly; only other inputs (e.g. message dicts)
+    are validated into messages first. Multimodal content is converted to OpenAI
+    content parts and the tool calls of AI messages to OpenAI ``tool_calls``.
+
     Parameters
     ----------
     messages : list[AnyMessage]
         List of messages to be converted. Can contain SystemMessage,
         AIMessage, ToolMessage, or other message types.
+    thread_id : str | None, optional
+        Id of the conversation. When given, the messages already converted for the
+        thread are reused from ``MESSAGE_CONVERSION_CACHE`` and the returned dicts
+        are shared with the cache, so they must not be modified. By default None.
 
     Returns
     -------
     list[dict[str, Any]]
     """
-    formatted: list[dict[str, Any]] = []
+    if not all(isinstance(msg, BaseMessage) for msg in messages):
+        messages = _MESSAGES_ADAPTER.validate_python(messages)
+    if thread_id is not None:
+        return MESSAGE_CONVERSION_CACHE.convert(thread_id, messages)
+    return [_convert_message(msg) for msg in messages]
 
-    for msg in messages:
-        if isinstance(msg, SystemMessage):
-            formatted.append({"role": "system", "content": msg.content})
-        elif isinstance(msg, AIMessage):
-            formatted.append({"role": "assistant", "content": msg.content})
-        elif isinstance(msg, ToolMessage):
-            formatted.append(
-                {
-                    "role": "tool",
-                    "content": msg.content,
-                    "tool_call_id": msg.tool_call_id,
-                }
-            )
-        else:
-            formatted.append({"role": "user", "content": msg.content})
-    return formatted
+
+def _content_to_string(content: str | list[dict[str, Any]] | None) -> str:
+    if content is None or isinstance(content, str):
+        return content or ""
+    return " ".join(
+        part["text"] if part.get("type") == "text" else f"[{part.get('type')}]" for part in content
+    )
 
 
-@validate_call
 def convert_openai_messages_to_string(messages: list[dict[str, Any]]) -> str:
     """
     Convert a list of OpenAI messages to a formatted string representation.
@@ -254,11 +1775,19 @@ def convert_openai_messages_to_string(messages: list[dict[str, Any]]) -> str:
     ----------
     messages : list[dict[str, Any]]
         List of OpenAI message dictionaries containing 'role' and 'content' keys.
+        Content parts other than text are shown as their type, e.g. ``[image_url]``,
+        and tool calls as ``name(arguments)``.
 
     Returns
     -------
     str
         A formatted string with each message's role and content on separate lines.
     """
-    msgs: list[str] = [f"\nRole: {msg['role']}\nContent: {msg['content']}" for msg in messages]
+    msgs: list[str] = []
+    for msg in messages:
+        content: str = _content_to_string(msg.get("content"))
+        for tool_call in msg.get("tool_calls") or ():
+            function: dict[str, Any] = tool_call["function"]
+            content += f"\nTool call: {function['name']}({function['arguments']})"
+        msgs.append(f"\nRole: {msg['role']}\nContent: {content}")
     return "\n".join(msgs)
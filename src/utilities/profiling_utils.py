@@ -0,0 +1,350 @@
+import contextvars
+import inspect
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, TypeVar, overload
+
+from src import create_logger
+
+logger = create_logger()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Checked first by every profiled call; see `set_profiling_enabled`
+_ENABLED: bool = True
+
+
+def set_profiling_enabled(enabled: bool) -> None:
+    """
+    Globally enable or disable profiling.
+
+    Disabled profiled functions only pay for a global flag check before calling
+    the wrapped function.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether profiled calls are measured.
+    """
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def is_profiling_enabled() -> bool:
+    """Return True if profiled calls are measured."""
+    return _ENABLED
+
+
+@dataclass
+class RingBuffer:
+    """Fixed-size buffer keeping the most recent values.
+
+    Writes are a single slot assignment without locking: concurrent writers may
+    overwrite each other's slot, which only drops a sample.
+
+    Parameters
+    ----------
+    size : int, optional
+        Number of values kept, by default 1024.
+    """
+
+    size: int = 1024
+    _values: list[float] = field(init=False, repr=False)
+    _idx: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._values = [0.0] * self.size
+
+    def append(self, value: float) -> None:
+        idx = self._idx
+        self._values[idx % self.size] = value
+        self._idx = idx + 1
+
+    def values(self) -> list[float]:
+        """Return a copy of the values kept, oldest first when the buffer is full."""
+        if self._idx <= self.size:
+            return self._values[: self._idx]
+        start: int = self._idx % self.size
+        return self._values[start:] + self._values[:start]
+
+    def __len__(self) -> int:
+        return min(self._idx, self.size)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class ProfileStats:
+    """Rolling statistics of a profiled function.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of recent durations the percentiles are computed from, by default 1024.
+    """
+
+    window: int = 1024
+    calls: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+    total_time: float = field(default=0.0, init=False)
+    durations: RingBuffer = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.durations = RingBuffer(self.window)
+
+    def add(self, duration: float, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += error
+        self.total_time += duration
+        self.durations.append(duration)
+
+    def summary(self) -> dict[str, float]:
+        """
+        Summarize the recorded calls.
+
+        Returns
+        -------
+        dict[str, float]
+            The sampled call and error counts, the mean duration and the p50/p95/p99
+            of the recent durations, in milliseconds.
+        """
+        ordered: list[float] = sorted(self.durations.values())
+        if not ordered:
+            return {"calls": 0, "errors": 0}
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total_time / self.calls * 1000, 4),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 4),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 4),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 4),
+        }
+
+
+@dataclass
+class Span:
+    """A profiled call and the profiled calls it made.
+
+    Parameters
+    ----------
+    name : str
+        The name of the profiled function.
+    start : float
+        ``time.perf_counter()`` when the call started.
+    """
+
+    name: str
+    start: float
+    duration: float = 0.0
+    error: bool = False
+    children: list["Span"] = field(default_factory=list)
+    # Children not kept once `Profiler.max_children` was reached
+    dropped_children: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the span tree as nested dictionaries, with durations in milliseconds."""
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 4),
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+            "dropped_children": self.dropped_children,
+        }
+
+    def format(self, indent: int = 0) -> str:
+        """Return the span tree as an indented text outline."""
+        lines: list[str] = [f"{'  ' * indent}{self.name}: {self.duration * 1000:.3f} ms"]
+        lines += [child.format(indent + 1) for child in self.children]
+        if self.dropped_children:
+            lines.append(f"{'  ' * (indent + 1)}... {self.dropped_children} more")
+        return "\n".join(lines)
+
+
+_CURRENT_SPAN: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Profiler:
+    """Collect the statistics and trace trees of the profiled functions.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of recent durations kept per function, by default 1024.
+    max_traces : int, optional
+        Number of recent root spans kept, by default 100.
+    max_children : int, optional
+        Number of child spans kept per span, so a call fanning out many tasks (e.g.
+        a batch) keeps a bounded trace; the others are only counted, by default 50.
+    """
+
+    window: int = 1024
+    max_traces: int = 100
+    max_children: int = 50
+    stats: dict[str, ProfileStats] = field(default_factory=dict, init=False)
+    traces: deque[Span] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.traces = deque(maxlen=self.max_traces)
+
+    def _start(self, name: str) -> tuple[Span, Span | None]:
+        parent: Span | None = _CURRENT_SPAN.get()
+        return Span(name=name, start=time.perf_counter()), parent
+
+    def _finish(self, span: Span, parent: Span | None, duration: float, error: bool) -> None:
+        span.duration = duration
+        span.error = error
+        if parent is not None:
+            if len(parent.children) < self.max_children:
+                parent.children.append(span)
+            else:
+                parent.dropped_children += 1
+        else:
+            self.traces.append(span)
+        stats = self.stats.get(span.name)
+        if stats is None:
+            stats = self.stats[span.name] = ProfileStats(self.window)
+        stats.add(duration, error)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s executed in %.4f seconds", span.name, duration)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Return the summary of every profiled function, slowest p95 first."""
+        summaries = {name: stats.summary() for name, stats in self.stats.items()}
+        return dict(sorted(summaries.items(), key=lambda item: -item[1].get("p95_ms", 0.0)))
+
+    def reset(self) -> None:
+        """Drop every statistic and trace."""
+        self.stats.clear()
+        self.traces.clear()
+
+
+# Profiler used by `profile`
+PROFILER: Profiler = Profiler()
+
+
+@overload
+def profile(func: F) -> F: ...
+
+
+@overload
+def profile(*, name: str | None = None, sample_rate: float = 1.0) -> Callable[[F], F]: ...
+
+
+def profile(
+    func: Callable[..., Any] | None = None, *, name: str | None = None, sample_rate: float = 1.0
+) -> Any:
+    """
+    Profile a sync function, coroutine function or async generator function.
+
+    Every sampled call records its duration in ``PROFILER.stats`` and a ``Span``
+    nested under the profiled call it was made from, so the calls of a request
+    form a trace tree in ``PROFILER.traces``. For async generators the duration
+    is the time spent producing items, excluding the time the consumer holds each
+    item.
+
+    Parameters
+    ----------
+    func : Callable[..., Any] | None, optional
+        The function to profile, when used as ``@profile`` without arguments.
+    name : str | None, optional
+        Name of the statistics and spans, by default the function's qualified name.
+    sample_rate : float, optional
+        Fraction of the calls measured, by default 1.0.
+
+    Returns
+    -------
+    Any
+        The wrapped function, or a decorator when ``func`` is None.
+
+    Examples
+    --------
+    >>> @profile(sample_rate=0.1)
+    ... async def call_api(): ...
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        span_name: str = name or func.__qualname__
+        always: bool = sample_rate >= 1.0
+
+        if inspect.isasyncgenfunction(func):
+
+            @wraps(func)
+            async def agen_wrapper(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+                if not _ENABLED or not (always or random.random() < sample_rate):
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    return
+                agen = func(*args, **kwargs)
+                span, parent = PROFILER._start(span_name)
+                busy: float = 0.0
+                error: bool = False
+                try:
+                    while True:
+                        # The span is current only while the generator runs, never in the consumer
+                        token = _CURRENT_SPAN.set(span)
+                        step_start: float = time.perf_counter()
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            busy += time.perf_counter() - step_start
+                            _CURRENT_SPAN.reset(token)
+                        yield item
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    await agen.aclose()
+                    PROFILER._finish(span, parent, busy, error)
+
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _ENABLED or not (always or random.random() < sample_rate):
+                    return await func(*args, **kwargs)
+                span, parent = PROFILER._start(span_name)
+                token = _CURRENT_SPAN.set(span)
+                error: bool = False
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    _CURRENT_SPAN.reset(token)
+                    PROFILER._finish(span, parent, time.perf_counter() - span.start, error)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _ENABLED or not (always or random.random() < sample_rate):
+                return func(*args, **kwargs)
+            span, parent = PROFILER._start(span_name)
+            token = _CURRENT_SPAN.set(span)
+            error: bool = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                _CURRENT_SPAN.reset(token)
+                PROFILER._finish(span, parent, time.perf_counter() - span.start, error)
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,403 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+import httpx
+
+from src import create_logger
+
+logger = create_logger()
+
+OPENROUTER_HOST: str = "openrouter.ai"
+
+
+def _hash_api_key(api_key: str) -> str:
+    """Hash the API key so it can be used as a dictionary key without being stored."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def _parse_interval(interval: str) -> float:
+    """Convert an OpenRouter interval such as ``"10s"`` or ``"1m"`` to seconds."""
+    units: dict[str, float] = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    for unit in sorted(units, key=len, reverse=True):
+        if interval.endswith(unit):
+            return float(interval[: -len(unit)]) * units[unit]
+    return float(interval)
+
+
+def parse_retry_after(headers: httpx.Headers) -> float | None:
+    """
+    Extract the wait time in seconds from rate limit response headers.
+
+    Parameters
+    ----------
+    headers : httpx.Headers
+        The response headers.
+
+    Returns
+    -------
+    float | None
+        Seconds to wait, or None if the headers carry no hint.
+    """
+    if retry_after_ms := headers.get("retry-after-ms"):
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    if retry_after := headers.get("retry-after"):
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    # OpenRouter sends the reset time as epoch milliseconds
+    if reset := headers.get("x-ratelimit-reset"):
+        try:
+            return max(float(reset) / 1000 - time.time(), 0.0)
+        except ValueError:
+            pass
+    return None
+
+
+@dataclass
+class RateLimits:
+    """Rate limits applied to one API key.
+
+    Parameters
+    ----------
+    requests_per_minute : float | None, optional
+        Maximum requests per minute. None means unlimited, by default None.
+    tokens_per_minute : float | None, optional
+        Maximum (estimated) tokens per minute. None means unlimited, by default None.
+    """
+
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+
+
+@dataclass
+class TokenBucket:
+    """An asynchronous token bucket.
+
+    Parameters
+    ----------
+    rate_per_minute : float | None
+        Refill rate (and capacity) per minute. None disables the bucket.
+    """
+
+    rate_per_minute: float | None
+    _tokens: float = field(default=0.0, init=False)
+    _updated_at: float = field(default_factory=time.monotonic, init=False)
+    _blocked_until: float = field(default=0.0, init=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = self.capacity
+
+    @property
+    def capacity(self) -> float:
+        return self.rate_per_minute or 0.0
+
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        if self.rate_per_minute:
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_minute / 60
+            )
+        self._updated_at = now
+
+    def set_rate(self, rate_per_minute: float | None) -> None:
+        """Change the refill rate, keeping the current fill ratio."""
+        self._refill()
+        ratio: float = self._tokens / self.capacity if self.capacity else 1.0
+        self.rate_per_minute = rate_per_minute
+        self._tokens = self.capacity * ratio
+
+    def pause(self, seconds: float) -> None:
+        """Block every acquisition for ``seconds``."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until ``amount`` tokens are available and consume them.
+
+        Requests larger than the bucket capacity are clamped to the capacity so they
+        can still proceed once the bucket is full.
+        """
+        async with self._lock:
+            while True:
+                now: float = time.monotonic()
+                if self._blocked_until > now:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if not self.rate_per_minute:
+                    return
+                self._refill()
+                amount = min(amount, self.capacity)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) * 60 / self.rate_per_minute)
+
+
+@dataclass
+class AsyncRateLimiter:
+    """Client-side rate limiter with request and token buckets per API key and model.
+
+    Every request also takes a token from a request bucket shared by all the models
+    of its API key, so the per-key limit holds however many models are used. The
+    limits of an API key are either set explicitly or refreshed from the OpenRouter
+    ``/auth/key`` endpoint. 429 responses pause the affected bucket for the
+    ``Retry-After`` duration and shrink its rate, which then recovers gradually on
+    successful responses.
+
+    Parameters
+    ----------
+    default_limits : RateLimits, optional
+        Limits used for API keys without explicit limits, by default unlimited.
+    backoff_factor : float, optional
+        Multiplier applied to the request rate after a 429 response, by default 0.8.
+    recovery_factor : float, optional
+        Multiplier applied to the request rate after a successful response until the
+        configured limit is reached again, by default 1.05.
+    """
+
+    default_limits: RateLimits = field(default_factory=RateLimits)
+    backoff_factor: float = 0.8
+    recovery_factor: float = 1.05
+    _limits: dict[str, RateLimits] = field(default_factory=dict, init=False)
+    _buckets: dict[tuple[str, str], tuple[TokenBucket, TokenBucket]] = field(
+        default_factory=dict, init=False
+    )
+    _key_buckets: dict[str, TokenBucket] = field(default_factory=dict, init=False)
+    _refresh_tasks: dict[str, asyncio.Task[None]] = field(default_factory=dict, init=False)
+
+    def get_limits(self, api_key: str) -> RateLimits:
+        """Return the limits applied to ``api_key``."""
+        return self._limits.get(_hash_api_key(api_key), self.default_limits)
+
+    def set_limits(self, api_key: str, limits: RateLimits) -> None:
+        """Set the limits of ``api_key`` and update its existing buckets."""
+        api_key_hash: str = _hash_api_key(api_key)
+        self._limits[api_key_hash] = limits
+        if (key_bucket := self._key_buckets.get(api_key_hash)) is not None:
+            key_bucket.set_rate(limits.requests_per_minute)
+        for (key_hash, _), (request_bucket, token_bucket) in self._buckets.items():
+            if key_hash == api_key_hash:
+                request_bucket.set_rate(limits.requests_per_minute)
+                token_bucket.set_rate(limits.tokens_per_minute)
+
+    def _get_key_bucket(self, api_key_hash: str) -> TokenBucket:
+        key_bucket = self._key_buckets.get(api_key_hash)
+        if key_bucket is None:
+            limits: RateLimits = self._limits.get(api_key_hash, self.default_limits)
+            key_bucket = TokenBucket(limits.requests_per_minute)
+            self._key_buckets[api_key_hash] = key_bucket
+        return key_bucket
+
+    def _get_buckets(self, api_key_hash: str, model: str) -> tuple[TokenBucket, TokenBucket]:
+        buckets = self._buckets.get((api_key_hash, model))
+        if buckets is None:
+            limits: RateLimits = self._limits.get(api_key_hash, self.default_limits)
+            buckets = (
+                TokenBucket(limits.requests_per_minute),
+                TokenBucket(limits.tokens_per_minute),
+            )
+            self._buckets[(api_key_hash, model)] = buckets
+        return buckets
+
+    async def acquire(self, api_key: str, model: str, tokens: int = 0) -> None:
+        """
+        Wait until a request of ``tokens`` estimated tokens fits the limits.
+
+        Parameters
+        ----------
+        api_key : str
+            The API key the request is made with.
+        model : str
+            The model the request targets.
+        tokens : int, optional
+            Estimated number of tokens of the request, by default 0.
+        """
+        api_key_hash: str = _hash_api_key(api_key)
+        request_bucket, token_bucket = self._get_buckets(api_key_hash, model)
+        await self._get_key_bucket(api_key_hash).acquire(1)
+        await request_bucket.acquire(1)
+        if tokens:
+            await token_bucket.acquire(tokens)
+
+    def on_response(
+        self, api_key: str, model: str, status_code: int, retry_after: float | None = None
+    ) -> None:
+        """
+        Adapt the request rate to a response status.
+
+        Parameters
+        ----------
+        api_key : str
+            The API key the request was made with.
+        model : str
+            The model the request targeted.
+        status_code : int
+            The HTTP status code of the response.
+        retry_after : float | None, optional
+            Seconds to wait advertised by the server, by default None.
+        """
+        api_key_hash: str = _hash_api_key(api_key)
+        request_bucket, _ = self._get_buckets(api_key_hash, model)
+        if status_code == 429:
+            wait: float = retry_after if retry_after is not None else 1.0
+            request_bucket.pause(wait)
+            if request_bucket.rate_per_minute:
+                request_bucket.set_rate(max(request_bucket.rate_per_minute * self.backoff_factor, 1.0))
+            logger.warning("Rate limited on model %s, pausing for %.2f seconds", model, wait)
+            return
+
+        limit = self._limits.get(api_key_hash, self.default_limits).requests_per_minute
+        if limit and request_bucket.rate_per_minute and request_bucket.rate_per_minute < limit:
+            request_bucket.set_rate(min(request_bucket.rate_per_minute * self.recovery_factor, limit))
+
+    async def refresh_from_openrouter(self, api_key: str, base_url: str) -> RateLimits | None:
+        """
+        Refresh the limits of ``api_key`` from the OpenRouter ``/auth/key`` endpoint.
+
+        Parameters
+        ----------
+        api_key : str
+            The OpenRouter API key.
+        base_url : str
+            The OpenRouter base URL, e.g. ``https://openrouter.ai/api/v1``.
+
+        Returns
+        -------
+        RateLimits | None
+            The refreshed limits, or None if the endpoint returned no rate limit.
+
+        Raises
+        ------
+        ValueError
+            If the rate limit of the response is malformed or not positive.
+        """
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(
+                f"{base_url.rstrip('/')}/auth/key",
+                headers={"Authorization": f"Bearer {api_key}"},
+            )
+            response.raise_for_status()
+
+        payload: Any = response.json()
+        data: Any = payload.get("data") if isinstance(payload, dict) else None
+        rate_limit: Any = data.get("rate_limit") if isinstance(data, dict) else None
+        if not rate_limit:
+            return None
+        try:
+            requests: float = float(rate_limit["requests"])
+            interval: float = _parse_interval(str(rate_limit["interval"]))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Malformed OpenRouter rate limit {rate_limit!r}") from e
+        # A zero rate would block every request forever
+        if requests <= 0 or interval <= 0:
+            raise ValueError(f"Invalid OpenRouter rate limit {rate_limit!r}")
+        current: RateLimits = self.get_limits(api_key)
+        limits = RateLimits(
+            requests_per_minute=requests * 60 / interval,
+            tokens_per_minute=current.tokens_per_minute,
+        )
+        self.set_limits(api_key, limits)
+        return limits
+
+    def ensure_refresh(self, api_key: str, base_url: str, interval: float = 300) -> None:
+        """
+        Start refreshing the limits of ``api_key`` in the background.
+
+        Does nothing for non-OpenRouter endpoints, outside of a running event loop,
+        or when a refresh task for the key is already running.
+
+        Parameters
+        ----------
+        api_key : str
+            The OpenRouter API key.
+        base_url : str
+            The OpenRouter base URL.
+        interval : float, optional
+            Seconds between refreshes, by default 300.
+        """
+        if OPENROUTER_HOST not in base_url:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        api_key_hash: str = _hash_api_key(api_key)
+        task = self._refresh_tasks.get(api_key_hash)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+
+        async def refresh_periodically() -> None:
+            while True:
+                try:
+                    await self.refresh_from_openrouter(api_key, base_url)
+                except (httpx.HTTPError, KeyError, TypeError, ValueError) as e:
+                    logger.warning("Failed to refresh OpenRouter rate limits: %s", e)
+                await asyncio.sleep(interval)
+
+        self._refresh_tasks[api_key_hash] = loop.create_task(refresh_periodically())
+
+    async def aclose(self) -> None:
+        """Cancel the background refresh tasks, waiting for those of the running loop."""
+        loop = asyncio.get_running_loop()
+        tasks: list[asyncio.Task[None]] = list(self._refresh_tasks.values())
+        self._refresh_tasks.clear()
+        for task in tasks:
+            task_loop = task.get_loop()
+            if task_loop is loop:
+                task.cancel()
+            elif not task_loop.is_closed():
+                task_loop.call_soon_threadsafe(task.cancel)
+        await asyncio.gather(*(task for task in tasks if task.get_loop() is loop), return_exceptions=True)
+
+    def event_hooks(self) -> dict[str, list[Callable[..., Any]]]:
+        """
+        Build httpx event hooks applying the limiter to every chat completion request.
+
+        The hooks can be passed to any ``httpx.AsyncClient`` used by ``AsyncOpenAI``,
+        instructor or LangChain chat models so they all share the same buckets.
+
+        Returns
+        -------
+        dict[str, list[Callable[..., Any]]]
+            The ``request`` and ``response`` hooks.
+        """
+
+        async def on_request(request: httpx.Request) -> None:
+            try:
+                body: dict[str, Any] = json.loads(request.content) if request.content else {}
+            except (ValueError, UnicodeDecodeError):
+                body = {}
+            if not isinstance(body, dict) or "model" not in body:
+                return
+            api_key: str = request.headers.get("authorization", "").removeprefix("Bearer ")
+            # ~4 characters per token plus the requested completion budget
+            tokens: int = len(request.content) // 4 + int(
+                body.get("max_tokens") or body.get("max_completion_tokens") or 0
+            )
+            request.extensions["rate_limit_key"] = (api_key, body["model"])
+            await self.acquire(api_key, body["model"], tokens)
+
+        async def on_response(response: httpx.Response) -> None:
+            rate_limit_key = response.request.extensions.get("rate_limit_key")
+            if rate_limit_key is None:
+                return
+            api_key, model = rate_limit_key
+            self.on_response(api_key, model, response.status_code, parse_retry_after(response.headers))
+
+        return {"request": [on_request], "response": [on_response]}
+
+
+# Limiter shared by LLMResponse, openai_client() and the chatbot graph
+RATE_LIMITER: AsyncRateLimiter = AsyncRateLimiter()
@@ -0,0 +1,336 @@
+import asyncio
+import inspect
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Awaitable, Callable, TypeVar
+
+import httpx
+import openai
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry,
+    stop_after_attempt,
+    stop_after_delay,
+)
+
+from src import create_logger
+from src.utilities.rate_limit_utils import parse_retry_after
+
+logger = create_logger()
+
+R = TypeVar("R")
+
+# Status codes worth retrying: timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def _status_code(error: BaseException) -> int | None:
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Return True if ``error`` is transient and the request may succeed if retried.
+
+    Rate limits, server errors, timeouts and connection errors are retryable;
+    client errors (bad request, authentication, not found) and validation errors
+    are not.
+
+    Parameters
+    ----------
+    error : BaseException
+        The error raised by the request.
+
+    Returns
+    -------
+    bool
+        Whether the request should be retried.
+    """
+    if (status_code := _status_code(error)) is not None:
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    return isinstance(
+        error,
+        (openai.APIConnectionError, httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError),
+    )
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Return the wait in seconds requested by the ``Retry-After`` headers of ``error``."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not isinstance(headers, httpx.Headers):
+        return None
+    return parse_retry_after(headers)
+
+
+@dataclass
+class RetryBudget:
+    """Cap retries to a fraction of the requests so outages don't turn into retry storms.
+
+    Over a sliding window of ``window`` seconds, retries are allowed while they stay
+    below ``min_retries_per_second * window + ratio * requests``.
+
+    Parameters
+    ----------
+    ratio : float, optional
+        Retries allowed per request, by default 0.2.
+    min_retries_per_second : float, optional
+        Retries always allowed regardless of the traffic, by default 1.0.
+    window : float, optional
+        Length of the sliding window in seconds, by default 10.0.
+    """
+
+    ratio: float = 0.2
+    min_retries_per_second: float = 1.0
+    window: float = 10.0
+    _requests: deque[float] = field(default_factory=deque, init=False, repr=False)
+    _retries: deque[float] = field(default_factory=deque, init=False, repr=False)
+
+    def _prune(self, now: float) -> None:
+        cutoff: float = now - self.window
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] < cutoff:
+                timestamps.popleft()
+
+    def record_request(self) -> None:
+        """Record a first attempt."""
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Take a retry from the budget, returning False if it is exhausted."""
+        now: float = time.monotonic()
+        self._prune(now)
+        allowed: float = self.min_retries_per_second * self.window + self.ratio * len(self._requests)
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+# Budget shared by every retry policy of the process
+RETRY_BUDGET: RetryBudget = RetryBudget()
+
+
+@dataclass
+class RetryPolicy:
+    """Retry transient errors with exponential backoff and full jitter.
+
+    The wait before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]`` so concurrent callers don't
+    retry in lockstep, unless the error carries a longer ``Retry-After``.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name used in the logs, by default "default".
+    max_attempts : int, optional
+        Maximum number of attempts, first one included, by default 4.
+    base_delay : float, optional
+        Backoff base in seconds, by default 0.5.
+    max_delay : float, optional
+        Maximum wait between attempts in seconds, by default 30.0.
+    max_elapsed : float | None, optional
+        No retry starts after this many seconds since the first attempt. None means
+        no limit, by default 180.0.
+    retry_on : Callable[[BaseException], bool], optional
+        Classifies the errors worth retrying, by default ``is_retryable``.
+    budget : RetryBudget | None, optional
+        Budget retries are taken from. None disables the budget, by default
+        ``RETRY_BUDGET``.
+    """
+
+    name: str = "default"
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    max_elapsed: float | None = 180.0
+    retry_on: Callable[[BaseException], bool] = is_retryable
+    budget: RetryBudget | None = field(default_factory=lambda: RETRY_BUDGET)
+    # Attempts per outcome: success, retried, non_retryable, exhausted, budget_exhausted
+    stats: Counter[str] = field(default_factory=Counter, init=False)
+
+    def compute_delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """
+        Return the wait in seconds before the attempt following attempt ``attempt``.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of the failed attempt, starting at 1.
+        error : BaseException | None, optional
+            The error of the failed attempt, by default None.
+
+        Returns
+        -------
+        float
+            The jittered backoff, or the ``Retry-After`` of the error if longer.
+        """
+        backoff: float = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after: float | None = get_retry_after(error) if error is not None else None
+        return max(backoff, retry_after) if retry_after is not None else backoff
+
+    def should_retry(self, attempt: int, error: BaseException, elapsed: float = 0.0) -> bool:
+        """
+        Decide whether to retry after attempt ``attempt`` failed with ``error``.
+
+        Updates ``stats`` with the outcome of the attempt and takes a retry from
+        the budget when the answer is yes.
+        """
+        if not self.retry_on(error):
+            outcome: str = "non_retryable"
+        elif attempt >= self.max_attempts or (self.max_elapsed is not None and elapsed >= self.max_elapsed):
+            outcome = "exhausted"
+        elif self.budget is not None and not self.budget.try_acquire():
+            outcome = "budget_exhausted"
+        else:
+            self.stats["retried"] += 1
+            return True
+        self.stats[outcome] += 1
+        if outcome != "non_retryable":
+            logger.warning("%s: giving up after %d attempt(s) (%s): %s", self.name, attempt, outcome, error)
+        return False
+
+    async def run(
+        self,
+        func: Callable[..., Awaitable[R]],
+        *args: Any,
+        on_retry: Callable[[int, BaseException, float], None] | None = None,
+        **kwargs: Any,
+    ) -> R:
+        """
+        Await ``func(*args, **kwargs)``, retrying transient errors.
+
+        Parameters
+        ----------
+        func : Callable[..., Awaitable[R]]
+            The coroutine function to call.
+        *args : Any
+            Positional arguments of ``func``.
+        on_retry : Callable[[int, BaseException, float], None] | None, optional
+            Called with the failed attempt number, its error and the wait before the
+            next attempt, by default None.
+        **kwargs : Any
+            Keyword arguments of ``func``.
+
+        Returns
+        -------
+        R
+            The result of the first successful attempt.
+
+        Raises
+        ------
+        BaseException
+            The error of the last attempt when it is not retried.
+        """
+        if self.budget is not None:
+            self.budget.record_request()
+        start_time: float = time.monotonic()
+        attempt: int = 0
+        while True:
+            attempt += 1
+            try:
+                result: R = await func(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(attempt, e, time.monotonic() - start_time):
+                    raise
+                delay: float = self.compute_delay(attempt, e)
+                logger.info("%s: attempt %d failed (%s), retrying in %.2fs", self.name, attempt, e, delay)
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                await asyncio.sleep(delay)
+                continue
+            self.stats["success"] += 1
+            return result
+
+    def run_sync(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Call ``func(*args, **kwargs)``, retrying transient errors (blocking variant of ``run``)."""
+        if self.budget is not None:
+            self.budget.record_request()
+        start_time: float = time.monotonic()
+        attempt: int = 0
+        while True:
+            attempt += 1
+            try:
+                result: R = func(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(attempt, e, time.monotonic() - start_time):
+                    raise
+                delay: float = self.compute_delay(attempt, e)
+                logger.info("%s: attempt %d failed (%s), retrying in %.2fs", self.name, attempt, e, delay)
+                time.sleep(delay)
+                continue
+            self.stats["success"] += 1
+            return result
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Decorate a sync or async function so its calls are retried with this policy."""
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.run(func, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return self.run_sync(func, *args, **kwargs)
+
+        return wrapper
+
+    def _tenacity_kwargs(self) -> dict[str, Any]:
+        """Build the tenacity arguments implementing the policy."""
+
+        def should_retry(retry_state: RetryCallState) -> bool:
+            error = retry_state.outcome.exception() if retry_state.outcome else None  # type: ignore
+            if error is None:
+                self.stats["success"] += 1
+                return False
+            return self.should_retry(
+                retry_state.attempt_number, error, retry_state.seconds_since_start or 0.0
+            )
+
+        def wait(retry_state: RetryCallState) -> float:
+            error = retry_state.outcome.exception() if retry_state.outcome else None  # type: ignore
+            return self.compute_delay(retry_state.attempt_number, error)
+
+        stop = stop_after_attempt(self.max_attempts)
+        if self.max_elapsed is not None:
+            stop = stop | stop_after_delay(self.max_elapsed)  # type: ignore
+        return {
+            "retry": should_retry,
+            "wait": wait,
+            "stop": stop,
+            "before_sleep": lambda retry_state: logger.info(
+                "%s: attempt %d failed (%s), retrying",
+                self.name,
+                retry_state.attempt_number,
+                retry_state.outcome.exception() if retry_state.outcome else None,
+            ),
+            "reraise": True,
+        }
+
+    def async_retrying(self) -> AsyncRetrying:
+        """Return a tenacity ``AsyncRetrying`` implementing the policy."""
+        return AsyncRetrying(**self._tenacity_kwargs())
+
+    def retrying(self) -> Callable[..., Any]:
+        """Return a tenacity ``retry`` decorator implementing the policy."""
+        return retry(**self._tenacity_kwargs())
+
+
+# Policy used by LLMResponse and the retry helpers in `src.utilities.utilities`
+DEFAULT_RETRY_POLICY: RetryPolicy = RetryPolicy(name="llm")
+
+
+def get_retry_stats(*policies: RetryPolicy) -> dict[str, dict[str, int]]:
+    """Return the attempts per outcome of ``policies`` (by default ``DEFAULT_RETRY_POLICY``)."""
+    return {policy.name: dict(policy.stats) for policy in policies or (DEFAULT_RETRY_POLICY,)}
@@ -0,0 +1,96 @@
+"""Stream structured extraction over a JSONL file.
+
+Usage
+-----
+python -m src.utilities.stream_extract input.jsonl output.jsonl \
+    --response-model src.schemas:GeneralResponse \
+    --model openai/gpt-4o-mini
+"""
+
+import argparse
+import asyncio
+import importlib
+from typing import Type
+
+from pydantic import BaseModel
+
+from src import create_logger
+from src.schemas import ModelEnum
+from src.settings import refresh_settings
+from src.utilities.llm_utils import LLMResponse
+
+logger = create_logger()
+
+
+def load_response_model(path: str) -> Type[BaseModel]:
+    """
+    Import a Pydantic model from a ``"package.module:ClassName"`` path.
+
+    Parameters
+    ----------
+    path : str
+        Import path of the model class.
+
+    Returns
+    -------
+    Type[BaseModel]
+        The imported model class.
+    """
+    module_name, _, class_name = path.partition(":")
+    if not class_name:
+        raise ValueError(f"Expected 'package.module:ClassName', got {path!r}")
+    response_model = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(response_model, type) and issubclass(response_model, BaseModel)):
+        raise TypeError(f"{path!r} is not a Pydantic model")
+    return response_model
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Stream structured extraction over a JSONL file.")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output JSONL file")
+    parser.add_argument(
+        "--response-model", required=True, help="Pydantic model as 'package.module:ClassName'"
+    )
+    parser.add_argument("--model", default=ModelEnum.GPT_4_o_MINI_REMOTE.value, help="Model name")
+    parser.add_argument("--text-key", default="text", help="Key of the message in object lines")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Maximum pending requests")
+    parser.add_argument("--use-vllm", action="store_true", help="Use vLLM guided decoding")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any existing checkpoint")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the streaming extraction described by ``args``."""
+    settings = refresh_settings()
+    response_model = load_response_model(args.response_model)
+
+    processed, failed = 0, 0
+    async with LLMResponse(
+        api_key=settings.require("OPENROUTER_API_KEY"),
+        base_url=settings.OPENROUTER_URL,
+        model=args.model,
+        use_vllm=args.use_vllm,
+    ) as llm:
+        async for record in llm.stream_structured(
+            args.input,
+            response_model,
+            output_path=args.output,
+            text_key=args.text_key,
+            max_in_flight=args.max_in_flight,
+            resume=not args.no_resume,
+        ):
+            processed += 1
+            failed += record["status"] == "error"
+
+    logger.info("Processed %d lines (%d failed) into %s", processed, failed, args.output)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the streaming extraction CLI."""
+    asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
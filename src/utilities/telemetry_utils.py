@@ -0,0 +1,580 @@
+import contextvars
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from src import create_logger
+from src.schemas import MODEL_PRICES, ModelEnum
+
+logger = create_logger()
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, math.inf)
+
+
+def compute_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """
+    Compute the cost in $ of a call from the ``MODEL_PRICES`` of the model.
+
+    Parameters
+    ----------
+    model : str
+        The model name (a ``ModelEnum`` value, optionally prefixed by the provider).
+    prompt_tokens : int
+        Number of prompt tokens.
+    completion_tokens : int
+        Number of completion tokens.
+
+    Returns
+    -------
+    float | None
+        The cost in $, or None if the model has no known price.
+    """
+    model_name: str = model.split(":", 1)[1] if model.startswith(("openai:", "ollama:")) else model
+    try:
+        price: float = MODEL_PRICES[ModelEnum(model_name)]
+    except (KeyError, ValueError):
+        return None
+    return (prompt_tokens + completion_tokens) * price / 1_000_000
+
+
+@dataclass
+class CallRecord:
+    """Telemetry of a single LLM call.
+
+    Parameters
+    ----------
+    model : str
+        The model called.
+    source : str
+        The caller, e.g. "llm_response", "chatbot" or "instructor".
+    latency : float
+        Wall-clock duration of the call in seconds.
+    prompt_tokens : int, optional
+        Prompt tokens reported by the API, by default 0.
+    completion_tokens : int, optional
+        Completion tokens reported by the API, by default 0.
+    cost : float | None, optional
+        Cost in $. None computes it from ``MODEL_PRICES`` (and stays None for
+        unknown models), by default None.
+    ttft : float | None, optional
+        Time to first token in seconds of streamed calls, by default None.
+    retries : int, optional
+        Number of HTTP retries performed by the client, by default 0.
+    cache_hit : bool, optional
+        Whether the response was served from a cache, by default False.
+    error : str | None, optional
+        The error of a failed call, by default None.
+    """
+
+    model: str
+    source: str
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float | None = None
+    ttft: float | None = None
+    retries: int = 0
+    cache_hit: bool = False
+    error: str | None = None
+    timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self) -> None:
+        if self.cost is None and not self.cache_hit and self.error is None:
+            self.cost = compute_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_response(
+        cls, raw_response: Any, model: str, source: str, latency: float, **kwargs: Any
+    ) -> "CallRecord":
+        """Build a record from an OpenAI ``ChatCompletion`` and its ``usage``."""
+        usage = getattr(raw_response, "usage", None)
+        return cls(
+            model=model,
+            source=source,
+            latency=latency,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            **kwargs,
+        )
+
+
+@dataclass
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds (Prometheus semantics).
+
+    Parameters
+    ----------
+    buckets : tuple[float, ...], optional
+        Sorted upper bounds of the buckets, ending with ``math.inf``,
+        by default ``LATENCY_BUCKETS``.
+    """
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(init=False)
+    sum: float = field(default=0.0, init=False)
+    count: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Add ``value`` to the histogram."""
+        self.sum += value
+        self.count += 1
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                return
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the ``q`` quantile by linear interpolation inside its bucket."""
+        if self.count == 0:
+            return None
+        rank: float = q * self.count
+        cumulative: int = 0
+        lower: float = 0.0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return lower
+
+
+@dataclass
+class CallStats:
+    """Aggregated telemetry of the calls of one source to one model."""
+
+    calls: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+    ttft: Histogram = field(default_factory=Histogram)
+
+    def add(self, record: CallRecord) -> None:
+        self.calls += 1
+        self.errors += record.error is not None
+        self.cache_hits += record.cache_hit
+        self.retries += record.retries
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost += record.cost or 0.0
+        self.latency.observe(record.latency)
+        if record.ttft is not None:
+            self.ttft.observe(record.ttft)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 6),
+            "latency_p50": self.latency.quantile(0.5),
+            "latency_p95": self.latency.quantile(0.95),
+            "ttft_p50": self.ttft.quantile(0.5),
+            "ttft_p95": self.ttft.quantile(0.95),
+        }
+
+
+@dataclass
+class TelemetryExporter:
+    """Base class of the telemetry exporters.
+
+    ``export`` receives every record as it is made; ``flush`` receives the
+    aggregated statistics and the current gauges (e.g. circuit breaker states), at
+    most every ``flush_interval`` seconds.
+
+    Parameters
+    ----------
+    flush_interval : float | None, optional
+        Seconds between automatic flushes. None only flushes on
+        ``Telemetry.flush``, by default None.
+    """
+
+    flush_interval: float | None = None
+    _last_flush: float = field(default=0.0, init=False, repr=False)
+
+    def export(self, record: CallRecord) -> None:
+        pass
+
+    def flush(
+        self, stats: dict[tuple[str, str], CallStats], gauges: dict[str, dict[str, float]] | None = None
+    ) -> None:
+        pass
+
+    def flush_due(self) -> bool:
+        return self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval
+
+
+@dataclass
+class InMemoryExporter(TelemetryExporter):
+    """Keep the most recent call records in memory.
+
+    Parameters
+    ----------
+    maxlen : int, optional
+        Maximum number of records kept, by default 10_000.
+    """
+
+    maxlen: int = 10_000
+    records: deque[CallRecord] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.records = deque(maxlen=self.maxlen)
+
+    def export(self, record: CallRecord) -> None:
+        self.records.append(record)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+@dataclass
+class PrometheusTextFileExporter(TelemetryExporter):
+    """Write the aggregated telemetry in the Prometheus text format.
+
+    The file is meant for the node exporter textfile collector and is replaced
+    atomically on every flush.
+
+    Parameters
+    ----------
+    path : str | Path, optional
+        Path of the metrics file, by default ".cache/llm_metrics.prom".
+    flush_interval : float | None, optional
+        Seconds between automatic flushes, by default 15.0.
+    """
+
+    path: str | Path = ".cache/llm_metrics.prom"
+    flush_interval: float | None = 15.0
+
+    def flush(
+        self, stats: dict[tuple[str, str], CallStats], gauges: dict[str, dict[str, float]] | None = None
+    ) -> None:
+        self._last_flush = time.monotonic()
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(self.render(stats, gauges), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def render(
+        stats: dict[tuple[str, str], CallStats], gauges: dict[str, dict[str, float]] | None = None
+    ) -> str:
+        """Render ``stats`` and ``gauges`` in the Prometheus text exposition format."""
+        counters: list[tuple[str, str, Callable[[CallStats], float]]] = [
+            ("llm_requests_total", "LLM calls.", lambda s: s.calls),
+            ("llm_request_errors_total", "Failed LLM calls.", lambda s: s.errors),
+            ("llm_cache_hits_total", "LLM calls served from a cache.", lambda s: s.cache_hits),
+            ("llm_retries_total", "HTTP retries of LLM calls.", lambda s: s.retries),
+            ("llm_prompt_tokens_total", "Prompt tokens.", lambda s: s.prompt_tokens),
+            ("llm_completion_tokens_total", "Completion tokens.", lambda s: s.completion_tokens),
+            ("llm_cost_dollars_total", "Cost of LLM calls in dollars.", lambda s: s.cost),
+        ]
+        lines: list[str] = []
+        for name, help_text, value in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (source, model), call_stats in stats.items():
+                labels = f'source="{_escape_label(source)}",model="{_escape_label(model)}"'
+                lines.append(f"{name}{{{labels}}} {value(call_stats)}")
+
+        histograms: list[tuple[str, str, Callable[[CallStats], Histogram]]] = [
+            ("llm_request_latency_seconds", "Latency of LLM calls.", lambda s: s.latency),
+            ("llm_time_to_first_token_seconds", "Time to first token of streamed calls.", lambda s: s.ttft),
+        ]
+        for name, help_text, get_histogram in histograms:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (source, model), call_stats in stats.items():
+                histogram: Histogram = get_histogram(call_stats)
+                labels = f'source="{_escape_label(source)}",model="{_escape_label(model)}"'
+                cumulative: int = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        for gauge_name, values in (gauges or {}).items():
+            name = f"llm_{gauge_name}"
+            lines += [f"# HELP {name} {gauge_name.replace('_', ' ').capitalize()}.", f"# TYPE {name} gauge"]
+            for key, value in values.items():
+                lines.append(f'{name}{{key="{_escape_label(key)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class OpenTelemetryExporter(TelemetryExporter):
+    """Report every call to OpenTelemetry metric instruments.
+
+    Requires ``opentelemetry-api``; the configured ``MeterProvider`` (e.g. an OTLP
+    exporter from ``opentelemetry-sdk``) handles aggregation and export.
+
+    Parameters
+    ----------
+    meter_name : str, optional
+        Name of the OpenTelemetry meter, by default "src.llm".
+    """
+
+    meter_name: str = "src.llm"
+    _instruments: dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryExporter requires `opentelemetry-api`: pip install opentelemetry-api"
+            ) from e
+        meter = metrics.get_meter(self.meter_name)
+        self._instruments = {
+            "calls": meter.create_counter("llm.requests", description="LLM calls"),
+            "errors": meter.create_counter("llm.request.errors", description="Failed LLM calls"),
+            "tokens": meter.create_counter("llm.tokens", unit="{token}", description="Tokens"),
+            "cost": meter.create_counter("llm.cost", unit="USD", description="Cost of LLM calls"),
+            "latency": meter.create_histogram("llm.request.duration", unit="s"),
+            "ttft": meter.create_histogram("llm.time_to_first_token", unit="s"),
+        }
+
+    def export(self, record: CallRecord) -> None:
+        attributes: dict[str, Any] = {
+            "model": record.model,
+            "source": record.source,
+            "cache_hit": record.cache_hit,
+        }
+        self._instruments["calls"].add(1, attributes)
+        if record.error is not None:
+            self._instruments["errors"].add(1, attributes)
+        self._instruments["tokens"].add(record.prompt_tokens, {**attributes, "type": "prompt"})
+        self._instruments["tokens"].add(record.completion_tokens, {**attributes, "type": "completion"})
+        self._instruments["cost"].add(record.cost or 0.0, attributes)
+        self._instruments["latency"].record(record.latency, attributes)
+        if record.ttft is not None:
+            self._instruments["ttft"].record(record.ttft, attributes)
+
+
+@dataclass
+class RetryCounter:
+    """Number of HTTP retries observed for the current call."""
+
+    retries: int = 0
+
+
+_RETRY_COUNTER: contextvars.ContextVar[RetryCounter | None] = contextvars.ContextVar(
+    "retry_counter", default=None
+)
+
+
+@contextmanager
+def track_retries() -> Iterator[RetryCounter]:
+    """
+    Count the HTTP retries of the requests made inside the block.
+
+    The count is read from the ``x-stainless-retry-count`` header the OpenAI client
+    sets on every attempt, by the hooks of ``telemetry_event_hooks``.
+
+    Yields
+    ------
+    RetryCounter
+        The counter of the block.
+    """
+    counter = RetryCounter()
+    token = _RETRY_COUNTER.set(counter)
+    try:
+        yield counter
+    finally:
+        _RETRY_COUNTER.reset(token)
+
+
+def telemetry_event_hooks() -> dict[str, list[Callable[..., Any]]]:
+    """
+    Build httpx event hooks feeding the retry counter of ``track_retries``.
+
+    Returns
+    -------
+    dict[str, list[Callable[..., Any]]]
+        The ``request`` hook.
+    """
+
+    async def on_request(request: httpx.Request) -> None:
+        counter: RetryCounter | None = _RETRY_COUNTER.get()
+        if counter is None:
+            return
+        try:
+            counter.retries = max(counter.retries, int(request.headers.get("x-stainless-retry-count", 0)))
+        except ValueError:
+            pass
+
+    return {"request": [on_request]}
+
+
+def merge_event_hooks(*hooks: dict[str, list[Callable[..., Any]]]) -> dict[str, list[Callable[..., Any]]]:
+    """Combine several httpx event hook mappings into one."""
+    merged: dict[str, list[Callable[..., Any]]] = {"request": [], "response": []}
+    for hook in hooks:
+        for event, callbacks in hook.items():
+            merged[event].extend(callbacks)
+    return merged
+
+
+@dataclass
+class Telemetry:
+    """Collect per-call records, aggregate them per source and model, and export them.
+
+    Parameters
+    ----------
+    exporters : list[TelemetryExporter], optional
+        The exporters records are sent to, by default [].
+    enabled : bool, optional
+        Whether records are collected, by default True.
+    """
+
+    exporters: list[TelemetryExporter] = field(default_factory=list)
+    enabled: bool = True
+    _stats: dict[tuple[str, str], CallStats] = field(default_factory=dict, init=False, repr=False)
+    _gauges: dict[str, Callable[[], dict[str, float]]] = field(default_factory=dict, init=False, repr=False)
+
+    def add_gauge(self, name: str, read: Callable[[], dict[str, float]]) -> None:
+        """
+        Register a gauge read on every flush and snapshot.
+
+        Parameters
+        ----------
+        name : str
+            Name of the gauge, e.g. "circuit_state".
+        read : Callable[[], dict[str, float]]
+            Returns the current values keyed by label, e.g. by endpoint.
+        """
+        self._gauges[name] = read
+
+    def read_gauges(self) -> dict[str, dict[str, float]]:
+        """Return the current values of every registered gauge."""
+        return {name: read() for name, read in self._gauges.items()}
+
+    def add_exporter(self, exporter: TelemetryExporter) -> TelemetryExporter:
+        """Register ``exporter`` and return it."""
+        self.exporters.append(exporter)
+        return exporter
+
+    def record(self, record: CallRecord) -> None:
+        """Aggregate ``record`` and send it to the exporters."""
+        if not self.enabled:
+            return
+        key = (record.source, record.model)
+        call_stats = self._stats.get(key)
+        if call_stats is None:
+            call_stats = self._stats[key] = CallStats()
+        call_stats.add(record)
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+                if exporter.flush_due():
+                    exporter.flush(self._stats, self.read_gauges())
+            except Exception as e:  # telemetry must never break a call
+                logger.warning("Telemetry exporter %s failed: %s", type(exporter).__name__, e)
+
+    def flush(self) -> None:
+        """Flush the aggregated statistics to every exporter."""
+        gauges: dict[str, dict[str, float]] = self.read_gauges()
+        for exporter in self.exporters:
+            exporter.flush(self._stats, gauges)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Return the aggregated statistics.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            Call, error, cache hit, retry and token counts, cost, and p50/p95 latency
+            and time to first token, keyed by ``"<source>:<model>"``, and the gauges
+            under ``"gauges"`` when any is registered.
+        """
+        snapshot: dict[str, dict[str, Any]] = {
+            f"{source}:{model}": stats.summary() for (source, model), stats in self._stats.items()
+        }
+        if self._gauges:
+            snapshot["gauges"] = self.read_gauges()
+        return snapshot
+
+    def reset(self) -> None:
+        """Drop the aggregated statistics."""
+        self._stats.clear()
+
+
+def instrument_instructor(client: Any, telemetry: "Telemetry | None" = None, source: str = "instructor") -> Any:
+    """
+    Record a ``CallRecord`` for every completion made by an instructor client.
+
+    Parameters
+    ----------
+    client : instructor.AsyncInstructor
+        The instructor client.
+    telemetry : Telemetry | None, optional
+        Where records go, by default ``TELEMETRY``.
+    source : str, optional
+        The source of the records, by default "instructor".
+
+    Returns
+    -------
+    instructor.AsyncInstructor
+        The same client, with the hooks registered.
+    """
+    telemetry = telemetry or TELEMETRY
+    # Start time and model of the attempt in flight in the current task
+    attempt: contextvars.ContextVar[tuple[float, str] | None] = contextvars.ContextVar(
+        "instructor_attempt", default=None
+    )
+
+    def on_kwargs(*args: Any, **kwargs: Any) -> None:
+        attempt.set((time.perf_counter(), kwargs.get("model", "unknown")))
+
+    def on_response(response: Any) -> None:
+        if (started := attempt.get()) is None:
+            return
+        start_time, model = started
+        telemetry.record(
+            CallRecord.from_response(response, model, source, time.perf_counter() - start_time)
+        )
+
+    def on_error(error: Exception) -> None:
+        if (started := attempt.get()) is None:
+            return
+        start_time, model = started
+        telemetry.record(
+            CallRecord(model=model, source=source, latency=time.perf_counter() - start_time, error=str(error))
+        )
+
+    client.on("completion:kwargs", on_kwargs)
+    client.on("completion:response", on_response)
+    client.on("completion:error", on_error)
+    return client
+
+
+# Telemetry shared by LLMResponse, openai_client() and the chatbot graph
+TELEMETRY: Telemetry = Telemetry()
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from src import create_logger
+from src.schemas import MODEL_CONTEXT_WINDOWS, ModelEnum
+
+logger = create_logger()
+
+# Used when the model is unknown or the configuration sets no budget
+DEFAULT_CONTEXT_BUDGET: int = 16_000
+# Tokens kept free in the context window for the completion
+COMPLETION_RESERVE: int = 4_096
+# Per-message overhead of the chat format (role, separators)
+TOKENS_PER_MESSAGE: int = 3
+
+
+def get_context_budget(model: str, max_context_tokens: int | None = None) -> int:
+    """
+    Return the prompt token budget for ``model``.
+
+    Parameters
+    ----------
+    model : str
+        The model name (a ``ModelEnum`` value, optionally prefixed by the provider).
+    max_context_tokens : int | None, optional
+        Configured budget. None uses ``DEFAULT_CONTEXT_BUDGET``, by default None.
+
+    Returns
+    -------
+    int
+        The configured budget, capped by the model's context window minus
+        ``COMPLETION_RESERVE``.
+    """
+    budget: int = max_context_tokens or DEFAULT_CONTEXT_BUDGET
+    model_name: str = model.split(":", 1)[1] if model.startswith(("openai:", "ollama:")) else model
+    try:
+        context_window: int = MODEL_CONTEXT_WINDOWS[ModelEnum(model_name)]
+    except (KeyError, ValueError):
+        return budget
+    return min(budget, context_window - COMPLETION_RESERVE)
+
+
+def _message_text(message: AnyMessage) -> str:
+    """Return the text of a message, including multimodal text parts and tool calls."""
+    content: Any = message.content
+    if isinstance(content, str):
+        text: str = content
+    else:
+        text = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    if isinstance(message, AIMessage) and message.tool_calls:
+        text += " ".join(f"{call['name']} {call['args']}" for call in message.tool_calls)
+    return text
+
+
+@dataclass
+class TokenCounter:
+    """Count message tokens with a local tokenizer, caching counts per message id.
+
+    Uses ``tiktoken`` when it is installed and its encoding can be loaded, and
+    falls back to langchain's character-based approximation otherwise.
+
+    Parameters
+    ----------
+    encoding_name : str, optional
+        The ``tiktoken`` encoding, by default "o200k_base".
+    maxsize : int, optional
+        Maximum number of cached message counts, by default 10_000.
+    """
+
+    encoding_name: str = "o200k_base"
+    maxsize: int = 10_000
+    _encoding: Any = field(default=None, init=False, repr=False)
+    _encoding_loaded: bool = field(default=False, init=False, repr=False)
+    _cache: OrderedDict[str, int] = field(default_factory=OrderedDict, init=False, repr=False)
+
+    def _get_encoding(self) -> Any:
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:  # tiktoken is optional and may need to download the encoding
+                logger.warning("Falling back to approximate token counts: %s", e)
+        return self._encoding
+
+    def count_text(self, text: str) -> int:
+        """Count the tokens of ``text``."""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return count_tokens_approximately([HumanMessage(content=text)]) - TOKENS_PER_MESSAGE
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_message(self, message: AnyMessage) -> int:
+        """Count the tokens of ``message``, using the cached count when it has an id."""
+        if message.id is not None and (count := self._cache.get(message.id)) is not None:
+            self._cache.move_to_end(message.id)
+            return count
+        count = self.count_text(_message_text(message)) + TOKENS_PER_MESSAGE
+        if message.id is not None:
+            self._cache[message.id] = count
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return count
+
+    def count_messages(self, messages: list[AnyMessage]) -> int:
+        """Count the tokens of ``messages``."""
+        return sum(self.count_message(message) for message in messages)
+
+
+@dataclass
+class TrimResult:
+    """Messages kept after trimming and the token counts.
+
+    Parameters
+    ----------
+    messages : list[AnyMessage]
+        The most recent messages fitting the budget.
+    tokens_sent : int
+        Tokens of the kept messages.
+    tokens_saved : int
+        Tokens of the dropped messages.
+    """
+
+    messages: list[AnyMessage]
+    tokens_sent: int
+    tokens_saved: int
+
+
+def trim_messages_to_budget(
+    messages: list[AnyMessage], budget: int, counter: TokenCounter
+) -> TrimResult:
+    """
+    Keep the most recent messages that fit in ``budget`` tokens.
+
+    The kept history always starts on a user message so the model never sees an
+    orphaned assistant reply or tool result. The latest user message is kept even
+    if it alone exceeds the budget.
+
+    Parameters
+    ----------
+    messages : list[AnyMessage]
+        The conversation, oldest first.
+    budget : int
+        Maximum number of tokens of the kept messages.
+    counter : TokenCounter
+        The token counter.
+
+    Returns
+    -------
+    TrimResult
+        The kept messages with the sent and saved token counts.
+    """
+    counts: list[int] = [counter.count_message(message) for message in messages]
+    total: int = sum(counts)
+    if total <= budget:
+        return TrimResult(messages=messages, tokens_sent=total, tokens_saved=0)
+
+    start: int = len(messages)
+    kept_tokens: int = 0
+    while start > 0 and kept_tokens + counts[start - 1] <= budget:
+        start -= 1
+        kept_tokens += counts[start]
+
+    # Start on a user message, never on an assistant reply or a tool result
+    while start < len(messages) and not isinstance(messages[start], HumanMessage):
+        start += 1
+    if start == len(messages):
+        # Nothing fits: keep the conversation from the latest user message
+        start = next(
+            (idx for idx in range(len(messages) - 1, -1, -1) if isinstance(messages[idx], HumanMessage)),
+            len(messages) - 1,
+        )
+
+    tokens_sent: int = sum(counts[start:])
+    return TrimResult(messages=messages[start:], tokens_sent=tokens_sent, tokens_saved=total - tokens_sent)
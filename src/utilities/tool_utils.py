@@ -0,0 +1,501 @@
+import asyncio
+import importlib
+import inspect
+import json
+import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Iterable, Iterator, Literal
+
+from langchain_core.messages import ToolMessage
+from pydantic import create_model
+
+from src import create_logger
+from src.utilities.cache_utils import InMemoryLRUCache, make_cache_key
+from src.utilities.utilities import Tool
+
+logger = create_logger()
+
+
+@dataclass
+class ToolCall:
+    """A tool call requested by the model.
+
+    Parameters
+    ----------
+    id : str
+        The id of the tool call, echoed back in the tool message.
+    name : str
+        The name of the tool.
+    args : dict[str, Any]
+        The keyword arguments of the tool.
+    """
+
+    id: str
+    name: str
+    args: dict[str, Any]
+
+    @classmethod
+    def from_any(cls, tool_call: Any) -> "ToolCall":
+        """
+        Normalize a LangChain or OpenAI tool call.
+
+        Parameters
+        ----------
+        tool_call : Any
+            A ``ToolCall``, a LangChain tool call dict (``{"name", "args", "id"}``), or
+            an OpenAI tool call (dict or object with ``function.name`` and JSON
+            ``function.arguments``).
+
+        Returns
+        -------
+        ToolCall
+            The normalized tool call.
+        """
+        if isinstance(tool_call, ToolCall):
+            return tool_call
+        if not isinstance(tool_call, dict):
+            tool_call = tool_call.model_dump() if hasattr(tool_call, "model_dump") else vars(tool_call)
+        if "function" in tool_call:
+            function: dict[str, Any] = tool_call["function"]
+            arguments: Any = function.get("arguments") or {}
+            args: dict[str, Any] = json.loads(arguments) if isinstance(arguments, str) else arguments
+            return cls(id=tool_call.get("id") or "", name=function["name"], args=args)
+        return cls(id=tool_call.get("id") or "", name=tool_call["name"], args=tool_call.get("args") or {})
+
+
+@dataclass
+class ToolResult:
+    """The outcome of a tool call.
+
+    Parameters
+    ----------
+    tool_call_id : str
+        The id of the tool call.
+    name : str
+        The name of the tool.
+    content : str
+        The serialized result, or the error message.
+    status : Literal["success", "error"]
+        Whether the tool succeeded.
+    duration : float
+        Seconds the call took.
+    """
+
+    tool_call_id: str
+    name: str
+    content: str
+    status: Literal["success", "error"]
+    duration: float
+
+    def to_message(self) -> ToolMessage:
+        """Return the result as a LangChain ``ToolMessage``."""
+        return ToolMessage(
+            content=self.content, tool_call_id=self.tool_call_id, name=self.name, status=self.status
+        )
+
+    def to_openai_message(self) -> dict[str, str]:
+        """Return the result as an OpenAI ``tool`` message."""
+        return {"role": "tool", "tool_call_id": self.tool_call_id, "content": self.content}
+
+
+def _describe_tool_call(tool_call: Any) -> tuple[str, str]:
+    """Return the id and tool name of a tool call that could not be parsed, as far as known."""
+    def get(obj: Any, key: str) -> Any:
+        return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+    function: Any = get(tool_call, "function")
+    name: Any = get(function, "name") if function is not None else get(tool_call, "name")
+    return (str(get(tool_call, "id") or ""), str(name or ""))
+
+
+def _serialize_result(result: Any) -> str:
+    if isinstance(result, str):
+        return result
+    try:
+        return json.dumps(result, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return str(result)
+
+
+def _run_tool_in_process(module: str, name: str, args: dict[str, Any]) -> Any:
+    """Look the tool up by module and name in the worker process and call its function.
+
+    ``@tool`` replaces the module attribute with the ``Tool``, so the function itself
+    cannot be pickled by reference; the ``Tool`` is imported again instead.
+    """
+    target: Any = importlib.import_module(module)
+    for attr in name.split("."):
+        target = getattr(target, attr)
+    func = target.func if isinstance(target, Tool) else target
+    return func(**args)
+
+
+def _process_target(tool: Tool) -> tuple[str, str] | None:
+    """Return the module and qualified name importing ``tool`` in another process, if any."""
+    module: str | None = getattr(tool.func, "__module__", None)
+    qualname: str = getattr(tool.func, "__qualname__", "")
+    if not module or module == "__main__" or "<" in qualname:
+        return None
+    try:
+        target: Any = importlib.import_module(module)
+        for attr in qualname.split("."):
+            target = getattr(target, attr)
+    except (ImportError, AttributeError):
+        return None
+    return (module, qualname) if target is tool or target is tool.func else None
+
+
+_SECTION_PATTERN: re.Pattern[str] = re.compile(
+    r"^\s*(Parameters|Returns|Raises|Yields|Examples|Notes)\s*\n\s*-{3,}", re.M
+)
+_PARAM_PATTERN: re.Pattern[str] = re.compile(r"^(\w+)\s*:.*$")
+
+
+def _parse_docstring(docstring: str) -> tuple[str, dict[str, str]]:
+    """Split a numpy-style docstring into its summary and parameter descriptions."""
+    docstring = inspect.cleandoc(docstring)
+    sections = _SECTION_PATTERN.split(docstring)
+    summary: str = sections[0].strip()
+    descriptions: dict[str, str] = {}
+    for title, body in zip(sections[1::2], sections[2::2]):
+        if title != "Parameters":
+            continue
+        name: str | None = None
+        for line in body.splitlines():
+            if (match := _PARAM_PATTERN.match(line)) is not None:
+                name = match.group(1)
+                descriptions[name] = ""
+            elif name is not None and line.strip():
+                descriptions[name] = f"{descriptions[name]} {line.strip()}".strip()
+    return summary, descriptions
+
+
+def build_tool_schema(tool: Tool) -> dict[str, Any]:
+    """
+    Build the OpenAI function-calling schema of a tool.
+
+    The parameters come from the signature of the tool function (types through
+    pydantic), the descriptions from its numpy-style docstring.
+
+    Parameters
+    ----------
+    tool : Tool
+        The tool.
+
+    Returns
+    -------
+    dict[str, Any]
+        The ``{"type": "function", "function": {...}}`` tool definition.
+    """
+    summary, descriptions = _parse_docstring(tool.description)
+    fields: dict[str, Any] = {}
+    for param in inspect.signature(tool.func).parameters.values():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        annotation: Any = Any if param.annotation is inspect.Parameter.empty else param.annotation
+        default: Any = ... if param.default is inspect.Parameter.empty else param.default
+        fields[param.name] = (annotation, default)
+    parameters: dict[str, Any] = create_model(f"{tool.name}_arguments", **fields).model_json_schema()
+    parameters.pop("title", None)
+    for name, prop in parameters.get("properties", {}).items():
+        prop.pop("title", None)
+        if descriptions.get(name):
+            prop["description"] = descriptions[name]
+    return {
+        "type": "function",
+        "function": {"name": tool.name, "description": summary, "parameters": parameters},
+    }
+
+
+@dataclass
+class ToolRegistry:
+    """Tools by name with their cached schemas and optional result memoization.
+
+    Parameters
+    ----------
+    tools : Iterable[Tool], optional
+        Tools registered without memoization, by default ().
+    """
+
+    tools: Iterable[Tool] = ()
+    _tools: dict[str, Tool] = field(default_factory=dict, init=False, repr=False)
+    _schemas: dict[str, dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+    _caches: dict[str, InMemoryLRUCache] = field(default_factory=dict, init=False, repr=False)
+    _openai_tools: list[dict[str, Any]] | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        for tool in self.tools:
+            self.register(tool)
+
+    def register(
+        self, tool: Tool, memoize: bool = False, maxsize: int = 256, ttl: float | None = 3600
+    ) -> Tool:
+        """
+        Register a tool, building its schema once.
+
+        Parameters
+        ----------
+        tool : Tool
+            The tool.
+        memoize : bool, optional
+            Whether to cache the results by arguments. Only for idempotent tools,
+            e.g. search lookups, by default False.
+        maxsize : int, optional
+            Maximum number of cached results, by default 256.
+        ttl : float | None, optional
+            Seconds a cached result stays valid, by default 3600.
+
+        Returns
+        -------
+        Tool
+            The registered tool.
+        """
+        self._tools[tool.name] = tool
+        self._schemas[tool.name] = build_tool_schema(tool)
+        if memoize:
+            self._caches[tool.name] = InMemoryLRUCache(maxsize=maxsize, ttl=ttl)
+        else:
+            self._caches.pop(tool.name, None)
+        self._openai_tools = None
+        return tool
+
+    def get(self, name: str) -> Tool | None:
+        """Return the tool called ``name``, or None if it is not registered."""
+        return self._tools.get(name)
+
+    def schema(self, name: str) -> dict[str, Any]:
+        """Return the cached OpenAI schema of the tool called ``name``."""
+        return self._schemas[name]
+
+    def openai_tools(self) -> list[dict[str, Any]]:
+        """Return the cached ``tools`` argument of a chat completion request."""
+        if self._openai_tools is None:
+            self._openai_tools = list(self._schemas.values())
+        return self._openai_tools
+
+    def cached_result(self, name: str, args: dict[str, Any]) -> tuple[bool, Any]:
+        """Return ``(True, result)`` if the result of the call is memoized, ``(False, None)`` otherwise."""
+        cache = self._caches.get(name)
+        if cache is None:
+            return (False, None)
+        result: Any = cache.get(make_cache_key(args))
+        return (result is not None, result)
+
+    def store_result(self, name: str, args: dict[str, Any], result: Any) -> None:
+        """Memoize the result of a call if the tool is memoized."""
+        if (cache := self._caches.get(name)) is not None and result is not None:
+            cache.set(make_cache_key(args), result)
+
+    def call(self, name: str, args: dict[str, Any]) -> Any:
+        """
+        Call a sync tool by name, serving memoized results from the cache.
+
+        Raises
+        ------
+        KeyError
+            If no tool is registered under ``name``.
+        """
+        hit, result = self.cached_result(name, args)
+        if hit:
+            return result
+        result = self._tools[name].func(**args)
+        self.store_result(name, args, result)
+        return result
+
+    async def acall(self, name: str, args: dict[str, Any]) -> Any:
+        """Call a tool by name (see ``call``), running sync tools in a worker thread."""
+        hit, result = self.cached_result(name, args)
+        if hit:
+            return result
+        tool: Tool = self._tools[name]
+        result = await tool.func(**args) if tool.is_async else await asyncio.to_thread(tool.func, **args)
+        self.store_result(name, args, result)
+        return result
+
+    def cache_stats(self) -> dict[str, dict[str, float]]:
+        """Return the hits, misses and hit rate of every memoized tool."""
+        return {
+            name: {
+                "hits": cache.stats.hits,
+                "misses": cache.stats.misses,
+                "hit_rate": round(cache.stats.hit_rate, 4),
+                "size": len(cache),
+            }
+            for name, cache in self._caches.items()
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[Tool]:
+        return iter(self._tools.values())
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+
+@dataclass
+class ToolExecutor:
+    """Run the tool calls of a model turn concurrently.
+
+    Async tools run on the event loop, sync tools in a bounded thread pool, and tools
+    flagged ``cpu_bound`` in a process pool. Every call has a timeout, and results are
+    returned in the order of the calls, errors included, ready to be sent back to the
+    model.
+
+    Parameters
+    ----------
+    tools : Iterable[Tool] | ToolRegistry
+        The tools available to the model. Memoized results of a ``ToolRegistry``
+        are returned without running the tool.
+    max_workers : int, optional
+        Size of the thread pool running sync tools, by default 8.
+    max_processes : int | None, optional
+        Size of the process pool running CPU-bound tools. None uses the number of
+        CPUs, by default None.
+    default_timeout : float | None, optional
+        Seconds a tool without its own ``timeout`` may run. None means no limit,
+        by default 30.0.
+
+    Notes
+    -----
+    A sync tool that times out keeps running in its worker thread (threads cannot be
+    cancelled); only its result is discarded. CPU-bound tools must be importable by
+    module and name, otherwise they run in the thread pool.
+    """
+
+    tools: Iterable[Tool] | ToolRegistry
+    max_workers: int = 8
+    max_processes: int | None = None
+    default_timeout: float | None = 30.0
+    registry: ToolRegistry = field(init=False, repr=False)
+    _thread_pool: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+    _process_pool: ProcessPoolExecutor | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.registry = self.tools if isinstance(self.tools, ToolRegistry) else ToolRegistry(self.tools)
+
+    def _get_thread_pool(self) -> Executor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._thread_pool
+
+    def _get_process_pool(self) -> Executor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._process_pool
+
+    async def _invoke(self, tool: Tool, args: dict[str, Any]) -> Any:
+        if tool.is_async:
+            return await tool.func(**args)
+        loop = asyncio.get_running_loop()
+        if tool.cpu_bound:
+            if (target := _process_target(tool)) is not None:
+                return await loop.run_in_executor(
+                    self._get_process_pool(), _run_tool_in_process, *target, args
+                )
+            logger.warning("Tool %s is not importable by name, running it in a thread", tool.name)
+        return await loop.run_in_executor(self._get_thread_pool(), partial(tool.func, **args))
+
+    async def arun(self, tool_call: Any) -> ToolResult:
+        """
+        Run one tool call.
+
+        Parameters
+        ----------
+        tool_call : Any
+            The tool call, in any format accepted by ``ToolCall.from_any``.
+
+        Returns
+        -------
+        ToolResult
+            The serialized result, or the error if the call is malformed (e.g. invalid
+            JSON arguments) or the tool is unknown, raised or timed out.
+        """
+        start_time: float = time.perf_counter()
+        try:
+            call: ToolCall = ToolCall.from_any(tool_call)
+        except Exception as e:
+            # Models regularly emit malformed JSON arguments: fail this call only
+            call_id, name = _describe_tool_call(tool_call)
+            logger.warning("Invalid tool call %s: %s", name, e)
+            return ToolResult(
+                tool_call_id=call_id,
+                name=name,
+                content=f"Error: invalid tool call {name!r}: {type(e).__name__}: {e}",
+                status="error",
+                duration=0.0,
+            )
+        tool: Tool | None = self.registry.get(call.name)
+        if tool is None:
+            return ToolResult(
+                tool_call_id=call.id,
+                name=call.name,
+                content=f"Error: unknown tool {call.name!r}",
+                status="error",
+                duration=0.0,
+            )
+        timeout: float | None = tool.timeout if tool.timeout is not None else self.default_timeout
+        try:
+            hit, result = self.registry.cached_result(call.name, call.args)
+            if not hit:
+                result = await asyncio.wait_for(self._invoke(tool, call.args), timeout=timeout)
+                self.registry.store_result(call.name, call.args, result)
+        except asyncio.TimeoutError:
+            content: str = f"Error: tool {call.name!r} timed out after {timeout}s"
+            status: Literal["success", "error"] = "error"
+        except Exception as e:
+            content, status = f"Error: {type(e).__name__}: {e}", "error"
+        else:
+            content, status = _serialize_result(result), "success"
+        if status == "error":
+            logger.warning("Tool call %s failed: %s", call.name, content)
+        return ToolResult(
+            tool_call_id=call.id,
+            name=call.name,
+            content=content,
+            status=status,
+            duration=time.perf_counter() - start_time,
+        )
+
+    async def aexecute(self, tool_calls: Iterable[Any]) -> list[ToolResult]:
+        """
+        Run independent tool calls concurrently.
+
+        Parameters
+        ----------
+        tool_calls : Iterable[Any]
+            The tool calls of one model turn, e.g. ``AIMessage.tool_calls``.
+
+        Returns
+        -------
+        list[ToolResult]
+            The results, in the order of ``tool_calls``.
+        """
+        return list(await asyncio.gather(*(self.arun(tool_call) for tool_call in tool_calls)))
+
+    async def aexecute_messages(self, tool_calls: Iterable[Any]) -> list[ToolMessage]:
+        """Run ``tool_calls`` concurrently and return the ``ToolMessage`` of each, in order."""
+        return [result.to_message() for result in await self.aexecute(tool_calls)]
+
+    def execute(self, tool_calls: Iterable[Any]) -> list[ToolResult]:
+        """Blocking variant of ``aexecute`` for code without a running event loop."""
+        return asyncio.run(self.aexecute(list(tool_calls)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut the worker pools down."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+    def __enter__(self) -> "ToolExecutor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
@@ -1,18 +1,12 @@
 import inspect
-import time
 from dataclasses import dataclass
-from functools import wraps
 from typing import Any, Callable
 
-from tenacity import (
-    AsyncRetrying,
-    retry,
-    stop_after_attempt,
-    stop_after_delay,
-    wait_fixed,
-)
+from tenacity import AsyncRetrying
 
 from src import create_logger
+from src.utilities.profiling_utils import profile
+from src.utilities.retry_utils import DEFAULT_RETRY_POLICY, RetryPolicy, is_retryable
 
 logger = create_logger()
 
@@ -34,6 +28,12 @@ class Tool:
         List of tuples containing argument names and their types.
     outputs : str
         Description of the function's return type.
+    cpu_bound : bool, optional
+        Whether ``ToolExecutor`` runs the tool in a process pool instead of a
+        thread pool, by default False.
+    timeout : float | None, optional
+        Seconds ``ToolExecutor`` waits for the tool. None uses the executor's
+        default, by default None.
     """
 
     name: str
@@ -41,6 +41,13 @@ class Tool:
     func: Callable
     arguments: list[tuple[str, str]]
     outputs: str
+    cpu_bound: bool = False
+    timeout: float | None = None
+
+    @property
+    def is_async(self) -> bool:
+        """Whether the tool function is a coroutine function."""
+        return inspect.iscoroutinefunction(self.func)
 
     def to_string(self) -> str:
         """
@@ -53,9 +60,9 @@ class Tool:
         """
         args_str = ", ".join([f"{name}: {_type}" for name, _type in self.arguments])
         return (
-            f"Tool Name: {self.name}, Description: {self.description}, Arguments: {args_str}",
-            f"Outputs: {self.outputs}",
-        )  # type: ignore
+            f"Tool Name: {self.name}, Description: {self.description}, Arguments: {args_str}, "
+            f"Outputs: {self.outputs}"
+        )
 
     def __call__(self, *args: Any, **kwargs: Any) -> Any:
         """
@@ -76,20 +83,32 @@ class Tool:
         return self.func(*args, **kwargs)
 
 
-def tool(func: Callable) -> Tool:
+def tool(
+    func: Callable | None = None, *, cpu_bound: bool = False, timeout: float | None = None
+) -> Any:
     """
     Decorator to create a Tool object from a function.
 
+    Use as ``@tool`` or ``@tool(cpu_bound=True, timeout=10)``.
+
     Parameters
     ----------
-    func : Callable
+    func : Callable | None, optional
         The function to convert into a Tool.
+    cpu_bound : bool, optional
+        Whether the tool runs in a process pool in ``ToolExecutor``, by default False.
+    timeout : float | None, optional
+        Seconds ``ToolExecutor`` waits for the tool, by default None.
 
     Returns
     -------
     Tool
-        A Tool object wrapping the provided function.
+        A Tool object wrapping the provided function, or a decorator creating one
+        when ``func`` is None.
     """
+    if func is None:
+        return lambda func: tool(func, cpu_bound=cpu_bound, timeout=timeout)
+
     signature = inspect.signature(func)
     # Extract the name and annotation
     arguments: list[tuple[str, str]] = []
@@ -121,91 +140,78 @@ def tool(func: Callable) -> Tool:
         func=func,
         arguments=arguments,
         outputs=outputs,
+        cpu_bound=cpu_bound,
+        timeout=timeout,
     )
 
 
 def async_retrying_with_print() -> AsyncRetrying:
     """
-    Creates and returns an AsyncRetrying instance with custom retry configuration.
-
-    The function configures retry behavior with fixed wait time, maximum attempts,
-    maximum delay, and custom callback functions for retry events.
+    Creates and returns an AsyncRetrying instance implementing ``DEFAULT_RETRY_POLICY``.
 
     Returns
     -------
     AsyncRetrying
         Configured AsyncRetrying instance with the following settings:
-        - Fixed wait time of 1 second between retries
-        - Stops after 5 attempts or 30 seconds delay
-        - Prints before and after each retry attempt
-        - Prints final failure information if all retries fail
+        - Exponential backoff with full jitter, honoring ``Retry-After``
+        - Only retries transient errors (rate limits, server errors, timeouts)
+        - Stops after 4 attempts, 180 seconds or when the retry budget is exhausted
+        - Logs every retry and the final failure
     """
-    return AsyncRetrying(
-        wait=wait_fixed(1),
-        stop=(stop_after_attempt(5) | stop_after_delay(180)),
-        before=lambda _: print("before:", _),
-        after=lambda _: print("after:", _),
-        # Add custom statistics
-        retry_error_callback=lambda state: print(
-            f"Final failure after {state.attempt_number} attempts: {{state.outcome.exception()}}"  # type: ignore
-        ),
-    )
+    return DEFAULT_RETRY_POLICY.async_retrying()
 
 
-def simple_retry(attempts: int = 5, delay: int = 1, timeout: int = 30) -> Callable[..., Any]:
+def simple_retry(
+    attempts: int = 5,
+    delay: int = 1,
+    timeout: int = 30,
+    retry_on: Callable[[BaseException], bool] = is_retryable,
+) -> Callable[..., Any]:
     """
-    A clean, simple retry decorator with logging.
+    A retry decorator with jittered exponential backoff and logging.
 
     Parameters
     ----------
     attempts : int, optional
         Maximum number of retry attempts, by default 5
     delay : int, optional
-        Fixed delay between attempts in seconds, by default 1
+        Base delay of the exponential backoff in seconds, by default 1
     timeout : int, optional
         Maximum total time in seconds before stopping retries, by default 30
+    retry_on : Callable[[BaseException], bool], optional
+        Classifies the errors worth retrying; pass ``lambda error: True`` to retry
+        every exception, by default ``is_retryable`` (transient API errors only)
 
     Returns
     -------
     callable
-        A configured retry decorator that implements the specified retry behavior
-        with logging of attempts and failures.
+        A configured retry decorator sharing the global retry budget.
     """
-    return retry(
-        wait=wait_fixed(delay),
-        stop=(stop_after_attempt(attempts) | stop_after_delay(timeout)),
-        before=lambda retry_state: print(f"Attempt {retry_state.attempt_number}..."),
-        after=lambda retry_state: print(f"Completed attempt {retry_state.attempt_number}"),
-        retry_error_callback=lambda retry_state: print(
-            f"Failed after {retry_state.attempt_number} attempts: {retry_state.outcome.exception()}"  # type: ignore
-        ),
-    )
+    return RetryPolicy(
+        name="simple_retry",
+        max_attempts=attempts,
+        base_delay=delay,
+        max_elapsed=timeout,
+        retry_on=retry_on,
+    ).retrying()
 
 
 def async_timer(func: Callable[..., Any]) -> Callable[..., Any]:
     """
-    A decorator that measures and prints the execution time of an async function.
+    A decorator that measures the execution time of a function.
+
+    Kept for backwards compatibility: this is ``profile`` from
+    ``src.utilities.profiling_utils``, whose statistics are in ``PROFILER.report()``
+    and whose per-call timings are logged at DEBUG level.
 
     Parameters
     ----------
     func : Callable
-        The async function to be timed.
+        The sync, async or async generator function to be timed.
 
     Returns
     -------
     Callable
-        A wrapped async function that prints execution time.
+        The profiled function.
     """
-
-    @wraps(func)
-    async def wrapper(*args: Any, **kwargs: Any) -> Any:
-        """
-        Wrapper function that times the execution of the decorated function.
-        """
-        start_time: float = time.perf_counter()
-        result = await func(*args, **kwargs)
-        duration: float = time.perf_counter() - start_time
-        logger.info(f"{func.__name__} executed in {duration:.2f} seconds")
-        return result
-
-    return wrapper
+    return profile(func)
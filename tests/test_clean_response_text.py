@@ -0,0 +1,127 @@
+import json
+import random
+from typing import Any
+
+import pytest
+
+from src.utilities.benchmarks import CLEANER_INPUTS, _clean_response_text_regex, _time_per_call
+from src.utilities.llm_utils import StreamingResponseCleaner, clean_response_text
+
+# Fragments the random inputs are built from, biased towards tags and fences
+_FRAGMENTS: list[str] = [
+    "<think>",
+    "</think>",
+    "`",
+    "```json",
+    "{",
+    "}",
+    "a",
+    " ",
+    "json",
+    "<",
+    "/",
+    "t",
+]
+
+
+def _stream(text: str, rng: random.Random) -> str:
+    """Feed ``text`` to a ``StreamingResponseCleaner`` in random chunks."""
+    cleaner = StreamingResponseCleaner()
+    output: str = ""
+    position: int = 0
+    while position < len(text):
+        size: int = rng.randint(1, 8)
+        cleaned: str = cleaner.feed(text[position : position + size])
+        position += size
+        if cleaner.restarted:
+            output = ""
+        output += cleaned
+    return (output + cleaner.flush()).strip()
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ('{"a": 1}', '{"a": 1}'),
+        ('<think>reasoning</think>{"a": 1}', '{"a": 1}'),
+        ('<think>one</think>{"a": <think>two</think>1}', '{"a": 1}'),
+        ('```json\n{"a": 1}\n```', '{"a": 1}'),
+        ('<think>x</think>```json\n{"a": 1}\n```', '{"a": 1}'),
+        # The chat template added the opening tag: drop everything before the stray one
+        ('The user wants {name}. Okay.</think>{"name": "A"}', '{"name": "A"}'),
+        ("a</think>b</think>c", "b</think>c"),
+        # An unclosed block drops the rest of the text
+        ('{"a": 1}<think>unfinished', '{"a": 1}'),
+        ("<think>" * 3, ""),
+        ("", ""),
+        ("x</th", "x</th"),
+    ],
+)
+def test_clean_response_text(text: str, expected: str) -> None:
+    assert clean_response_text(text) == expected
+
+
+def test_clean_response_text_extract_json() -> None:
+    text: str = 'Here is the JSON:\n```json\n{"a": [1, 2]}\n```\nAnything else?'
+    assert clean_response_text(text, extract_json=True) == '{"a": [1, 2]}'
+    assert clean_response_text("no json here", extract_json=True) == "no json here"
+
+
+@pytest.mark.parametrize("name", sorted(CLEANER_INPUTS))
+def test_clean_response_text_matches_regex_cleaner(name: str) -> None:
+    text: str = CLEANER_INPUTS[name]
+    if name in ("unclosed_think", "repeated_unclosed_think"):
+        # The regex keeps an unclosed block, the linear cleaner drops it
+        assert clean_response_text(text) == ""
+    else:
+        assert clean_response_text(text) == _clean_response_text_regex(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [f"<think>{'reasoning step. ' * 50_000}", "<think> " * 50_000, f"<think>{'`' * 200_000}"],
+    ids=["long_unclosed_think", "repeated_unclosed_think", "backticks_in_unclosed_think"],
+)
+def test_clean_response_text_drops_large_unclosed_think(text: str) -> None:
+    assert clean_response_text(text) == ""
+    assert clean_response_text(text, extract_json=True) == ""
+    assert _stream(text, random.Random(0)) == ""
+
+
+def test_clean_response_text_extracts_json_after_many_backticks() -> None:
+    text: str = f'{"` " * 100_000}{{"a": 1}}'
+    assert clean_response_text(text, extract_json=True) == '{"a": 1}'
+
+
+def test_clean_response_text_extracts_valid_json() -> None:
+    for text in CLEANER_INPUTS.values():
+        cleaned: str = clean_response_text(text, extract_json=True)
+        if cleaned:
+            json.loads(cleaned)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streaming_cleaner_matches_clean_response_text(seed: int) -> None:
+    rng = random.Random(seed)
+    samples: list[str] = [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 15))) for _ in range(500)
+    ]
+    for text in samples:
+        assert _stream(text, rng) == clean_response_text(text), text
+
+
+@pytest.mark.parametrize("name", sorted(CLEANER_INPUTS))
+def test_streaming_cleaner_matches_on_benchmark_inputs(name: str) -> None:
+    text: str = CLEANER_INPUTS[name]
+    assert _stream(text, random.Random(0)) == clean_response_text(text)
+
+
+# Throughput guards, run with `pytest -m benchmark` (requires pytest-benchmark)
+@pytest.mark.benchmark(group="clean_response_text")
+@pytest.mark.parametrize("name", sorted(CLEANER_INPUTS))
+def test_clean_response_text_throughput(benchmark: Any, name: str) -> None:
+    text: str = CLEANER_INPUTS[name]
+    benchmark(clean_response_text, text * 4, extract_json=True)
+    # Linear time: 4x the input must not cost much more than 4x the time
+    baseline: float = _time_per_call(lambda: clean_response_text(text, extract_json=True), 5) / 1e6
+    assert benchmark.stats.stats.min < 8 * baseline + 1e-3